@@ -0,0 +1,78 @@
+"""
+Benchmark for the Kepler solvers.
+
+Compares the old fixed 5-iteration fixed-point loop with engine.kepler, both
+for speed and for accuracy across eccentricities.
+
+Usage: python -m benchmarks.kepler_bench
+"""
+import math
+import random
+import timeit
+
+import numpy as np
+
+from engine.kepler import solve_kepler, solve_kepler_array
+from engine.physics import Orbit
+
+SAMPLES = 20000
+
+
+def legacy_get_position(orbit, t):
+    """The pre-solver Orbit.get_position body, kept here as the baseline."""
+    M = orbit.mean_anomaly_at_epoch + (2 * math.pi * t / orbit.period)
+    E = M
+    for _ in range(5):
+        E = M + orbit.eccentricity * math.sin(E)
+    P = orbit.semi_major_axis * (math.cos(E) - orbit.eccentricity)
+    Q = orbit.semi_major_axis * math.sqrt(1 - orbit.eccentricity**2) * math.sin(E)
+    cos_w = math.cos(orbit.argument_of_periapsis)
+    sin_w = math.sin(orbit.argument_of_periapsis)
+    return P * cos_w - Q * sin_w, P * sin_w + Q * cos_w
+
+
+def legacy_error(M, e):
+    """Residual of Kepler's equation left by the fixed-point loop."""
+    E = M
+    for _ in range(5):
+        E = M + e * math.sin(E)
+    return abs(E - e * math.sin(E) - M)
+
+
+def main():
+    rng = random.Random(0)
+    orbits = []
+    for _ in range(SAMPLES):
+        a = rng.uniform(10, 200)
+        orbits.append(Orbit(
+            semi_major_axis=a,
+            eccentricity=rng.uniform(0, 0.2),
+            inclination=0,
+            argument_of_periapsis=rng.uniform(0, 2 * math.pi),
+            mean_anomaly_at_epoch=rng.uniform(0, 2 * math.pi),
+            period=math.sqrt(a**3),
+        ))
+    t = 123.4
+
+    legacy = timeit.timeit(lambda: [legacy_get_position(o, t) for o in orbits], number=5) / 5
+    solver = timeit.timeit(lambda: [o.get_position(t) for o in orbits], number=5) / 5
+
+    M_arr = np.array([o.mean_anomaly_at_epoch + o.mean_motion * t for o in orbits])
+    e_arr = np.array([o.eccentricity for o in orbits])
+    vector = timeit.timeit(lambda: solve_kepler_array(M_arr, e_arr), number=20) / 20
+
+    print(f"{SAMPLES} orbits, e in [0, 0.2]")
+    print(f"  legacy get_position : {legacy * 1e3:8.2f} ms  ({legacy / SAMPLES * 1e9:6.0f} ns/body)")
+    print(f"  Orbit.get_position  : {solver * 1e3:8.2f} ms  ({solver / SAMPLES * 1e9:6.0f} ns/body)")
+    print(f"  solve_kepler_array  : {vector * 1e3:8.2f} ms  ({vector / SAMPLES * 1e9:6.0f} ns/body)")
+
+    print("Kepler residual |E - e sin E - M| (worst over M):")
+    for e in (0.1, 0.2, 0.5, 0.9):
+        Ms = [-math.pi + 2 * math.pi * k / 512 for k in range(512)]
+        old = max(legacy_error(M, e) for M in Ms)
+        new = max(abs(E - e * math.sin(E) - M) for M in Ms for E in [solve_kepler(M, e)[0]])
+        print(f"  e={e:.1f}  legacy {old:9.2e}   halley {new:9.2e}")
+
+
+if __name__ == "__main__":
+    main()
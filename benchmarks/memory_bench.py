@@ -0,0 +1,128 @@
+"""
+Memory per body: slotted classes against the pre-slots dataclasses.
+
+Generates a universe, then rebuilds its body hierarchies twice, once with
+the current (slotted) Planet / Orbit classes and once with copies of the
+previous dataclass layout kept here as the baseline. Both copies share the
+same names and position tuples, so tracemalloc measures only what each
+layout itself costs per body.
+
+Usage: python -m benchmarks.memory_bench [--galaxies N] [--systems N]
+"""
+import argparse
+import gc
+import math
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from engine.body.base import BodyType, CelestialBody
+from engine.body.planet import Planet, PlanetType
+from engine.generator import UniverseGenerator
+from engine.physics import Orbit
+
+
+@dataclass
+class LegacyOrbit:
+    """Orbit without slots."""
+
+    semi_major_axis: float
+    eccentricity: float
+    inclination: float
+    argument_of_periapsis: float
+    mean_anomaly_at_epoch: float
+    period: float
+    mean_motion: float = field(init=False, repr=False, compare=False)
+    semi_minor_axis: float = field(init=False, repr=False, compare=False)
+    cos_w: float = field(init=False, repr=False, compare=False)
+    sin_w: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.mean_motion = 2 * math.pi / self.period
+        self.semi_minor_axis = self.semi_major_axis * math.sqrt(1 - self.eccentricity**2)
+        self.cos_w = math.cos(self.argument_of_periapsis)
+        self.sin_w = math.sin(self.argument_of_periapsis)
+
+
+@dataclass
+class LegacyPlanet:
+    """Planet (CelestialBody fields included) without slots."""
+
+    name: str
+    mass: float
+    radius: float
+    type: BodyType = BodyType.PLANET
+    parent: Optional["LegacyPlanet"] = None
+    children: list = field(default_factory=list)
+    orbit: Optional[LegacyOrbit] = None
+    pos: Tuple[float, float] = (0.0, 0.0)
+    velocity: Tuple[float, float] = (0.0, 0.0)
+    luminosity: Optional[float] = None
+    temperature: Optional[float] = None
+    albedo: Optional[float] = None
+    composition: Optional[str] = None
+    description: Optional[str] = None
+    planet_type: PlanetType = PlanetType.TERRESTRIAL
+
+
+def copy_tree(body: CelestialBody, body_class, orbit_class, parent=None):
+    """Rebuild a body hierarchy with other classes, sharing names and tuples with the original."""
+    orbit = None
+    if body.orbit is not None:
+        o = body.orbit
+        orbit = orbit_class(
+            o.semi_major_axis, o.eccentricity, o.inclination,
+            o.argument_of_periapsis, o.mean_anomaly_at_epoch, o.period,
+        )
+    copy = body_class(
+        name=body.name,
+        mass=body.mass,
+        radius=body.radius,
+        type=body.type,
+        parent=parent,
+        orbit=orbit,
+        pos=body.pos,
+        velocity=body.velocity,
+        planet_type=getattr(body, "planet_type", PlanetType.TERRESTRIAL),
+    )
+    copy.children = [copy_tree(child, body_class, orbit_class, copy) for child in body.children]
+    return copy
+
+
+def count_bodies(body: CelestialBody) -> int:
+    return 1 + sum(count_bodies(child) for child in body.children)
+
+
+def traced(build: Callable[[], object]) -> int:
+    """Bytes still allocated by build() once it returns, while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--galaxies", type=int, default=4)
+    parser.add_argument("--systems", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    universe = UniverseGenerator(seed=1).generate_universe(num_galaxies=args.galaxies, num_systems=args.systems)
+    centers = [system.center for galaxy in universe.galaxies for system in galaxy.systems]
+    bodies = sum(count_bodies(center) for center in centers)
+
+    slotted = traced(lambda: [copy_tree(center, Planet, Orbit) for center in centers])
+    legacy = traced(lambda: [copy_tree(center, LegacyPlanet, LegacyOrbit) for center in centers])
+
+    print(f"{bodies} bodies in {len(centers)} systems")
+    print(f"  dataclass  {legacy / bodies:8.1f} bytes/body")
+    print(f"  slotted    {slotted / bodies:8.1f} bytes/body  ({slotted / legacy - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
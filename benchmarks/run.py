@@ -0,0 +1,254 @@
+"""
+Benchmark suite for the hot paths: generation, simulation and rendering.
+
+Universes are built with UniverseGenerator at a few sizes
+(galaxies x systems per galaxy x planets per system) and the following are
+timed:
+
+  generate/<size>            UniverseGenerator.generate_universe
+                             (also /workers=<n> with --workers)
+  update/scalar/<size>       SolarSystem.update over every system
+  update/batched/<size>      OrbitEngine.update over every system
+  render/<size>/zoom=<z>     AsciiRenderer.render into an in-memory sink
+                             (suffixed /workers=<n> with --workers; also
+                             /orbits with orbit trails drawn)
+  shade/<planet type>/r=<r>  PlanetRenderer.shade at a pixel radius
+  gravity/<method>/n=<n>     one gravity acceleration evaluation, direct
+                             summation or Barnes-Hut
+
+Results are written as JSON; pass a previous results file with --baseline
+to print the change against it and flag regressions.
+
+Usage: python -m benchmarks.run [--quick] [--workers N] [--output FILE] [--baseline FILE]
+
+The Kepler solver has its own micro-benchmark in benchmarks/kepler_bench.py.
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from engine.body.base import BodyType
+from engine.body.planet import Planet, PlanetType
+from engine.camera import Camera
+from engine.generator import UniverseGenerator
+from engine.orbit_engine import OrbitEngine
+from engine.physics import QuadTree, direct_accelerations
+from engine.renderer.ascii_renderer import AsciiRenderer
+from engine.renderer.base_renderer import get_renderer
+from engine.renderer.sprite_cache import SPRITE_CACHE
+
+# name: (galaxies, systems per galaxy, planets per system)
+SIZES: Dict[str, Tuple[int, int, int]] = {
+    "small": (2, 5, 4),
+    "medium": (10, 50, 4),
+    "large": (40, 250, 4),
+}
+QUICK_SIZES = ("small", "medium")
+
+ZOOMS = (0.01, 0.1, 0.5, 2.0, 10.0)
+RADII = (1, 4, 16, 64)
+GRAVITY_BODIES = (256, 2048, 16384)
+
+SEED = 1
+RENDER_WIDTH = 100
+RENDER_HEIGHT = 40
+RENDER_FRAMES = 20
+DELTA_TIME = 0.1
+
+# Slowdown (relative) above which a result counts as a regression, ignoring
+# differences smaller than the absolute noise floor
+REGRESSION_THRESHOLD = 0.10
+NOISE_FLOOR_MS = 0.05
+
+
+def measure(fn: Callable[[], None], repeat: int) -> Dict[str, float]:
+    """Run fn `repeat` times and summarise the wall time per run in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "runs": repeat,
+    }
+
+
+def build_universe(size: Tuple[int, int, int]):
+    galaxies, systems, planets = size
+    return UniverseGenerator(seed=SEED).generate_universe(
+        num_galaxies=galaxies, num_systems=systems, num_planets=planets
+    )
+
+
+def bench_generation(results: Dict[str, dict], name: str, size: Tuple[int, int, int], repeat: int, workers: int = 0) -> None:
+    results[f"generate/{name}"] = measure(lambda: build_universe(size), repeat)
+    if workers:
+        galaxies, systems, planets = size
+        results[f"generate/{name}/workers={workers}"] = measure(
+            lambda: UniverseGenerator(seed=SEED).generate_universe(
+                num_galaxies=galaxies, num_systems=systems, num_planets=planets, workers=workers
+            ),
+            repeat,
+        )
+
+
+def bench_update(results: Dict[str, dict], name: str, universe, repeat: int) -> None:
+    systems = [system for galaxy in universe.galaxies for system in galaxy.systems]
+    clock = [0.0]
+
+    def scalar():
+        clock[0] += DELTA_TIME
+        for system in systems:
+            system.update(clock[0])
+
+    engine = OrbitEngine(systems)
+
+    def batched():
+        clock[0] += DELTA_TIME
+        engine.update(clock[0])
+        engine.write_back()
+
+    results[f"update/scalar/{name}"] = measure(scalar, repeat)
+    results[f"update/batched/{name}"] = measure(batched, repeat)
+
+
+def bench_render(results: Dict[str, dict], name: str, universe, frames: int, workers: int = 0) -> None:
+    # Look at the first system so every zoom level has something to draw
+    center = universe.galaxies[0].systems[0].center.pos
+    for zoom, orbits in ((zoom, orbits) for zoom in ZOOMS for orbits in (False, True)):
+        camera = Camera(center=center, zoom=zoom, min_zoom=0.01, max_zoom=100.0)
+        sink = io.BytesIO()
+        renderer = AsciiRenderer(
+            width=RENDER_WIDTH, height=RENDER_HEIGHT, camera=camera, stream=sink, workers=workers, show_orbits=orbits
+        )
+
+        def frame():
+            universe.set_time(universe.time + DELTA_TIME)
+            sink.seek(0)
+            sink.truncate()
+            renderer.render(universe, status=f"Time: {universe.time:.2f}s")
+
+        # First frame fills the sprite and orbit path caches and evaluates every visible system
+        frame()
+        suffix = (f"/workers={workers}" if workers else "") + ("/orbits" if orbits else "")
+        results[f"render/{name}/zoom={zoom:g}{suffix}"] = measure(frame, frames)
+        renderer.close()
+
+
+def bench_shaders(results: Dict[str, dict], repeat: int, radii) -> None:
+    renderer = get_renderer(BodyType.PLANET)
+    for planet_type in PlanetType:
+        body = Planet(name=f"Bench-{planet_type.name}", mass=1.0, radius=1.0, planet_type=planet_type)
+        for radius_px in radii:
+            runs = max(1, repeat if radius_px < 32 else repeat // 4)
+            results[f"shade/{planet_type.name.lower()}/r={radius_px}"] = measure(
+                lambda: renderer.shade(body, radius_px), runs
+            )
+
+
+def bench_gravity(results: Dict[str, dict], repeat: int, counts) -> None:
+    rng = np.random.default_rng(SEED)
+    for n in counts:
+        positions = rng.normal(size=(n, 2)) * 100
+        masses = rng.uniform(0.1, 10, n)
+        if n <= 4096:
+            # The pairwise arrays grow as n^2
+            results[f"gravity/direct/n={n}"] = measure(lambda: direct_accelerations(positions, masses), repeat)
+        results[f"gravity/barnes-hut/n={n}"] = measure(
+            lambda: QuadTree(positions, masses).accelerations(positions), repeat
+        )
+
+
+def run(quick: bool = False, workers: int = 0) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    sizes = QUICK_SIZES if quick else tuple(SIZES)
+    repeat = 3 if quick else 5
+
+    for name in sizes:
+        size = SIZES[name]
+        print(f"[{name}] {size[0]} galaxies x {size[1]} systems x {size[2]} planets", file=sys.stderr)
+        bench_generation(results, name, size, repeat, workers)
+        universe = build_universe(size)
+        bench_update(results, name, universe, repeat)
+        SPRITE_CACHE.clear()
+        bench_render(results, name, universe, RENDER_FRAMES // 2 if quick else RENDER_FRAMES, workers)
+
+    bench_shaders(results, repeat, RADII[:3] if quick else RADII)
+    bench_gravity(results, repeat, GRAVITY_BODIES[:2] if quick else GRAVITY_BODIES)
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """
+    Print each result against the baseline; return the names that regressed.
+
+    Runs are compared by their fastest sample, which is far less sensitive
+    to scheduler and GC noise than the median.
+    """
+    regressions = []
+    for key, result in results.items():
+        current = result["min_ms"]
+        previous = baseline.get(key, {}).get("min_ms")
+        if previous is None:
+            print(f"  {key:<36} {current:10.3f} ms   (new)")
+            continue
+        change = (current - previous) / previous if previous else 0.0
+        flag = ""
+        if change > threshold and current - previous > NOISE_FLOOR_MS:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"  {key:<36} {current:10.3f} ms   {previous:10.3f} ms   {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repetitions")
+    parser.add_argument("--workers", type=int, default=0, help="generate and render with this many processes")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous results JSON file")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="relative slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(quick=args.quick, workers=args.workers)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "workers": args.workers,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        print(f"{'benchmark (min)':<38} {'current':>13}   {'baseline':>13}   change")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    else:
+        for key, result in results.items():
+            print(f"  {key:<36} {result['median_ms']:10.3f} ms  (min {result['min_ms']:.3f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
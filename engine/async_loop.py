@@ -0,0 +1,110 @@
+import asyncio
+from typing import Callable, Generic, Optional, TypeVar
+
+from engine.input import InputSource, NoInput
+from engine.runloop import LoopStats
+
+S = TypeVar("S")
+
+
+class AsyncRunLoop(Generic[S]):
+    """
+    Asyncio loop running input, simulation and output as separate tasks.
+
+    - Input polls the source every `input_interval` seconds and handles keys
+      right away, so input latency does not depend on render cost.
+    - Simulation runs `step` on a fixed `step_time` schedule. It never waits
+      for output; when the event loop falls more than `max_steps` behind the
+      backlog is dropped.
+    - Output renders the latest state only. `capture` takes a snapshot of the
+      shared state on the event loop, then `render(snapshot)` draws and writes
+      it in a worker thread. Steps finished while a frame is being written are
+      never rendered, so a slow terminal drops frames instead of holding back
+      the simulation clock.
+    """
+
+    def __init__(
+        self,
+        step: Callable[[], None],
+        capture: Callable[[], S],
+        render: Callable[[S], None],
+        *,
+        source: Optional[InputSource] = None,
+        on_key: Optional[Callable[[str], None]] = None,
+        step_time: float = 0.05,
+        max_steps: int = 5,
+        input_interval: float = 0.01,
+    ) -> None:
+        self.step = step
+        self.capture = capture
+        self.render = render
+        self.source = source or NoInput()
+        self.on_key = on_key
+        self.step_time = step_time
+        self.max_steps = max_steps
+        self.input_interval = input_interval
+        self.stats = LoopStats()
+        self.running = False
+        self._dirty: Optional[asyncio.Event] = None
+
+    def stop(self) -> None:
+        """End all tasks; output still draws the last simulated state before returning."""
+        self.running = False
+        if self._dirty is not None:
+            self._dirty.set()
+
+    async def run(self, steps: Optional[int] = None) -> LoopStats:
+        """Run until stop() is called or `steps` simulation steps have run."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self._dirty = asyncio.Event()
+        self.running = True
+        try:
+            await asyncio.gather(self._input(), self._simulate(steps), self._output())
+        finally:
+            self.running = False
+            self.stats.elapsed = loop.time() - start
+        return self.stats
+
+    async def _input(self) -> None:
+        while self.running:
+            for key in self.source.poll():
+                if self.on_key is not None:
+                    self.on_key(key)
+            await asyncio.sleep(self.input_interval)
+
+    async def _simulate(self, steps: Optional[int]) -> None:
+        loop = asyncio.get_running_loop()
+        stats = self.stats
+        deadline = loop.time()
+        while self.running and (steps is None or stats.steps < steps):
+            self.step()
+            stats.steps += 1
+            self._dirty.set()
+
+            deadline += self.step_time
+            behind = loop.time() - deadline
+            if behind > self.max_steps * self.step_time:
+                # Too far behind to catch up, forget the backlog
+                stats.dropped_steps += int(behind // self.step_time)
+                deadline = loop.time()
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+        self.stop()
+
+    async def _output(self) -> None:
+        stats = self.stats
+        rendered = 0
+        while True:
+            if stats.steps == rendered:
+                if not self.running:
+                    return
+                await self._dirty.wait()
+                self._dirty.clear()
+                continue
+            # Snapshot on the event loop so input and simulation never change
+            # the state while the worker thread draws it
+            snapshot = self.capture()
+            stats.skipped_frames += stats.steps - rendered - 1
+            rendered = stats.steps
+            await asyncio.to_thread(self.render, snapshot)
+            stats.frames += 1
@@ -4,7 +4,16 @@ from enum import Enum
 from abc import abstractmethod, ABC
 
 from engine.camera import Camera
-from engine.physics import Orbit
+from engine.physics import Orbit, SimulationMode
+
+# Hierarchy changes made through add_child so far, see hierarchy_changes
+_hierarchy_changes = 0
+
+
+def hierarchy_changes() -> int:
+    """A number that changes whenever any body gains a child, so caches built from a hierarchy can tell they are stale."""
+    return _hierarchy_changes
+
 
 class BodyType(Enum):
     STAR = "Star"
@@ -14,7 +23,7 @@ class BodyType(Enum):
     BLACK_HOLE = "Black Hole"
 
 
-@dataclass
+@dataclass(slots=True)
 class CelestialBody(ABC):
     """A celestial body with optional physical metadata."""
 
@@ -39,8 +48,18 @@ class CelestialBody(ABC):
     composition: Optional[str] = None
     description: Optional[str] = None
 
+    # Rails or integrated; None picks the default for the body type
+    mode: Optional[SimulationMode] = None
+
+    def __post_init__(self) -> None:
+        if self.mode is None:
+            free = self.type in (BodyType.ASTEROID, BodyType.DEBRIS)
+            self.mode = SimulationMode.AUTO if free else SimulationMode.RAILS
+
     def add_child(self, child: "CelestialBody", orbit: Optional["Orbit"] = None) -> None:
         """Add a child body orbiting this body."""
+        global _hierarchy_changes
+        _hierarchy_changes += 1
         child.parent = self
         if orbit:
             child.orbit = orbit
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 from enum import Enum
+from typing import Optional
+import hashlib
 import math
 
 from engine.body.base import BodyType, CelestialBody
@@ -12,10 +14,26 @@ class PlanetType(Enum):
     TERRESTRIAL = "Terrestrial"
     LAVA_GIANT = "Lava Giant"
 
-@dataclass
+# Bytes of the digest a planet's look is derived from
+APPEARANCE_SIZE = 32
+
+
+def planet_appearance(seed: int, name: str) -> bytes:
+    """
+    Digest of a planet's look, from the universe seed and its name.
+
+    Unlike hash() of a str it does not depend on the process, so a planet
+    looks the same across runs and in every render worker.
+    """
+    return hashlib.blake2b(f"{seed}/{name}".encode(), digest_size=APPEARANCE_SIZE).digest()
+
+
+@dataclass(slots=True)
 class Planet(CelestialBody):
     type: BodyType = BodyType.PLANET
     planet_type: PlanetType = PlanetType.TERRESTRIAL
+    # Shader parameters are read from this digest (see planet_appearance); filled in on first render if None
+    appearance: Optional[bytes] = None
 
 #     GRADIENT = [" ", "·", ":", "*", "o", "O", "@"]
 
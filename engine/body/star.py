@@ -5,7 +5,7 @@ from engine.body.base import CelestialBody
 from engine.body.base import BodyType
 from engine.camera import Camera
 
-@dataclass
+@dataclass(slots=True)
 class Star(CelestialBody):
     type: BodyType = BodyType.STAR
 
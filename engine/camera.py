@@ -33,6 +33,13 @@ class Camera:
         new_target = max(self.min_zoom, min(self.max_zoom, new_target))
         self.target_zoom = new_target
 
+    def viewport(self, width: int, height: int) -> tuple[float, float, float, float]:
+        """World-space rectangle (min_x, min_y, max_x, max_y) visible on a width x height screen"""
+        cx, cy = self.center
+        half_w = width / 2 / self.zoom
+        half_h = height / 2 / self.zoom
+        return (cx - half_w, cy - half_h, cx + half_w, cy + half_h)
+
     def update(self, dt: float) -> None:
         """Update the camera state"""
         diff = self.target_zoom - self.zoom
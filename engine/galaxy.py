@@ -1,6 +1,9 @@
+import math
 from dataclasses import dataclass, field
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
+from .orbit_engine import OrbitEngine
+from .spatial import SpatialGrid
 from .system import SolarSystem
 
 
@@ -10,4 +13,125 @@ class Galaxy:
 
     name: str
     pos: Tuple[float, float]
-    systems: List[SolarSystem] = field(default_factory=list)
\ No newline at end of file
+    systems: List[SolarSystem] = field(default_factory=list)
+
+    _engine: Optional[OrbitEngine] = field(default=None, init=False, repr=False, compare=False)
+    _index: Optional[SpatialGrid[SolarSystem]] = field(default=None, init=False, repr=False, compare=False)
+    _bounding_radius: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the systems exist in memory (always true for an eager galaxy)."""
+        return True
+
+    @property
+    def system_count(self) -> int:
+        return len(self.systems)
+
+    @property
+    def bounding_radius(self) -> float:
+        """Radius around the galaxy center that contains every system's bounding circle."""
+        if self._bounding_radius is None:
+            gx, gy = self.pos
+            self._bounding_radius = max(
+                (math.hypot(s.center.pos[0] - gx, s.center.pos[1] - gy) + s.bounding_radius for s in self.systems),
+                default=0.0,
+            )
+        return self._bounding_radius
+
+    def invalidate(self) -> None:
+        """Forget everything built from the systems' hierarchies, after bodies moved between parents."""
+        self._engine = None
+        self._index = None
+        self._bounding_radius = None
+        if self.loaded:
+            for system in self.systems:
+                system.invalidate()
+
+    def invalidate_bounds(self) -> None:
+        """Forget the bounds and system index only, after bodies moved off the rails within their systems."""
+        self._index = None
+        self._bounding_radius = None
+
+    def orbit_engine(self) -> OrbitEngine:
+        """Batched orbit engine over this galaxy's systems, built on first use."""
+        if self._engine is None or len(self._engine.systems) != len(self.systems):
+            self._engine = OrbitEngine(self.systems)
+        return self._engine
+
+    def system_index(self) -> SpatialGrid[SolarSystem]:
+        """Spatial index over this galaxy's system bounding circles, built on first use."""
+        if self._index is None or len(self._index) != len(self.systems):
+            self._index = SpatialGrid.build(
+                self.systems,
+                [s.center.pos for s in self.systems],
+                [s.bounding_radius for s in self.systems],
+            )
+        return self._index
+
+
+class LazyGalaxy(Galaxy):
+    """
+    Galaxy whose systems are generated on first access.
+
+    `loader` must return the same systems every time it is called, so
+    unload() can drop them under memory pressure and they come back
+    identical when next needed. The bounding radius is a bound supplied up
+    front, letting culling skip the galaxy without generating anything.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pos: Tuple[float, float],
+        loader: Callable[[], List[SolarSystem]],
+        system_count: int,
+        bounding_radius: float,
+    ) -> None:
+        super().__init__(name=name, pos=pos)
+        self._loader = loader
+        self._system_count = system_count
+        self._bounding_radius = bounding_radius
+        # Galaxy.__init__ assigned the empty default, nothing is loaded yet
+        self._systems = None
+
+    @property
+    def systems(self) -> List[SolarSystem]:
+        if self._systems is None:
+            self._systems = self._loader()
+        return self._systems
+
+    @systems.setter
+    def systems(self, systems: List[SolarSystem]) -> None:
+        self._systems = systems
+
+    @property
+    def loaded(self) -> bool:
+        return self._systems is not None
+
+    @property
+    def system_count(self) -> int:
+        return self._system_count
+
+    @property
+    def bounding_radius(self) -> float:
+        return self._bounding_radius
+
+    def invalidate(self) -> None:
+        # The upfront bound still holds
+        bound = self._bounding_radius
+        super().invalidate()
+        self._bounding_radius = bound
+
+    def invalidate_bounds(self) -> None:
+        self._index = None
+
+    def unload(self) -> None:
+        """Drop the systems and everything derived from them; they are regenerated on next access."""
+        self._systems = None
+        self._engine = None
+        self._index = None
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "unloaded"
+        return f"LazyGalaxy(name={self.name!r}, pos={self.pos!r}, systems={self._system_count}, {state})"
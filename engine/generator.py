@@ -1,72 +1,181 @@
+import hashlib
+import itertools
 import random
 import math
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 
 from engine.universe import Universe
-from engine.galaxy import Galaxy
+from engine.galaxy import Galaxy, LazyGalaxy
 from engine.system import SolarSystem
 from engine.body.base import CelestialBody, BodyType
 from engine.body.star import Star
-from engine.body.planet import Planet, PlanetType
+from engine.body.planet import Planet, PlanetType, planet_appearance
 from engine.physics import Orbit
+from engine.packing import pack_systems, unpack_systems
+
+# Generation ranges, also used to bound the size of galaxies that are not generated yet
+UNIVERSE_EXTENT = 1000         # Galaxy centers lie in [-extent, extent] on both axes
+SYSTEM_SCATTER = (10, 200)     # Distance of systems from their galaxy center
+STAR_RADIUS = (2, 10)
+MAX_PLANETS = 8
+PLANET_DISTANCE = (10, 100)    # Plus PLANET_SPACING per planet index
+PLANET_SPACING = 15
+PLANET_ECCENTRICITY = (0, 0.2)
+PLANET_RADIUS = (0.5, 2)
+MAX_MOONS = 3
+MOON_DISTANCE = (2, 5)         # Plus 1 per moon index
+MOON_ECCENTRICITY = (0, 0.1)
+MOON_RADIUS = 0.2
+
+# Systems generated per pool task when generating with workers
+CHUNK_SYSTEMS = 256
+
+
+def region_seed(seed: int, *path: int) -> int:
+    """
+    Seed for one region of the universe, e.g. (seed, galaxy) or (seed, galaxy, system).
+
+    Derived by hashing, so every region has an independent stream that does
+    not depend on which other regions were generated, or in what order.
+    """
+    key = "/".join(str(part) for part in (seed, *path)).encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
 
 class UniverseGenerator:
-    """Generates a procedural universe."""
+    """
+    Generates a procedural universe.
+
+    generate_universe() builds everything eagerly from the global random
+    stream. With lazy=True (or galaxy_at / iter_galaxies) every galaxy and
+    every system gets its own RNG derived from (seed, galaxy, system), so
+    regions can be generated in any order, lazily, and regenerated
+    identically after being thrown away. Because regions are independent,
+    workers=N generates them across a process pool, with results identical
+    to loading every galaxy of the lazy=True universe.
+    """
 
     def __init__(self, seed: int = None):
         if seed:
             random.seed(seed)
+        # Regions need a seed even when the global stream is left alone
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(63)
+
+    def region_rng(self, *path: int) -> random.Random:
+        return random.Random(region_seed(self.seed, *path))
+
+    def generate_universe(self, num_galaxies: int = 3, num_systems: int = 5, num_planets: Optional[int] = None, lazy: bool = False, workers: int = 0) -> Universe:
+        if workers:
+            if lazy:
+                raise ValueError("lazy galaxies are generated on demand, not by workers")
+            return self._generate_parallel(num_galaxies, num_systems, num_planets, workers)
+        if lazy:
+            return Universe(galaxies=[self.galaxy_at(i, num_systems, num_planets) for i in range(num_galaxies)])
 
-    def generate_universe(self, num_galaxies: int = 3) -> Universe:
         galaxies = []
         for i in range(num_galaxies):
-            pos = (random.uniform(-1000, 1000), random.uniform(-1000, 1000))
-            galaxies.append(self.generate_galaxy(f"Galaxy-{i}", pos))
+            pos = (random.uniform(-UNIVERSE_EXTENT, UNIVERSE_EXTENT), random.uniform(-UNIVERSE_EXTENT, UNIVERSE_EXTENT))
+            galaxies.append(self.generate_galaxy(f"Galaxy-{i}", pos, num_systems, num_planets))
         return Universe(galaxies=galaxies)
 
-    def generate_galaxy(self, name: str, pos: Tuple[float, float], num_systems: int = 5) -> Galaxy:
+    def galaxy_at(self, index: int, num_systems: int = 5, num_planets: Optional[int] = None) -> LazyGalaxy:
+        """The galaxy at an index, with its systems generated on first access."""
+        rng = self.region_rng(index)
+        pos = (rng.uniform(-UNIVERSE_EXTENT, UNIVERSE_EXTENT), rng.uniform(-UNIVERSE_EXTENT, UNIVERSE_EXTENT))
+        name = f"Galaxy-{index}"
+        return LazyGalaxy(
+            name=name,
+            pos=pos,
+            loader=lambda: [self.system_at(index, i, pos, num_planets) for i in range(num_systems)],
+            system_count=num_systems,
+            bounding_radius=SYSTEM_SCATTER[1] + self.system_radius_bound(num_planets),
+        )
+
+    def _generate_parallel(self, num_galaxies: int, num_systems: int, num_planets: Optional[int], workers: int) -> Universe:
+        # Chunks of systems rather than whole galaxies, so a few large galaxies still spread over every worker
+        chunks = [
+            (index, start, min(start + CHUNK_SYSTEMS, num_systems))
+            for index in range(num_galaxies)
+            for start in range(0, num_systems, CHUNK_SYSTEMS)
+        ]
+        galaxies = [self.galaxy_at(index, num_systems, num_planets) for index in range(num_galaxies)]
+        systems: List[List[SolarSystem]] = [[] for _ in galaxies]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _generate_chunk,
+                *zip(*[(self.seed, index, start, stop, galaxies[index].pos, num_planets) for index, start, stop in chunks]),
+            )
+            # Results arrive in submission order, so systems keep their index order
+            for (index, _, _), packed in zip(chunks, results):
+                systems[index].extend(unpack_systems(packed))
+        return Universe(galaxies=[Galaxy(name=g.name, pos=g.pos, systems=s) for g, s in zip(galaxies, systems)])
+
+    def iter_galaxies(self, num_systems: int = 5, num_planets: Optional[int] = None, start: int = 0) -> Iterator[LazyGalaxy]:
+        """Lazy galaxies at index start, start + 1, ... without end."""
+        for index in itertools.count(start):
+            yield self.galaxy_at(index, num_systems, num_planets)
+
+    def system_at(self, galaxy_index: int, index: int, galaxy_pos: Tuple[float, float], num_planets: Optional[int] = None) -> SolarSystem:
+        """The system at an index in a galaxy, generated from its own RNG."""
+        rng = self.region_rng(galaxy_index, index)
+        return self._scatter_system(f"Galaxy-{galaxy_index}-Sys-{index}", galaxy_pos, num_planets, rng)
+
+    @staticmethod
+    def system_radius_bound(num_planets: Optional[int] = None) -> float:
+        """Upper bound of SolarSystem.bounding_radius for any generated system."""
+        planets = MAX_PLANETS if num_planets is None else num_planets
+        moon_reach = (MOON_DISTANCE[1] + MAX_MOONS - 1) * (1 + MOON_ECCENTRICITY[1]) + MOON_RADIUS
+        planet_extent = max(PLANET_RADIUS[1], moon_reach)
+        outer = PLANET_DISTANCE[1] + PLANET_SPACING * (planets - 1)
+        return max(STAR_RADIUS[1], outer * (1 + PLANET_ECCENTRICITY[1]) + planet_extent)
+
+    def generate_galaxy(self, name: str, pos: Tuple[float, float], num_systems: int = 5, num_planets: Optional[int] = None, rng=random) -> Galaxy:
         systems = []
         for i in range(num_systems):
-            # Scatter systems around galaxy center
-            angle = random.uniform(0, 2 * math.pi)
-            dist = random.uniform(10, 200)
-            sys_pos = (pos[0] + dist * math.cos(angle), pos[1] + dist * math.sin(angle))
-            
-            systems.append(self.generate_system(f"{name}-Sys-{i}", sys_pos))
+            systems.append(self._scatter_system(f"{name}-Sys-{i}", pos, num_planets, rng))
         
         return Galaxy(name=name, pos=pos, systems=systems)
 
-    def generate_system(self, name: str, pos: Tuple[float, float]) -> SolarSystem:
+    def _scatter_system(self, name: str, galaxy_pos: Tuple[float, float], num_planets: Optional[int], rng) -> SolarSystem:
+        # Scatter systems around galaxy center
+        angle = rng.uniform(0, 2 * math.pi)
+        dist = rng.uniform(*SYSTEM_SCATTER)
+        sys_pos = (galaxy_pos[0] + dist * math.cos(angle), galaxy_pos[1] + dist * math.sin(angle))
+        return self.generate_system(name, sys_pos, num_planets, rng)
+
+    def generate_system(self, name: str, pos: Tuple[float, float], num_planets: Optional[int] = None, rng=random) -> SolarSystem:
         # Create a star
         star = Star(
             name=f"{name}-Star",
             pos=pos,
             velocity=(0, 0),
-            mass=random.uniform(0.5, 5.0) * 1000,
-            radius=random.uniform(2, 10)
+            mass=rng.uniform(0.5, 5.0) * 1000,
+            radius=rng.uniform(*STAR_RADIUS)
         )
 
-        # Generate planets
-        num_planets = random.randint(1, 8)
+        # Generate planets (random count unless one is given)
+        if num_planets is None:
+            num_planets = rng.randint(1, MAX_PLANETS)
         for i in range(num_planets):
-            dist = random.uniform(10, 100) + (i * 15)
-            planet = self.generate_planet(f"{name}-P{i}", dist)
+            dist = rng.uniform(*PLANET_DISTANCE) + (i * PLANET_SPACING)
+            planet = self.generate_planet(f"{name}-P{i}", dist, rng)
             star.add_child(planet, planet.orbit)
 
         return SolarSystem(name=name, center=star)
 
-    def generate_planet(self, name: str, distance: float) -> Planet:
-        p_type = random.choice(list(PlanetType))
-        mass = random.uniform(0.1, 10)
-        radius = random.uniform(0.5, 2)
+    def generate_planet(self, name: str, distance: float, rng=random) -> Planet:
+        p_type = rng.choice(list(PlanetType))
+        mass = rng.uniform(0.1, 10)
+        radius = rng.uniform(*PLANET_RADIUS)
         
         # Create orbit
         orbit = Orbit(
             semi_major_axis=distance,
-            eccentricity=random.uniform(0, 0.2),
+            eccentricity=rng.uniform(*PLANET_ECCENTRICITY),
             inclination=0,
-            argument_of_periapsis=random.uniform(0, 2 * math.pi),
-            mean_anomaly_at_epoch=random.uniform(0, 2 * math.pi),
+            argument_of_periapsis=rng.uniform(0, 2 * math.pi),
+            mean_anomaly_at_epoch=rng.uniform(0, 2 * math.pi),
             period=math.sqrt(distance**3) # Simplified Kepler's 3rd law (ignoring G and M for now)
         )
 
@@ -76,28 +185,29 @@ class UniverseGenerator:
             velocity=(0, 0),
             mass=mass,
             radius=radius,
-            planet_type=p_type
+            planet_type=p_type,
+            appearance=planet_appearance(self.seed, name),
         )
         planet.orbit = orbit
 
         # Chance for moons
-        if random.random() < 0.5:
-            num_moons = random.randint(1, 3)
+        if rng.random() < 0.5:
+            num_moons = rng.randint(1, MAX_MOONS)
             for i in range(num_moons):
-                moon_dist = random.uniform(2, 5) + (i * 1)
-                moon = self.generate_moon(f"{name}-M{i}", moon_dist)
+                moon_dist = rng.uniform(*MOON_DISTANCE) + (i * 1)
+                moon = self.generate_moon(f"{name}-M{i}", moon_dist, rng)
                 planet.add_child(moon, moon.orbit)
 
         return planet
 
-    def generate_moon(self, name: str, distance: float) -> Planet:
+    def generate_moon(self, name: str, distance: float, rng=random) -> Planet:
         # Moons are just small planets for now
         orbit = Orbit(
             semi_major_axis=distance,
-            eccentricity=random.uniform(0, 0.1),
+            eccentricity=rng.uniform(*MOON_ECCENTRICITY),
             inclination=0,
-            argument_of_periapsis=random.uniform(0, 2 * math.pi),
-            mean_anomaly_at_epoch=random.uniform(0, 2 * math.pi),
+            argument_of_periapsis=rng.uniform(0, 2 * math.pi),
+            mean_anomaly_at_epoch=rng.uniform(0, 2 * math.pi),
             period=math.sqrt(distance**3) * 0.2 # Faster orbits for moons
         )
         
@@ -106,8 +216,15 @@ class UniverseGenerator:
             pos=(0, 0),
             velocity=(0, 0),
             mass=0.01,
-            radius=0.2,
-            planet_type=PlanetType.TERRESTRIAL
+            radius=MOON_RADIUS,
+            planet_type=PlanetType.TERRESTRIAL,
+            appearance=planet_appearance(self.seed, name),
         )
         moon.orbit = orbit
         return moon
+
+
+def _generate_chunk(seed: int, galaxy_index: int, start: int, stop: int, galaxy_pos: Tuple[float, float], num_planets: Optional[int]) -> bytes:
+    """Pool task: systems [start, stop) of a galaxy, packed for the trip back."""
+    generator = UniverseGenerator(seed)
+    return pack_systems([generator.system_at(galaxy_index, i, galaxy_pos, num_planets) for i in range(start, stop)])
@@ -0,0 +1,362 @@
+"""
+Hybrid simulation: Keplerian rails for most bodies, integration for a few.
+
+Bodies in SimulationMode.RAILS never leave their orbits. DYNAMIC bodies are
+always integrated, AUTO bodies (asteroids and debris by default) only while
+they need it. Integrated bodies are test particles: they feel the gravity
+of every body on rails in their system, at its closed-form position, but
+do not pull on anything themselves. The cost therefore grows with the few
+free bodies only.
+
+Handoffs follow patched conics. An integrated body belongs to the body
+whose sphere of influence it is in (its parent in the hierarchy): leaving
+that sphere hands it to the grandparent, entering a child's sphere hands it
+to the child. An AUTO body whose orbit around its parent is bound and stays
+inside the sphere of influence is put back on rails with that orbit; an
+AUTO body on rails whose orbit takes it outside the sphere is released.
+"""
+import math
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from engine.body.base import CelestialBody
+from engine.orbit_engine import OrbitEngine
+from engine.physics import GRAVITY, MAX_ADAPTIVE_STEP, MAX_STEP, TOLERANCE, Orbit, SimulationMode, adaptive_step, orbital_timescale
+from engine.system import SolarSystem
+
+# Exponent of the Laplace sphere of influence r = a * (m / M) ** 0.4
+SOI_EXPONENT = 0.4
+
+
+def sphere_of_influence(body: CelestialBody) -> float:
+    """Radius around a body on rails inside which its own gravity dominates its parent's."""
+    if body.parent is None or body.orbit is None or body.parent.mass <= 0:
+        return math.inf
+    return body.orbit.semi_major_axis * (body.mass / body.parent.mass) ** SOI_EXPONENT
+
+
+def rails_velocity(body: CelestialBody, t: float) -> Tuple[float, float]:
+    """Absolute velocity of a body on rails at time t, its orbit's plus every ancestor's (roots do not move)."""
+    vx, vy = 0.0, 0.0
+    while body.orbit is not None and body.parent is not None:
+        dx, dy = body.orbit.velocity(t)
+        vx, vy = vx + dx, vy + dy
+        body = body.parent
+    return vx, vy
+
+
+class _Attractors:
+    """
+    The bodies on rails of one system, whose positions are evaluated at every
+    step, and the sphere of influence checks of its AUTO bodies on rails.
+    """
+
+    def __init__(self, system: SolarSystem, coasting: List[CelestialBody]) -> None:
+        self.engine = OrbitEngine([system])
+        bodies = self.engine.bodies
+        # Bodies carried by a free body are not on rails themselves
+        on_rails = np.zeros(len(bodies), dtype=bool)
+        for row, parent in enumerate(self.engine.parent.tolist()):
+            on_rails[row] = self.engine.depth[row] == 0 or (parent >= 0 and on_rails[parent])
+        self.rows = np.flatnonzero(on_rails)
+        self.masses = np.array([bodies[row].mass for row in self.rows.tolist()])
+        self.radii = np.array([bodies[row].radius for row in self.rows.tolist()])
+        self.time: Optional[float] = None
+
+        engine = self.engine
+        self.coasting = coasting
+        # An orbit on rails never changes, so whether it reaches past the parent's
+        # sphere is known now: only the bodies whose apoapsis does are checked
+        escaping = [
+            i for i, body in enumerate(coasting)
+            if body.orbit.semi_major_axis * (1 + body.orbit.eccentricity) > sphere_of_influence(body.parent)
+        ]
+        self.escaping = np.array(escaping, dtype=np.intp)
+        self.escape_rows = np.array([engine.row_of(coasting[i]) for i in escaping], dtype=np.intp)
+        self.escape_parents = np.array([engine.row_of(coasting[i].parent) for i in escaping], dtype=np.intp)
+        self.escape_radii = np.array([sphere_of_influence(coasting[i].parent) for i in escaping])
+
+        # (coasting body, sibling on rails) pairs, for entering the sibling's sphere
+        siblings: Dict[int, List[Tuple[int, float]]] = {}
+        pair_body, pair_rows, pair_siblings, pair_radii = [], [], [], []
+        for i, body in enumerate(coasting):
+            parent = body.parent
+            candidates = siblings.get(id(parent))
+            if candidates is None:
+                candidates = siblings[id(parent)] = [
+                    (engine.row_of(sibling), sphere_of_influence(sibling)) for sibling in parent.children
+                    if sibling.orbit is not None and sibling.mode is SimulationMode.RAILS
+                ]
+            row = engine.row_of(body)
+            for sibling_row, radius in candidates:
+                if sibling_row != row:
+                    pair_body.append(i)
+                    pair_rows.append(row)
+                    pair_siblings.append(sibling_row)
+                    pair_radii.append(radius)
+        self.pair_body = np.array(pair_body, dtype=np.intp)
+        self.pair_rows = np.array(pair_rows, dtype=np.intp)
+        self.pair_siblings = np.array(pair_siblings, dtype=np.intp)
+        self.pair_radii = np.array(pair_radii)
+
+    def _at(self, t: float) -> None:
+        if self.time != t:
+            self.engine.update(t)
+            self.time = t
+
+    def positions(self, t: float) -> np.ndarray:
+        self._at(t)
+        return self.engine.positions[self.rows]
+
+    def position_of(self, body: CelestialBody, t: float) -> Tuple[float, float]:
+        self._at(t)
+        return self.engine.position_of(body)
+
+    def leaving(self, t: float) -> List[CelestialBody]:
+        """Coasting bodies that are out of their parent's sphere or inside a sibling's at time t."""
+        if not self.coasting:
+            return []
+        self._at(t)
+        positions = self.engine.positions
+        out = np.zeros(len(self.coasting), dtype=bool)
+        d = positions[self.escape_rows] - positions[self.escape_parents]
+        out[self.escaping] = (d * d).sum(axis=1) > self.escape_radii**2
+        d = positions[self.pair_rows] - positions[self.pair_siblings]
+        out[self.pair_body[(d * d).sum(axis=1) < self.pair_radii**2]] = True
+        return [self.coasting[i] for i in np.flatnonzero(out).tolist()]
+
+
+class HybridSimulation:
+    """
+    Integrates the free bodies of some systems and hands bodies between
+    rails and integration, see the module docstring.
+
+    Integration is velocity Verlet in adaptive steps of at most `max_step`,
+    sized by the shortest orbital timescale between a free body and an
+    attractor (see adaptive_step), with the rails bodies' radii as softening. Bodies
+    on rails are evaluated in closed form at every step time, so they cost
+    the same however far a step jumps. Gravitational parameters are
+    G * (M + m) of the real masses, the same convention as GravitySimulation.
+    """
+
+    def __init__(
+        self,
+        time: float = 0.0,
+        G: float = GRAVITY,
+        max_step: float = MAX_ADAPTIVE_STEP,
+        tolerance: float = TOLERANCE,
+    ) -> None:
+        self.time = time
+        self.G = G
+        self.max_step = max_step
+        self.tolerance = tolerance
+        self.step_size = MAX_STEP  # Next adaptive step length
+        self.timescale = math.inf  # Of the last acceleration evaluation
+        self.steps = 0
+        self.bodies: List[CelestialBody] = []  # Integrated, one row of positions / velocities each
+        self.owners: List[SolarSystem] = []
+        self.positions = np.zeros((0, 2))
+        self.velocities = np.zeros((0, 2))
+        self.coasting: List[Tuple[CelestialBody, SolarSystem]] = []  # AUTO bodies on rails
+        self.handoffs = 0
+        self.changed: Set[int] = set()  # Ids of systems whose hierarchy changed, see take_changed
+        self._systems: Dict[int, SolarSystem] = {}
+        self._attractors: Dict[int, _Attractors] = {}
+
+    def __len__(self) -> int:
+        return len(self.bodies)
+
+    def track(self, system: SolarSystem) -> None:
+        """Pick up every non-rails body of a system."""
+        added = False
+        stack = [system.center]
+        while stack:
+            body = stack.pop()
+            stack.extend(body.children)
+            if body.parent is None or body.mode is SimulationMode.RAILS:
+                continue
+            if any(body is other for other in self.bodies) or any(body is other for other, _ in self.coasting):
+                continue
+            if body.orbit is None:
+                # Already free: pos and velocity are its state
+                self._add(body, system, body.pos, body.velocity)
+            elif body.mode is SimulationMode.DYNAMIC:
+                self.release(body, system)
+            else:
+                self.coasting.append((body, system))
+            added = True
+        if added:
+            # Bodies may have joined since the attractor set was built
+            self._stale(system)
+
+    def release(self, body: CelestialBody, system: SolarSystem) -> None:
+        """
+        Take a body off its rails at the current time and integrate it from there.
+
+        A RAILS body becomes AUTO, so it goes back on rails once it settles.
+        """
+        if body.mode is SimulationMode.RAILS:
+            body.mode = SimulationMode.AUTO
+        t = self.time
+        parent = body.parent
+        px, py = self._rails_position(parent, system, t)
+        lx, ly = body.orbit.get_position(t)
+        # Same point of the same ellipse, at the speed the real masses give
+        vx, vy = body.orbit.velocity(t, mu=self.G * (parent.mass + body.mass))
+        pvx, pvy = rails_velocity(parent, t)
+        body.orbit = None
+        self.coasting = [(b, s) for b, s in self.coasting if b is not body]
+        self._add(body, system, (px + lx, py + ly), (pvx + vx, pvy + vy))
+        self._changed(system)
+
+    def advance(self, t: float, max_steps: Optional[int] = None) -> None:
+        """
+        Integrate the free bodies up to time t, handing bodies off along the way.
+
+        With `max_steps`, stops after that many steps even if time has not reached t.
+        """
+        span = t - self.time
+        if span == 0:
+            return
+        if not self.bodies and not self.coasting:
+            self.time = t
+            return
+        acc = self._accelerations(self.time)
+        taken = 0
+        while self.time != t and (max_steps is None or taken < max_steps):
+            taken += 1
+            self.step_size = adaptive_step(self.timescale, self.step_size, self.tolerance, self.max_step)
+            remaining = t - self.time
+            size = self.step_size
+            last = abs(remaining) <= size
+            dt = remaining if last else math.copysign(size, remaining)
+            self.velocities += 0.5 * dt * acc
+            self.positions += dt * self.velocities
+            # Exact end time rather than accumulated rounding
+            self.time = t if last else self.time + dt
+            acc = self._accelerations(self.time)
+            self.velocities += 0.5 * dt * acc
+            self.steps += 1
+            if self._handoffs():
+                acc = self._accelerations(self.time)
+        self.write_back()
+
+    def write_back(self) -> None:
+        """Copy the integrated state onto the bodies."""
+        for body, (x, y), (vx, vy) in zip(self.bodies, self.positions.tolist(), self.velocities.tolist()):
+            body.pos = (x, y)
+            body.velocity = (vx, vy)
+
+    def take_changed(self) -> List[SolarSystem]:
+        """Systems whose hierarchy changed since the last call."""
+        changed = [self._systems[key] for key in self.changed]
+        self.changed = set()
+        return changed
+
+    # --- Internals ---
+
+    def _add(self, body: CelestialBody, system: SolarSystem, pos, velocity) -> None:
+        self.bodies.append(body)
+        self.owners.append(system)
+        self.positions = np.vstack([self.positions, [pos]])
+        self.velocities = np.vstack([self.velocities, [velocity]])
+        self._systems[id(system)] = system
+
+    def _remove(self, rows: List[int]) -> None:
+        keep = np.setdiff1d(np.arange(len(self.bodies)), rows)
+        self.bodies = [self.bodies[i] for i in keep.tolist()]
+        self.owners = [self.owners[i] for i in keep.tolist()]
+        self.positions = self.positions[keep]
+        self.velocities = self.velocities[keep]
+
+    def _stale(self, system: SolarSystem) -> None:
+        """Rows of the system changed: the attractor set is rebuilt on next use, and the universe told (take_changed)."""
+        self.changed.add(id(system))
+        self._systems[id(system)] = system
+        self._attractors.pop(id(system), None)
+
+    def _changed(self, system: SolarSystem) -> None:
+        self._stale(system)
+        self.handoffs += 1
+        # Nothing is known yet about the timescale of a body that just changed hands
+        self.step_size = min(self.step_size, MAX_STEP)
+
+    def _attractors_of(self, system: SolarSystem) -> _Attractors:
+        attractors = self._attractors.get(id(system))
+        if attractors is None:
+            coasting = [body for body, owner in self.coasting if owner is system]
+            attractors = self._attractors[id(system)] = _Attractors(system, coasting)
+        return attractors
+
+    def _rails_position(self, body: CelestialBody, system: SolarSystem, t: float) -> Tuple[float, float]:
+        return self._attractors_of(system).position_of(body, t)
+
+    def _accelerations(self, t: float) -> np.ndarray:
+        """Accelerations of the free bodies at time t; also sets `timescale`."""
+        acc = np.zeros_like(self.positions)
+        self.timescale = math.inf
+        groups: Dict[int, List[int]] = {}
+        for row, system in enumerate(self.owners):
+            groups.setdefault(id(system), []).append(row)
+        for key, rows in groups.items():
+            attractors = self._attractors_of(self._systems[key])
+            d = attractors.positions(t)[None, :, :] - self.positions[rows][:, None, :]
+            r2 = (d * d).sum(axis=2) + attractors.radii[None, :] ** 2
+            acc[rows] = self.G * np.einsum("ij,ijk->ik", attractors.masses[None, :] / r2**1.5, d)
+            self.timescale = min(self.timescale, orbital_timescale(r2, self.G * attractors.masses[None, :]))
+        return acc
+
+    def _handoffs(self) -> bool:
+        """Apply every handoff due at the current time; True if any happened."""
+        t = self.time
+        captured: List[int] = []
+        handed = False
+
+        for row, (body, system) in enumerate(zip(self.bodies, self.owners)):
+            x, y = self.positions[row].tolist()
+            primary = body.parent
+            px, py = self._rails_position(primary, system, t)
+
+            # Leaving the primary's sphere, or entering one of its children's
+            if math.hypot(x - px, y - py) > sphere_of_influence(primary):
+                target = primary.parent
+            else:
+                target = next(
+                    (
+                        child for child in primary.children
+                        if child.orbit is not None
+                        and math.dist((x, y), self._rails_position(child, system, t)) < sphere_of_influence(child)
+                    ),
+                    None,
+                )
+            if target is not None:
+                primary.children.remove(body)
+                target.add_child(body)
+                self._changed(system)
+                primary = target
+                px, py = self._rails_position(primary, system, t)
+                handed = True
+
+            if body.mode is SimulationMode.AUTO:
+                vx, vy = self.velocities[row].tolist()
+                pvx, pvy = rails_velocity(primary, t)
+                mu = self.G * (primary.mass + body.mass)
+                orbit = Orbit.from_state((x - px, y - py), (vx - pvx, vy - pvy), mu, t)
+                soi = sphere_of_influence(primary)
+                if orbit is not None and orbit.semi_major_axis * (1 + orbit.eccentricity) < soi:
+                    body.orbit = orbit
+                    captured.append(row)
+                    self.coasting.append((body, system))
+                    self._changed(system)
+
+        if captured:
+            self._remove(captured)
+            handed = True
+
+        # AUTO bodies on rails whose orbit carries them out of their parent's sphere or into a sibling's
+        for system in list({id(system): system for _, system in self.coasting}.values()):
+            for body in self._attractors_of(system).leaving(t):
+                self.release(body, system)
+                handed = True
+        return handed
@@ -0,0 +1,154 @@
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+# Names for the non-character keys, other keys are reported as their character
+UP = "up"
+DOWN = "down"
+LEFT = "left"
+RIGHT = "right"
+
+_ANSI_ARROWS = {"A": UP, "B": DOWN, "C": RIGHT, "D": LEFT}
+_MSVCRT_ARROWS = {b"H": UP, b"P": DOWN, b"K": LEFT, b"M": RIGHT}
+
+
+class InputSource(ABC):
+    """
+    Non-blocking source of key presses.
+
+    poll() returns the keys pressed since the previous call and never waits.
+    Sources are context managers so terminal state is always restored.
+    """
+
+    @abstractmethod
+    def poll(self) -> List[str]:
+        """Keys pressed since the previous call, possibly none."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "InputSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class NoInput(InputSource):
+    """Source that never reports a key, for headless runs."""
+
+    def poll(self) -> List[str]:
+        return []
+
+
+class ScriptedInput(InputSource):
+    """
+    Replays a fixed script, one entry per poll.
+
+    The script is either a sequence (entry i is returned by the i-th poll) or a
+    mapping from poll index to keys. An entry may be a single key or a list.
+    """
+
+    def __init__(self, script: Union[Sequence, Dict[int, Union[str, Iterable[str]]]]) -> None:
+        if isinstance(script, dict):
+            self.script = dict(script)
+        else:
+            self.script = dict(enumerate(script))
+        self.polls = 0
+
+    def poll(self) -> List[str]:
+        entry = self.script.get(self.polls)
+        self.polls += 1
+        if not entry:
+            return []
+        return [entry] if isinstance(entry, str) else list(entry)
+
+
+class PosixInput(InputSource):
+    """
+    Keyboard reader for POSIX terminals.
+
+    The terminal is put in cbreak mode (no line buffering, no echo) and polled
+    with select, so poll() never blocks. Arrow keys arrive as ANSI escape
+    sequences and are decoded to UP/DOWN/LEFT/RIGHT.
+    """
+
+    def __init__(self, fd: Optional[int] = None) -> None:
+        import termios
+        import tty
+
+        self.fd = sys.stdin.fileno() if fd is None else fd
+        self._saved = termios.tcgetattr(self.fd)
+        tty.setcbreak(self.fd)
+        self._pending = ""
+
+    def poll(self) -> List[str]:
+        import select
+
+        data = self._pending
+        while select.select([self.fd], [], [], 0)[0]:
+            chunk = os.read(self.fd, 1024)
+            if not chunk:
+                break
+            data += chunk.decode("utf-8", errors="ignore")
+        pending_before = self._pending
+        keys, self._pending = self._decode(data)
+        if self._pending and self._pending == pending_before:
+            # An escape that stayed incomplete for a whole poll was a lone ESC
+            keys.extend(self._pending)
+            self._pending = ""
+        return keys
+
+    @staticmethod
+    def _decode(data: str):
+        """Split raw input into keys; returns (keys, unfinished escape sequence)."""
+        keys = []
+        i = 0
+        while i < len(data):
+            if data[i] == "\033":
+                if i + 2 >= len(data):
+                    return keys, data[i:]
+                if data[i + 1] == "[" and data[i + 2] in _ANSI_ARROWS:
+                    keys.append(_ANSI_ARROWS[data[i + 2]])
+                    i += 3
+                    continue
+            keys.append(data[i])
+            i += 1
+        return keys, ""
+
+    def close(self) -> None:
+        import termios
+
+        termios.tcsetattr(self.fd, termios.TCSADRAIN, self._saved)
+
+
+class WindowsInput(InputSource):
+    """Keyboard reader for the Windows console using msvcrt."""
+
+    def __init__(self) -> None:
+        import msvcrt
+
+        self._msvcrt = msvcrt
+
+    def poll(self) -> List[str]:
+        msvcrt = self._msvcrt
+        keys = []
+        while msvcrt.kbhit():
+            key = msvcrt.getch()
+            if key in (b"\x00", b"\xe0"):
+                arrow = _MSVCRT_ARROWS.get(msvcrt.getch())
+                if arrow:
+                    keys.append(arrow)
+            else:
+                keys.append(key.decode("latin-1"))
+        return keys
+
+
+def default_input() -> InputSource:
+    """The keyboard reader for this platform, or NoInput when stdin is not a terminal."""
+    if os.name == "nt":
+        return WindowsInput()
+    if sys.stdin.isatty():
+        return PosixInput()
+    return NoInput()
@@ -0,0 +1,93 @@
+"""
+Solvers for Kepler's equation M = E - e * sin(E).
+
+Both solvers use Halley's method with an early exit once the correction
+drops below the tolerance. The starter guess is the second order series
+E0 = M + e * sin(M) * (1 + e * cos(M)), which is already within ~e^3 of the
+root for the low eccentricities the generator produces (0 - 0.2).
+
+Halley's method converges cubically: after a step of size d the remaining
+error is about C * d^3 with C = e / (6 f') + (e / (2 f'))^2. The solvers stop
+as soon as that estimate is below the tolerance instead of spending another
+iteration just to observe a tiny correction, which makes one Halley step
+enough for most low-eccentricity orbits. Higher eccentricities fall back to
+Danby's starter so the iteration still converges.
+
+The solvers return (E, sin(E), cos(E)) so callers can build positions
+without evaluating the trig functions again.
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+
+TOLERANCE = 1e-12
+MAX_ITERATIONS = 16
+
+# Above this eccentricity the series starter is no longer reliable
+_SERIES_MAX_ECCENTRICITY = 0.8
+_DANBY_K = 0.85
+
+# Largest final step for which sin/cos are rotated by a Taylor expansion
+# rather than evaluated again (the neglected d^4 / 24 term stays below 1e-13)
+_MAX_ROTATION_STEP = 1e-3
+
+
+def solve_kepler(M: float, e: float, tol: float = TOLERANCE, max_iter: int = MAX_ITERATIONS) -> Tuple[float, float, float]:
+    """Solve Kepler's equation for one orbit, returning (E, sin(E), cos(E))."""
+    # Reduce the mean anomaly to [-pi, pi)
+    M = (M + math.pi) % (2 * math.pi) - math.pi
+    sin_M = math.sin(M)
+    if e <= _SERIES_MAX_ECCENTRICITY:
+        E = M + e * sin_M * (1 + e * math.cos(M))
+    else:
+        E = M + math.copysign(_DANBY_K * e, sin_M)
+
+    for _ in range(max_iter):
+        sin_E = math.sin(E)
+        cos_E = math.cos(E)
+        f = E - e * sin_E - M
+        f1 = 1 - e * cos_E
+        f2 = e * sin_E
+        # Halley step
+        d = f * f1 / (f1 * f1 - 0.5 * f * f2)
+        E -= d
+        ad = abs(d)
+        if ad < _MAX_ROTATION_STEP:
+            k = e / f1
+            if (k / 6 + 0.25 * k * k) * ad * ad * ad < tol:
+                # Rotate sin/cos by -d instead of evaluating them again
+                cos_d = 1 - 0.5 * d * d
+                sin_d = d - d * d * d / 6
+                return E, sin_E * cos_d - cos_E * sin_d, cos_E * cos_d + sin_E * sin_d
+
+    return E, math.sin(E), math.cos(E)
+
+
+def solve_kepler_array(M: np.ndarray, e: np.ndarray, tol: float = TOLERANCE, max_iter: int = MAX_ITERATIONS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorised solve_kepler; iterates until every element has converged."""
+    M = np.remainder(M + np.pi, 2 * np.pi) - np.pi
+    e = np.broadcast_to(e, M.shape)
+    sin_M = np.sin(M)
+    E = np.where(
+        e <= _SERIES_MAX_ECCENTRICITY,
+        M + e * sin_M * (1 + e * np.cos(M)),
+        M + np.copysign(_DANBY_K * e, sin_M),
+    )
+
+    for _ in range(max_iter):
+        sin_E = np.sin(E)
+        cos_E = np.cos(E)
+        f = E - e * sin_E - M
+        f1 = 1 - e * cos_E
+        f2 = e * sin_E
+        d = f * f1 / (f1 * f1 - 0.5 * f * f2)
+        E = E - d
+        ad = np.abs(d)
+        k = e / f1
+        if not len(d) or (np.max(ad) < _MAX_ROTATION_STEP and np.max((k / 6 + 0.25 * k * k) * ad * ad * ad) < tol):
+            cos_d = 1 - 0.5 * d * d
+            sin_d = d - d * d * d / 6
+            return E, sin_E * cos_d - cos_E * sin_d, cos_E * cos_d + sin_E * sin_d
+
+    return E, np.sin(E), np.cos(E)
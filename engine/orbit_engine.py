@@ -0,0 +1,173 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engine.body.base import CelestialBody
+from engine.kepler import solve_kepler_array
+from engine.system import SolarSystem
+
+
+class OrbitEngine:
+    """
+    Batched Keplerian propagation over a structure-of-arrays layout.
+
+    Every body of the given systems becomes one row. Rows are ordered by
+    hierarchy depth so that a parent is always placed before its children,
+    which lets parent offsets be accumulated one depth level at a time.
+    """
+
+    def __init__(self, systems: Iterable[SolarSystem]) -> None:
+        self.systems: List[SolarSystem] = list(systems)
+
+        # Breadth-first walk of every system: (body, parent row, depth, system index)
+        rows: List[Tuple[CelestialBody, int, int, int]] = []
+        for system_index, system in enumerate(self.systems):
+            start = len(rows)
+            rows.append((system.center, -1, 0, system_index))
+            i = start
+            while i < len(rows):
+                body, _, depth, _ = rows[i]
+                for child in body.children:
+                    rows.append((child, i, depth + 1, system_index))
+                i += 1
+
+        # Stable sort by depth keeps parents ahead of their children
+        order = sorted(range(len(rows)), key=lambda r: rows[r][2])
+        new_index = {old: new for new, old in enumerate(order)}
+
+        n = len(rows)
+        self.bodies: List[CelestialBody] = [rows[r][0] for r in order]
+        self.parent = np.full(n, -1, dtype=np.int64)
+        self.depth = np.zeros(n, dtype=np.int64)
+        self.system = np.zeros(n, dtype=np.int64)
+        self.semi_major_axis = np.zeros(n)
+        self.eccentricity = np.zeros(n)
+        self.mean_anomaly_at_epoch = np.zeros(n)
+        self.mean_motion = np.zeros(n)
+        self.semi_minor_axis = np.zeros(n)
+        self.cos_w = np.ones(n)
+        self.sin_w = np.zeros(n)
+        self.base = np.zeros((n, 2))
+        self.positions = np.zeros((n, 2))
+
+        for new, old in enumerate(order):
+            body, parent, depth, system_index = rows[old]
+            self.depth[new] = depth
+            self.system[new] = system_index
+            orbit = body.orbit
+            if parent >= 0 and orbit is not None:
+                self.parent[new] = new_index[parent]
+                self.semi_major_axis[new] = orbit.semi_major_axis
+                self.eccentricity[new] = orbit.eccentricity
+                self.mean_anomaly_at_epoch[new] = orbit.mean_anomaly_at_epoch
+                self.mean_motion[new] = orbit.mean_motion
+                self.semi_minor_axis[new] = orbit.semi_minor_axis
+                self.cos_w[new] = orbit.cos_w
+                self.sin_w[new] = orbit.sin_w
+            else:
+                # Bodies without an orbit stay where they are, like the scalar path
+                self.base[new] = body.pos
+
+        self.positions[:] = self.base
+        self.orbiting = self.parent >= 0
+        # Bodies below a root without an orbit move on their own (integrated), their
+        # current position is picked up on every update
+        self.free_rows = np.flatnonzero(~self.orbiting & (self.depth > 0))
+
+        # Contiguous row range of each depth level
+        max_depth = int(self.depth.max()) if n else -1
+        bounds = np.searchsorted(self.depth, np.arange(max_depth + 2))
+        self.levels: List[Tuple[int, int]] = [
+            (int(bounds[d]), int(bounds[d + 1])) for d in range(max_depth + 1)
+        ]
+
+        self._row_of = {id(body): row for row, body in enumerate(self.bodies)}
+        self._system_index = {id(system): i for i, system in enumerate(self.systems)}
+
+    @classmethod
+    def from_universe(cls, universe) -> "OrbitEngine":
+        """Build an engine covering every system of every galaxy."""
+        return cls(system for galaxy in universe.galaxies for system in galaxy.systems)
+
+    def __len__(self) -> int:
+        return len(self.bodies)
+
+    def local_positions(self, t: float, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Positions relative to the parent at time t for the given rows."""
+        if rows is None:
+            rows = slice(None)
+        a = self.semi_major_axis[rows]
+        e = self.eccentricity[rows]
+        cos_w = self.cos_w[rows]
+        sin_w = self.sin_w[rows]
+
+        # Mean anomaly and Kepler's equation, same solver as Orbit.get_position
+        M = self.mean_anomaly_at_epoch[rows] + self.mean_motion[rows] * t
+        _, sin_E, cos_E = solve_kepler_array(M, e)
+
+        P = a * (cos_E - e)
+        Q = self.semi_minor_axis[rows] * sin_E
+
+        local = np.empty((len(a), 2))
+        local[:, 0] = P * cos_w - Q * sin_w
+        local[:, 1] = P * sin_w + Q * cos_w
+        return local
+
+    def rows_for(self, systems: Sequence[int]) -> np.ndarray:
+        """Row indices (in depth order) of every body in the given systems."""
+        mask = np.zeros(len(self.systems), dtype=bool)
+        mask[np.asarray(systems, dtype=np.int64)] = True
+        return np.flatnonzero(mask[self.system])
+
+    def update(self, t: float, systems: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Propagate bodies to time t and return the (n, 2) position array.
+
+        If system indices are given, only the bodies of those systems are
+        propagated; the rows of every other system keep their last values.
+        """
+        positions = self.positions
+        for row in self.free_rows.tolist():
+            self.base[row] = self.bodies[row].pos
+        if systems is None:
+            local = self.local_positions(t)
+            # Roots keep their base position, deeper levels add their parent's offset
+            for start, stop in self.levels[1:]:
+                parents = self.parent[start:stop]
+                orbiting = self.orbiting[start:stop]
+                level = np.where(orbiting[:, None], local[start:stop] + positions[parents], self.base[start:stop])
+                positions[start:stop] = level
+            return positions
+
+        rows = self.rows_for(systems)
+        local = self.local_positions(t, rows)
+        bounds = np.searchsorted(self.depth[rows], np.arange(1, len(self.levels) + 1))
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            level_rows = rows[start:stop]
+            parents = self.parent[level_rows]
+            orbiting = self.orbiting[level_rows]
+            positions[level_rows] = np.where(orbiting[:, None], local[start:stop] + positions[parents], self.base[level_rows])
+        return positions
+
+    def write_back(self, rows: Optional[np.ndarray] = None) -> None:
+        """Copy the computed positions onto the bodies' pos attributes."""
+        if rows is None:
+            for body, (x, y) in zip(self.bodies, self.positions.tolist()):
+                body.pos = (x, y)
+            return
+        bodies = self.bodies
+        for row, (x, y) in zip(rows.tolist(), self.positions[rows].tolist()):
+            bodies[row].pos = (x, y)
+
+    def system_index(self, system: SolarSystem) -> int:
+        """Index of a system within this engine."""
+        return self._system_index[id(system)]
+
+    def row_of(self, body: CelestialBody) -> int:
+        """Row of a body within this engine."""
+        return self._row_of[id(body)]
+
+    def position_of(self, body: CelestialBody) -> Tuple[float, float]:
+        """Last computed position of a body."""
+        x, y = self.positions[self._row_of[id(body)]]
+        return float(x), float(y)
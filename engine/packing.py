@@ -0,0 +1,245 @@
+"""
+Compact binary form of solar systems.
+
+Systems are flattened into one structured NumPy record per body, in
+pre-order (a parent always comes before its children), plus a table of
+strings. Packing a list of systems gives a single bytes object that is a
+fraction of the size of the pickled object graph and is rebuilt with a few
+array reads, which is what process pools ship back to the parent.
+
+Every field is stored at full precision (floats as float64), so unpacking
+gives bodies equal to the packed ones. Optional float metadata is stored as
+NaN, optional strings as index -1 and a missing planet appearance as zero
+bytes. SolarSystem.bodies is not packed, the
+hierarchy under the center body is the source of truth.
+
+Layout: a header (magic, body count, system count, string table size), then
+the body records, the index of each system's first body, each system's name
+index, and the UTF-8 string table with NUL separators.
+"""
+import gc
+import math
+import struct
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from engine.body.base import BodyType, CelestialBody
+from engine.body.planet import APPEARANCE_SIZE, Planet, PlanetType
+from engine.body.star import Star
+from engine.physics import Orbit, SimulationMode
+from engine.system import SolarSystem
+
+MAGIC = b"AUP3"
+HEADER = struct.Struct("<4sQQQ")
+
+BODY_TYPES = list(BodyType)
+PLANET_TYPES = list(PlanetType)
+MODES = list(SimulationMode)
+NO_PLANET_TYPE = 255
+
+# Body classes by kind code
+STAR, PLANET = 0, 1
+KINDS = {Star: STAR, Planet: PLANET}
+
+BODY_DTYPE = np.dtype([
+    ("parent", "<i4"),          # Record index of the parent, -1 for a system center
+    ("kind", "u1"),             # STAR or PLANET
+    ("type", "u1"),             # Index into BodyType
+    ("planet_type", "u1"),      # Index into PlanetType, NO_PLANET_TYPE for stars
+    ("has_orbit", "u1"),
+    ("mode", "u1"),             # Index into SimulationMode
+    ("name", "<i4"),            # Index into the string table
+    ("composition", "<i4"),
+    ("description", "<i4"),
+    ("mass", "<f8"),
+    ("radius", "<f8"),
+    ("pos", "<f8", (2,)),
+    ("velocity", "<f8", (2,)),
+    ("luminosity", "<f8"),
+    ("temperature", "<f8"),
+    ("albedo", "<f8"),
+    ("semi_major_axis", "<f8"),
+    ("eccentricity", "<f8"),
+    ("inclination", "<f8"),
+    ("argument_of_periapsis", "<f8"),
+    ("mean_anomaly_at_epoch", "<f8"),
+    ("period", "<f8"),
+    ("appearance", f"V{APPEARANCE_SIZE}"),  # Planet appearance digest, zeros for none
+])
+
+_OPTIONAL_FLOATS = ("luminosity", "temperature", "albedo")
+_ORBIT_FIELDS = (
+    "semi_major_axis",
+    "eccentricity",
+    "inclination",
+    "argument_of_periapsis",
+    "mean_anomaly_at_epoch",
+    "period",
+)
+
+
+@contextmanager
+def _gc_paused():
+    # Packing and unpacking allocate many objects that all stay alive until
+    # the call returns, collections triggered along the way would find nothing
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _flatten(systems: List[SolarSystem]) -> Tuple[List[Tuple[CelestialBody, int]], List[int]]:
+    """Every body as (body, parent record), in pre-order, and each system's first record."""
+    bodies: List[Tuple[CelestialBody, int]] = []
+    starts: List[int] = []
+    for system in systems:
+        starts.append(len(bodies))
+        stack = [(system.center, -1)]
+        while stack:
+            body, parent = stack.pop()
+            index = len(bodies)
+            bodies.append((body, parent))
+            stack.extend((child, index) for child in reversed(body.children))
+    return bodies, starts
+
+
+def pack_systems(systems: List[SolarSystem]) -> bytes:
+    """Serialize systems and their body hierarchies into one bytes object."""
+    with _gc_paused():
+        return _pack(systems)
+
+
+def _pack(systems: List[SolarSystem]) -> bytes:
+    bodies, starts = _flatten(systems)
+    strings: List[str] = []
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        strings.append(value)
+        return len(strings) - 1
+
+    body_types = {body_type: i for i, body_type in enumerate(BODY_TYPES)}
+    planet_types = {planet_type: i for i, planet_type in enumerate(PLANET_TYPES)}
+    modes = {mode: i for i, mode in enumerate(MODES)}
+    no_orbit = (0.0,) * len(_ORBIT_FIELDS)
+    no_appearance = bytes(APPEARANCE_SIZE)
+
+    rows = []
+    for body, parent in bodies:
+        orbit = body.orbit
+        rows.append((
+            parent,
+            KINDS[type(body)],
+            body_types[body.type],
+            planet_types.get(getattr(body, "planet_type", None), NO_PLANET_TYPE),
+            orbit is not None,
+            modes[body.mode],
+            intern(body.name),
+            intern(body.composition),
+            intern(body.description),
+            body.mass,
+            body.radius,
+            body.pos,
+            body.velocity,
+            math.nan if body.luminosity is None else body.luminosity,
+            math.nan if body.temperature is None else body.temperature,
+            math.nan if body.albedo is None else body.albedo,
+            *(no_orbit if orbit is None else (
+                orbit.semi_major_axis,
+                orbit.eccentricity,
+                orbit.inclination,
+                orbit.argument_of_periapsis,
+                orbit.mean_anomaly_at_epoch,
+                orbit.period,
+            )),
+            getattr(body, "appearance", None) or no_appearance,
+        ))
+    records = np.array(rows, dtype=BODY_DTYPE)
+
+    names = np.array([intern(system.name) for system in systems], dtype="<i4")
+    table = "\0".join(strings).encode("utf-8")
+    return b"".join((
+        HEADER.pack(MAGIC, len(records), len(systems), len(table)),
+        records.tobytes(),
+        np.array(starts, dtype="<i8").tobytes(),
+        names.tobytes(),
+        table,
+    ))
+
+
+def unpack_systems(data) -> List[SolarSystem]:
+    """Rebuild the systems packed by pack_systems from a bytes-like object."""
+    with _gc_paused():
+        return _unpack(data)
+
+
+def _unpack(data) -> List[SolarSystem]:
+    magic, count, num_systems, table_size = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("not a packed system buffer")
+
+    offset = HEADER.size
+    records = np.frombuffer(data, dtype=BODY_DTYPE, count=count, offset=offset)
+    offset += records.nbytes
+    starts = np.frombuffer(data, dtype="<i8", count=num_systems, offset=offset)
+    offset += starts.nbytes
+    names = np.frombuffer(data, dtype="<i4", count=num_systems, offset=offset)
+    offset += names.nbytes
+    table = bytes(data[offset:offset + table_size]).decode("utf-8")
+    strings = table.split("\0")
+
+    def text(indices: np.ndarray) -> List[Optional[str]]:
+        return [None if index < 0 else strings[index] for index in indices.tolist()]
+
+    no_appearance = bytes(APPEARANCE_SIZE)
+
+    def optional(values: np.ndarray) -> List[Optional[float]]:
+        return [None if math.isnan(value) else value for value in values.tolist()]
+
+    # Columns as plain Python values, decoding record by record is far slower
+    columns = zip(
+        records["parent"].tolist(),
+        records["kind"].tolist(),
+        [BODY_TYPES[i] for i in records["type"].tolist()],
+        [None if i == NO_PLANET_TYPE else PLANET_TYPES[i] for i in records["planet_type"].tolist()],
+        [strings[i] for i in records["name"].tolist()],
+        records["mass"].tolist(),
+        records["radius"].tolist(),
+        map(tuple, records["pos"].tolist()),
+        map(tuple, records["velocity"].tolist()),
+        *(optional(records[name]) for name in _OPTIONAL_FLOATS),
+        text(records["composition"]),
+        text(records["description"]),
+        records["has_orbit"].tolist(),
+        [MODES[i] for i in records["mode"].tolist()],
+        zip(*(records[name].tolist() for name in _ORBIT_FIELDS)),
+        [None if value == no_appearance else value for value in records["appearance"].tolist()],
+    )
+
+    bodies = _build_bodies(columns)
+    return [SolarSystem(name=strings[name], center=bodies[start]) for start, name in zip(starts.tolist(), names.tolist())]
+
+
+def _build_bodies(columns) -> List[CelestialBody]:
+    bodies: List[CelestialBody] = []
+    for (parent, kind, body_type, planet_type, name, mass, radius, pos, velocity,
+         luminosity, temperature, albedo, composition, description, has_orbit, mode, elements, appearance) in columns:
+        # Hierarchy and orbit are filled in below
+        fields = dict(
+            name=name, mass=mass, radius=radius, type=body_type, pos=pos, velocity=velocity,
+            luminosity=luminosity, temperature=temperature, albedo=albedo,
+            composition=composition, description=description, mode=mode,
+        )
+        body = Star(**fields) if kind == STAR else Planet(**fields, planet_type=planet_type, appearance=appearance)
+        if has_orbit:
+            body.orbit = Orbit(*elements)
+        if parent >= 0:
+            bodies[parent].add_child(body)
+        bodies.append(body)
+    return bodies
@@ -1,52 +1,527 @@
 import math
-from dataclasses import dataclass
-from typing import Tuple
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import List, Optional, Sequence, Tuple
 
-@dataclass
+import numpy as np
+
+from engine.kepler import solve_kepler
+
+# Gravitational constant in simulation units (mass units are the bodies' masses)
+GRAVITY = 1.0
+# Plummer softening length used when bodies do not bring their own, keeps close encounters finite
+SOFTENING = 0.01
+# First integration step, before the adaptive step size has anything to go on
+MAX_STEP = 0.02
+# Largest adaptive step, and the smallest as a fraction of it
+MAX_ADAPTIVE_STEP = 1.0
+MIN_STEP_FRACTION = 1e-4
+# Steps one advance() may take when given a budget (see Universe.set_time), so a
+# frame at high warp costs a bounded time and integrated bodies lag instead
+MAX_FRAME_STEPS = 500
+# Error budget of adaptive steps: the fraction of the shortest orbital timescale sqrt(r^3 / mu) one step may take
+TOLERANCE = 0.03
+# Up to this many bodies accelerations are summed directly, above it Barnes-Hut is used
+DIRECT_LIMIT = 512
+# Barnes-Hut opening angle: a node is treated as a point mass when size / distance < THETA
+THETA = 0.5
+
+
+class SimulationMode(Enum):
+    """How a body's motion is computed."""
+
+    RAILS = "rails"      # Always on its Keplerian orbit
+    DYNAMIC = "dynamic"  # Always integrated under the gravity of the bodies on rails
+    AUTO = "auto"        # On a conic while it stays inside its parent's sphere of influence, integrated otherwise
+
+
+@dataclass(slots=True)
 class Orbit:
     """
     Represents a Keplerian orbit.
     """
     semi_major_axis: float  # The long radius of the ellipse (a)
     eccentricity: float     # How stretched the ellipse is (e)
-    inclination: float      # Tilt of the orbit (i) - simplified for 2D as just visual or ignored
+    inclination: float      # Tilt of the orbit (i) - in 2D only its projection counts, pi runs the orbit clockwise
     argument_of_periapsis: float # Orientation of the ellipse (omega)
     mean_anomaly_at_epoch: float # Starting position (M0)
     period: float           # Time to complete one orbit
 
+    # Constants derived from the elements, computed once in __post_init__
+    mean_motion: float = field(init=False, repr=False, compare=False)     # 2 * pi / period
+    semi_minor_axis: float = field(init=False, repr=False, compare=False) # a * sqrt(1 - e^2) * cos(i)
+    cos_w: float = field(init=False, repr=False, compare=False)
+    sin_w: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.mean_motion = 2 * math.pi / self.period
+        self.semi_minor_axis = self.semi_major_axis * math.sqrt(1 - self.eccentricity**2)
+        if self.inclination:
+            # Projected onto the plane; negative for retrograde orbits
+            self.semi_minor_axis *= math.cos(self.inclination)
+        self.cos_w = math.cos(self.argument_of_periapsis)
+        self.sin_w = math.sin(self.argument_of_periapsis)
+
     def get_position(self, t: float) -> Tuple[float, float]:
         """
         Calculate position (x, y) relative to the parent at time t.
         """
         # Mean Anomaly (M)
-        M = self.mean_anomaly_at_epoch + (2 * math.pi * t / self.period)
-        
-        # Solve Kepler's Equation for Eccentric Anomaly (E)
-        # M = E - e * sin(E)
-        # Iterative approximation (Newton-Raphson)
-        E = M
-        for _ in range(5):
-            E = M + self.eccentricity * math.sin(E)
-        
-        # True Anomaly (nu)
-        # cos(nu) = (cos(E) - e) / (1 - e * cos(E))
-        # This is a bit complex, let's use the coordinate form directly from E
-        
+        M = self.mean_anomaly_at_epoch + self.mean_motion * t
+
+        # Solve Kepler's Equation (M = E - e * sin(E)) for the Eccentric Anomaly (E)
+        _, sin_E, cos_E = solve_kepler(M, self.eccentricity)
+
         # Coordinates in the orbital plane (P, Q)
         # x = a * (cos(E) - e)
         # y = a * sqrt(1 - e^2) * sin(E)
-        
-        P = self.semi_major_axis * (math.cos(E) - self.eccentricity)
-        Q = self.semi_major_axis * math.sqrt(1 - self.eccentricity**2) * math.sin(E)
-        
+        P = self.semi_major_axis * (cos_E - self.eccentricity)
+        Q = self.semi_minor_axis * sin_E
+
         # Rotate by argument of periapsis (omega)
         # x' = x * cos(w) - y * sin(w)
         # y' = x * sin(w) + y * cos(w)
-        
-        cos_w = math.cos(self.argument_of_periapsis)
-        sin_w = math.sin(self.argument_of_periapsis)
-        
-        x = P * cos_w - Q * sin_w
-        y = P * sin_w + Q * cos_w
-        
+        x = P * self.cos_w - Q * self.sin_w
+        y = P * self.sin_w + Q * self.cos_w
+
         return x, y
+
+    def velocity(self, t: float, mu: Optional[float] = None) -> Tuple[float, float]:
+        """
+        Velocity (vx, vy) relative to the parent at time t.
+
+        Without `mu` this is the derivative of get_position. With a
+        gravitational parameter it is the velocity a body at the same point
+        of the same ellipse would have under that parameter (vis-viva scales
+        the speed with sqrt(mu), the direction does not change).
+        """
+        M = self.mean_anomaly_at_epoch + self.mean_motion * t
+        _, sin_E, cos_E = solve_kepler(M, self.eccentricity)
+        # dE/dt from differentiating M = E - e * sin(E)
+        dE = self.mean_motion / (1 - self.eccentricity * cos_E)
+        dP = -self.semi_major_axis * sin_E * dE
+        dQ = self.semi_minor_axis * cos_E * dE
+        vx = dP * self.cos_w - dQ * self.sin_w
+        vy = dP * self.sin_w + dQ * self.cos_w
+        if mu is not None:
+            # The rails imply mu = n^2 * a^3
+            scale = math.sqrt(mu / (self.mean_motion**2 * self.semi_major_axis**3))
+            vx, vy = vx * scale, vy * scale
+        return vx, vy
+
+    def path(self, samples: int) -> np.ndarray:
+        """Points around the whole ellipse relative to the parent, evenly spaced in eccentric anomaly, shape (samples, 2)."""
+        E = np.linspace(0.0, 2 * math.pi, samples, endpoint=False)
+        P = self.semi_major_axis * (np.cos(E) - self.eccentricity)
+        Q = self.semi_minor_axis * np.sin(E)
+        return np.stack([P * self.cos_w - Q * self.sin_w, P * self.sin_w + Q * self.cos_w], axis=1)
+
+    @classmethod
+    def from_state(cls, pos: Tuple[float, float], velocity: Tuple[float, float], mu: float, t: float) -> Optional["Orbit"]:
+        """
+        The orbit through a relative position and velocity at time t under mu.
+
+        Returns None when the state is not on a bound ellipse. Clockwise
+        motion gives inclination pi.
+        """
+        x, y = pos
+        vx, vy = velocity
+        r = math.hypot(x, y)
+        v2 = vx * vx + vy * vy
+        energy = v2 / 2 - mu / r
+        h = x * vy - y * vx
+        if energy >= 0 or h == 0:
+            return None
+        a = -mu / (2 * energy)
+
+        # Eccentricity vector points at periapsis
+        rv = x * vx + y * vy
+        ex = ((v2 - mu / r) * x - rv * vx) / mu
+        ey = ((v2 - mu / r) * y - rv * vy) / mu
+        e = math.hypot(ex, ey)
+        w = math.atan2(ey, ex) if e > 1e-12 else math.atan2(y, x)
+        e = min(e, 1 - 1e-12)
+
+        # Position in the orbital plane gives the eccentric anomaly directly
+        sign = 1.0 if h > 0 else -1.0
+        cos_w, sin_w = math.cos(w), math.sin(w)
+        p = x * cos_w + y * sin_w
+        q = sign * (y * cos_w - x * sin_w)
+        E = math.atan2(q / (a * math.sqrt(1 - e * e)), p / a + e)
+        n = math.sqrt(mu / a**3)
+        return cls(
+            semi_major_axis=a,
+            eccentricity=e,
+            inclination=0.0 if h > 0 else math.pi,
+            argument_of_periapsis=w,
+            mean_anomaly_at_epoch=E - e * math.sin(E) - n * t,
+            period=2 * math.pi / n,
+        )
+
+
+class QuadTree:
+    """
+    Barnes-Hut quadtree over point masses, stored as flat arrays.
+
+    Built level by level with NumPy: every body of a level is assigned a
+    quadrant of its node at once, so there is no per-node Python work.
+    Leaves hold at most `leaf_size` bodies (more only at `max_depth`, where
+    coincident bodies end up); their members are perm[leaf_start:leaf_start + leaf_count].
+    """
+
+    def __init__(self, positions: np.ndarray, masses: np.ndarray, leaf_size: int = 1, max_depth: int = 32) -> None:
+        self.masses = masses
+        n = len(positions)
+        lo = positions.min(axis=0)
+        hi = positions.max(axis=0)
+        # Slightly enlarged so bodies on the max edge still fall inside
+        half = max(float((hi - lo).max()) / 2, 1e-9) * (1 + 1e-9)
+
+        centers = [((lo + hi) / 2)[None, :]]
+        halves = [np.array([half])]
+        mass_levels: List[np.ndarray] = []
+        com_levels: List[np.ndarray] = []
+        child_levels: List[np.ndarray] = []
+        start_levels: List[np.ndarray] = []
+        count_levels: List[np.ndarray] = []
+        perm: List[np.ndarray] = []
+        placed = 0
+
+        bodies = np.arange(n)
+        local = np.zeros(n, dtype=np.int64)  # Node of each body within the current level
+        base = 0  # Id of the first node of the current level
+        depth = 0
+        while True:
+            center, size = centers[-1], halves[-1]
+            m = len(size)
+            count = np.bincount(local, minlength=m)
+            weights = masses[bodies]
+            mass = np.bincount(local, weights=weights, minlength=m)
+            com = np.empty((m, 2))
+            for axis in (0, 1):
+                moment = np.bincount(local, weights=weights * positions[bodies, axis], minlength=m)
+                com[:, axis] = np.divide(moment, mass, out=center[:, axis].copy(), where=mass > 0)
+            mass_levels.append(mass)
+            com_levels.append(com)
+
+            leaf = (count <= leaf_size) | (depth >= max_depth)
+            in_leaf = leaf[local]
+            leaf_bodies = bodies[in_leaf]
+            order = np.argsort(local[in_leaf], kind="stable")
+            perm.append(leaf_bodies[order])
+            leaf_count = np.where(leaf, count, 0)
+            start_levels.append(placed + np.cumsum(leaf_count) - leaf_count)
+            count_levels.append(leaf_count)
+            placed += len(leaf_bodies)
+
+            children = np.full((m, 4), -1, dtype=np.int64)
+            child_levels.append(children)
+            bodies, parents = bodies[~in_leaf], local[~in_leaf]
+            if not len(bodies):
+                break
+
+            # Quadrant 0-3 from which side of the node center the body is on
+            quadrant = (positions[bodies, 0] >= center[parents, 0]) + 2 * (positions[bodies, 1] >= center[parents, 1])
+            keys, local = np.unique(parents * 4 + quadrant, return_inverse=True)
+            local = local.ravel()
+            base += m
+            children[keys // 4, keys % 4] = base + np.arange(len(keys))
+
+            offset = size[keys // 4, None] / 2
+            signs = np.stack([np.where(keys % 2, 1.0, -1.0), np.where(keys % 4 >= 2, 1.0, -1.0)], axis=1)
+            centers.append(center[keys // 4] + signs * offset)
+            halves.append(size[keys // 4] / 2)
+            depth += 1
+
+        self.center = np.concatenate(centers)
+        self.half = np.concatenate(halves)
+        self.mass = np.concatenate(mass_levels)
+        self.com = np.concatenate(com_levels)
+        self.children = np.concatenate(child_levels)
+        self.leaf_start = np.concatenate(start_levels)
+        self.leaf_count = np.concatenate(count_levels)
+        self.perm = np.concatenate(perm)
+
+    def __len__(self) -> int:
+        return len(self.half)
+
+    def accelerations(self, positions: np.ndarray, G: float = GRAVITY, theta: float = THETA, softening=SOFTENING) -> np.ndarray:
+        """
+        Gravitational acceleration on every body the tree was built from.
+
+        All bodies walk the tree together: each round handles every open
+        (body, node) pair at once, accepting far nodes as point masses,
+        summing leaves directly and replacing the rest by their children.
+        Softening is a length or one length per body, see direct_accelerations.
+        """
+        n = len(positions)
+        acc = np.zeros((n, 2))
+        eps2 = np.broadcast_to(np.asarray(softening, dtype=float) ** 2, (n,))
+        bodies = np.arange(n)
+        nodes = np.zeros(n, dtype=np.int64)
+
+        while len(bodies):
+            p = positions[bodies]
+            d = self.com[nodes] - p
+            r2 = (d * d).sum(axis=1)
+            leaf = self.leaf_count[nodes] > 0
+            # A node containing the body is always opened, whatever theta is
+            inside = (np.abs(p - self.center[nodes]) <= self.half[nodes, None]).all(axis=1)
+            size2 = (2 * self.half[nodes]) ** 2
+            far = ~leaf & ~inside & (size2 < theta * theta * r2)
+            # Far nodes are only approximated anyway, the body's own softening is used
+            _accumulate(acc, bodies[far], d[far], r2[far], self.mass[nodes[far]], G, eps2[bodies[far]])
+
+            # Leaves: direct sum over their members, skipping the body itself
+            leaf_bodies, leaf_nodes = bodies[leaf], nodes[leaf]
+            counts = self.leaf_count[leaf_nodes]
+            targets = np.repeat(leaf_bodies, counts)
+            rank = np.arange(len(targets)) - np.repeat(np.cumsum(counts) - counts, counts)
+            members = self.perm[np.repeat(self.leaf_start[leaf_nodes], counts) + rank]
+            other = members != targets
+            targets, members = targets[other], members[other]
+            dm = positions[members] - positions[targets]
+            pair_eps2 = (eps2[targets] + eps2[members]) / 2
+            _accumulate(acc, targets, dm, (dm * dm).sum(axis=1), self.masses[members], G, pair_eps2)
+
+            opened = ~leaf & ~far
+            children = self.children[nodes[opened]].ravel()
+            parents = np.repeat(bodies[opened], 4)
+            keep = children >= 0
+            bodies, nodes = parents[keep], children[keep]
+
+        return acc
+
+
+def _accumulate(acc: np.ndarray, targets: np.ndarray, d: np.ndarray, r2: np.ndarray, masses: np.ndarray, G: float, eps2: np.ndarray) -> None:
+    """Add G * m * d / (r^2 + eps^2)^1.5 onto the targets' rows (targets may repeat)."""
+    if not len(targets):
+        return
+    factor = G * masses / (r2 + eps2) ** 1.5
+    n = len(acc)
+    acc[:, 0] += np.bincount(targets, weights=factor * d[:, 0], minlength=n)
+    acc[:, 1] += np.bincount(targets, weights=factor * d[:, 1], minlength=n)
+
+
+def _pair_eps2(softening, n: int) -> np.ndarray:
+    """Squared softening of every pair: the mean of both bodies' squares, symmetric so momentum is conserved."""
+    eps2 = np.broadcast_to(np.asarray(softening, dtype=float) ** 2, (n,))
+    return (eps2[:, None] + eps2[None, :]) / 2
+
+
+def direct_accelerations(positions: np.ndarray, masses: np.ndarray, G: float = GRAVITY, softening=SOFTENING) -> np.ndarray:
+    """
+    Gravitational acceleration on every body by summing over all pairs, O(n^2).
+
+    Softening is a single length or one length per body (e.g. the body
+    radii, so extended bodies never act as point masses when they overlap).
+    """
+    d = positions[None, :, :] - positions[:, None, :]
+    r2 = (d * d).sum(axis=2) + _pair_eps2(softening, len(positions))
+    with np.errstate(divide="ignore"):
+        inv = r2 ** -1.5
+    # No self force, also when the softening is zero
+    np.fill_diagonal(inv, 0.0)
+    return G * np.einsum("ij,ijk->ik", inv * masses[None, :], d)
+
+
+def orbital_timescale(r2: np.ndarray, mu: np.ndarray) -> float:
+    """
+    Shortest sqrt(r^3 / mu) over pairs at squared (softened) distances r2
+    with gravitational parameters mu: the inverse angular velocity of a
+    circular orbit at that distance, so about a sixth of its period.
+    """
+    if not np.size(r2):
+        return math.inf
+    with np.errstate(divide="ignore"):
+        return float(np.sqrt(r2**1.5 / mu).min())
+
+
+def adaptive_step(timescale: float, current: float, tolerance: float, max_step: float) -> float:
+    """
+    Length of the next integration step: `tolerance` times the timescale,
+    growing at most twofold per step and within [max_step * MIN_STEP_FRACTION, max_step].
+
+    Velocity Verlet's error per orbit grows as (step / timescale)^2, so the
+    tolerance is the error budget. Steps are rounded down to max_step over a
+    power of two: the step stays constant over long stretches, which keeps
+    the integration symplectic between changes.
+    """
+    step = min(max(tolerance * timescale, max_step * MIN_STEP_FRACTION), 2 * current, max_step)
+    return max_step / 2.0 ** math.ceil(math.log2(max_step / step))
+
+
+class GravitySimulation:
+    """
+    Mutual gravity between bodies, integrated with velocity Verlet.
+
+    State lives in NumPy arrays (positions, velocities, masses). Small
+    simulations, such as a single system, sum accelerations directly;
+    above `direct_limit` bodies a Barnes-Hut quadtree is rebuilt every step
+    so the cost grows as n log n. Velocity Verlet (kick-drift-kick) is
+    symplectic, so the energy error stays bounded instead of drifting for
+    a fixed step; `energy_drift` reports it relative to the start.
+
+    `advance` adapts the step to the shortest orbital timescale between any
+    two bodies (see adaptive_step), so a long jump costs steps in proportion
+    to the orbits it covers. With Barnes-Hut, pairs are not visited and
+    every body's free-fall time over its softening length, sqrt(eps / |a|),
+    stands in for it.
+    """
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        velocities: np.ndarray,
+        masses: np.ndarray,
+        time: float = 0.0,
+        G: float = GRAVITY,
+        softening=SOFTENING,
+        theta: float = THETA,
+        direct_limit: int = DIRECT_LIMIT,
+    ) -> None:
+        self.positions = np.array(positions, dtype=float).reshape(-1, 2)
+        self.velocities = np.array(velocities, dtype=float).reshape(-1, 2)
+        self.masses = np.array(masses, dtype=float)
+        self.time = time
+        self.G = G
+        # A length, or one per body
+        self.softening = softening if np.ndim(softening) == 0 else np.array(softening, dtype=float)
+        self.theta = theta
+        self.direct_limit = direct_limit
+        self.bodies: list = []  # Bodies written by write_back, in row order
+        self.steps = 0
+        self.step_size = MAX_STEP  # Next adaptive step length
+        self._acc = self.accelerations()
+        # The starting energy costs O(n^2) too, it is only computed once energy_drift asks
+        self._initial_state: Optional[Tuple[np.ndarray, np.ndarray]] = (self.positions.copy(), self.velocities.copy())
+        self._initial_energy: Optional[float] = None
+
+    @classmethod
+    def from_systems(cls, systems: Sequence, t: float, **kwargs) -> "GravitySimulation":
+        """
+        Simulation of every body of the given systems, seeded from their orbits at time t.
+
+        Positions are the Keplerian positions at t. Velocities are the orbit
+        velocities at that point under the bodies' actual masses
+        (mu = G * (M_parent + m)), added to the parent's velocity; centers
+        keep their own velocity. Unless given, the softening of each body is
+        its radius.
+        """
+        G = kwargs.get("G", GRAVITY)
+        bodies, positions, velocities = [], [], []
+        for system in systems:
+            stack = [(system.center, system.center.pos, system.center.velocity)]
+            while stack:
+                body, pos, vel = stack.pop()
+                bodies.append(body)
+                positions.append(pos)
+                velocities.append(vel)
+                for child in reversed(body.children):
+                    if child.orbit is None:
+                        stack.append((child, child.pos, child.velocity))
+                        continue
+                    lx, ly = child.orbit.get_position(t)
+                    vx, vy = child.orbit.velocity(t, mu=G * (body.mass + child.mass))
+                    stack.append((child, (pos[0] + lx, pos[1] + ly), (vel[0] + vx, vel[1] + vy)))
+        kwargs.setdefault("softening", [body.radius for body in bodies])
+        simulation = cls(positions, velocities, [body.mass for body in bodies], time=t, **kwargs)
+        simulation.bodies = bodies
+        return simulation
+
+    def __len__(self) -> int:
+        return len(self.masses)
+
+    def accelerations(self) -> np.ndarray:
+        if len(self) <= self.direct_limit:
+            return direct_accelerations(self.positions, self.masses, self.G, self.softening)
+        tree = QuadTree(self.positions, self.masses)
+        return tree.accelerations(self.positions, self.G, self.theta, self.softening)
+
+    def timescale(self) -> float:
+        """Shortest dynamical timescale of the current state, see the class docstring."""
+        n = len(self)
+        if n > self.direct_limit:
+            eps = np.broadcast_to(np.asarray(self.softening, dtype=float), (n,))
+            acc = np.sqrt((self._acc**2).sum(axis=1))
+            with np.errstate(divide="ignore"):
+                return float(np.sqrt(eps / acc).min())
+        d = self.positions[None, :, :] - self.positions[:, None, :]
+        r2 = (d * d).sum(axis=2) + _pair_eps2(self.softening, n)
+        # A body does not orbit itself
+        np.fill_diagonal(r2, np.inf)
+        return orbital_timescale(r2, self.G * (self.masses[:, None] + self.masses[None, :]))
+
+    def step(self, dt: float) -> None:
+        """One velocity Verlet step (negative dt integrates backwards)."""
+        self.velocities += 0.5 * dt * self._acc
+        self.positions += dt * self.velocities
+        self._acc = self.accelerations()
+        self.velocities += 0.5 * dt * self._acc
+        self.time += dt
+        self.steps += 1
+
+    def advance(
+        self,
+        t: float,
+        max_step: float = MAX_ADAPTIVE_STEP,
+        tolerance: float = TOLERANCE,
+        max_steps: Optional[int] = None,
+    ) -> None:
+        """
+        Integrate up to time t (either direction) in adaptive steps, see adaptive_step.
+
+        With `max_steps`, stops after that many steps even if time has not reached t.
+        """
+        self.step_size = adaptive_step(self.timescale(), self.step_size, tolerance, max_step)
+        taken = 0
+        while self.time != t and (max_steps is None or taken < max_steps):
+            taken += 1
+            remaining = t - self.time
+            size = self.step_size
+            last = abs(remaining) <= size
+            dt = remaining if last else math.copysign(size, remaining)
+            self.step(dt)
+            self.step_size = adaptive_step(self.timescale(), self.step_size, tolerance, max_step)
+            if last:
+                # Keep the clock exact rather than accumulating rounding
+                self.time = t
+
+    @property
+    def initial_energy(self) -> float:
+        """Total energy at the start of the simulation."""
+        if self._initial_energy is None:
+            self._initial_energy = self._energy(*self._initial_state)
+            self._initial_state = None
+        return self._initial_energy
+
+    def energy(self) -> float:
+        """Total kinetic plus (softened) potential energy."""
+        return self._energy(self.positions, self.velocities)
+
+    def _energy(self, positions: np.ndarray, velocities: np.ndarray) -> float:
+        kinetic = 0.5 * float((self.masses * (velocities**2).sum(axis=1)).sum())
+        potential = 0.0
+        # Squared softening as in _pair_eps2, but only one block of pairs at a time
+        eps2 = np.broadcast_to(np.asarray(self.softening, dtype=float) ** 2, (len(self),))
+        # Row blocks keep the pairwise arrays small for large simulations
+        for start in range(0, len(self), 1024):
+            stop = start + 1024
+            # Each pair once: only partners from the block's first row on, then after each row's own index
+            d = positions[None, start:, :] - positions[start:stop, None, :]
+            r = np.sqrt((d * d).sum(axis=2) + (eps2[start:stop, None] + eps2[None, start:]) / 2)
+            pair = self.masses[start:stop, None] * self.masses[None, start:] / r
+            potential -= self.G * float(np.triu(pair, 1).sum())
+        return kinetic + potential
+
+    def energy_drift(self) -> float:
+        """Relative change of the total energy since the simulation started."""
+        if self.initial_energy == 0:
+            return 0.0
+        return (self.energy() - self.initial_energy) / abs(self.initial_energy)
+
+    def write_back(self) -> None:
+        """Copy positions and velocities onto the bodies the simulation was seeded from."""
+        for body, (x, y), (vx, vy) in zip(self.bodies, self.positions.tolist(), self.velocities.tolist()):
+            body.pos = (x, y)
+            body.velocity = (vx, vy)
@@ -0,0 +1,184 @@
+"""
+Frame profiling: scoped timers, counters, rolling percentiles and Chrome traces.
+
+Instrumented code goes through the shared PROFILER, which is disabled by
+default. While disabled, scope() hands out one shared no-op context manager
+and count() returns at once, so instrumentation costs an attribute check.
+
+While enabled, every scope adds its duration to the current frame and
+counters add up per frame. end_frame(), or leaving a frame() scope, closes
+the frame: its totals enter a rolling window of WINDOW frames that report()
+takes percentiles of, and overlay() sums up on one line. With tracing on,
+each scope is also kept as a Chrome trace event (chrome://tracing or
+Perfetto) until dump_trace() writes them out.
+
+Only the process that draws is measured. With render workers, sprites are
+shaded in the workers, so "shade", "shaded_px" and "sprite_hits" stay at
+zero and "draw" includes waiting for the workers.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List
+
+import numpy as np
+
+# Frames kept for percentiles
+WINDOW = 600
+# Trace events kept at most, the oldest are dropped first
+MAX_TRACE_EVENTS = 1_000_000
+PERCENTILES = (50, 95, 99)
+# Scope covering a whole frame, see Profiler.frame
+FRAME = "frame"
+
+
+class _NullScope:
+    """What scope() returns while profiling is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullScope":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> "_Scope":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.profiler._record(self.name, self.start, time.perf_counter_ns())
+        if self.name == FRAME:
+            self.profiler.end_frame()
+        return False
+
+
+class Profiler:
+    """Per-frame timers and counters, see the module docstring."""
+
+    def __init__(self, window: int = WINDOW) -> None:
+        self.enabled = False
+        self.tracing = False
+        self.window = window
+        self.frames = 0
+        self.times: Dict[str, Deque[float]] = {}  # Milliseconds per frame, by scope
+        self.last_times: Dict[str, float] = {}    # Of the last finished frame
+        self.last_counts: Dict[str, int] = {}
+        self.events: Deque[dict] = deque(maxlen=MAX_TRACE_EVENTS)
+        self._frame_times: Dict[str, float] = {}
+        self._frame_counts: Dict[str, int] = {}
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def enable(self, trace: bool = False) -> None:
+        self.enabled = True
+        self.tracing = self.tracing or trace
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.tracing = False
+
+    def reset(self) -> None:
+        """Forget every frame, counter and trace event."""
+        with self._lock:
+            self.frames = 0
+            self.times = {}
+            self.last_times = {}
+            self.last_counts = {}
+            self.events.clear()
+            self._frame_times = {}
+            self._frame_counts = {}
+
+    def scope(self, name: str):
+        """Context manager timing its block under `name`."""
+        return _Scope(self, name) if self.enabled else _NULL_SCOPE
+
+    def frame(self):
+        """Scope around a whole frame; leaving it ends the frame."""
+        return _Scope(self, FRAME) if self.enabled else _NULL_SCOPE
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add n to a counter of the current frame."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._frame_counts[name] = self._frame_counts.get(name, 0) + n
+
+    def end_frame(self) -> None:
+        """Close the current frame: its totals enter the rolling window."""
+        with self._lock:
+            names = set(self.times) | set(self._frame_times)
+            for name in names:
+                samples = self.times.get(name)
+                if samples is None:
+                    samples = self.times[name] = deque([0.0] * min(self.frames, self.window), maxlen=self.window)
+                # Scopes that did not run count as zero
+                samples.append(self._frame_times.get(name, 0.0))
+            if self.tracing and self._frame_counts:
+                self.events.append(self._event("counters", "C", time.perf_counter_ns(), args=dict(self._frame_counts)))
+            self.last_times, self._frame_times = self._frame_times, {}
+            self.last_counts, self._frame_counts = self._frame_counts, {}
+            self.frames += 1
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Milliseconds per frame of every scope over the window: mean and PERCENTILES (p50, p95, p99)."""
+        with self._lock:
+            times = {name: list(samples) for name, samples in self.times.items()}
+        report: Dict[str, Dict[str, float]] = {}
+        for name, samples in times.items():
+            if not samples:
+                continue
+            values = np.percentile(samples, PERCENTILES).tolist()
+            report[name] = {"mean": float(np.mean(samples)), **{f"p{p}": v for p, v in zip(PERCENTILES, values)}}
+        return report
+
+    def overlay(self) -> str:
+        """One line on the last frame: its time, percentiles of frame time, scopes and counters."""
+        parts: List[str] = []
+        with self._lock:
+            frame = list(self.times.get(FRAME, ()))
+            last_times, last_counts = dict(self.last_times), dict(self.last_counts)
+        if frame:
+            p50, p95, p99 = np.percentile(frame, PERCENTILES).tolist()
+            parts.append(f"{FRAME} {frame[-1]:.1f}ms p50/95/99 {p50:.1f}/{p95:.1f}/{p99:.1f}")
+        parts.extend(f"{name} {ms:.1f}" for name, ms in last_times.items() if name != FRAME)
+        parts.extend(f"{name} {value}" for name, value in last_counts.items())
+        return " | ".join(parts)
+
+    def dump_trace(self, path: str) -> None:
+        """Write the trace events as Chrome trace JSON."""
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    # --- Internals ---
+
+    def _record(self, name: str, start: int, end: int) -> None:
+        with self._lock:
+            self._frame_times[name] = self._frame_times.get(name, 0.0) + (end - start) / 1e6
+            if self.tracing:
+                self.events.append(self._event(name, "X", start, dur=(end - start) / 1e3))
+
+    def _event(self, name: str, phase: str, ns: int, **fields) -> dict:
+        # Trace timestamps are microseconds
+        return {"name": name, "ph": phase, "ts": (ns - self._origin) / 1e3,
+                "pid": os.getpid(), "tid": threading.get_ident(), **fields}
+
+
+# Shared by all instrumented code
+PROFILER = Profiler()
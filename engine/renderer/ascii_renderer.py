@@ -1,25 +1,62 @@
 import os
 import shutil
 import sys
-from typing import Optional
+from typing import BinaryIO, Dict, List, Optional, Tuple
 from engine.body.base import CelestialBody
 from engine.camera import Camera
-from engine.renderer.base_renderer import get_renderer
+from engine.physics import SimulationMode
+from engine.profiling import PROFILER
+from engine.renderer.base_renderer import RENDERERS, BodyRenderer
+from engine.renderer.canvas import Canvas
+from engine.renderer.lod import LOD, ORBIT_DOT, STAR_GLYPH, density_glyph, galaxy_lod, smeared, system_lod
+from engine.renderer.orbit_paths import ORBIT_PATHS, TRAIL_GLYPH, projected_radius
+from engine.renderer.output import DiffWriter
+from engine.renderer.parallel import DisplayList, TileRenderPool
+from engine.renderer.sprite_cache import SPRITE_CACHE
+from engine.system import SolarSystem
 from engine.universe import Universe
 
 class AsciiRenderer:
     """Responsible for traversing the universe and delegating drawing."""
 
-    def __init__(self, width=None, height=None, *, camera: Optional[Camera]=None):
+    def __init__(self, width=None, height=None, *, camera: Optional[Camera]=None, stream: Optional[BinaryIO]=None, workers: int = 0, show_orbits: bool = False, show_profile: bool = False):
         terminal_size = shutil.get_terminal_size((80, 40))
         self.width = width or terminal_size.columns
         self.height = height or terminal_size.lines - 2
         self.half_width = self.width / 2
         self.half_height = self.height / 2
         self.camera = camera or Camera()
+        # Bodies are drawn by a pool of processes into a shared canvas when workers > 0
+        self.pool = TileRenderPool(self.width, self.height, workers) if workers > 0 else None
+        # Reused every frame
+        self.canvas = self.pool.canvas if self.pool else Canvas(self.width, self.height)
+        # Sends only the cells that changed since the previous frame (stdout by default)
+        self.output = DiffWriter(stream)
+        # Simulation time of the previous frame and how far time moved since; orbits covered
+        # faster than the frame rate can show are drawn smeared
+        self.last_time: Optional[float] = None
+        self.frame_span = 0.0
+        # Draw the orbit of every body of fully detailed systems under the bodies
+        self.show_orbits = show_orbits
+        # Append the profiler's overlay line to the status (when it is enabled); shading
+        # done by workers is not in it, see engine.profiling
+        self.show_profile = show_profile
+        # Bodies found on screen this frame, per renderer, see _flush_bodies
+        self._batches: Dict[BodyRenderer, List[Tuple[CelestialBody, int, int]]] = {}
+
+    def close(self) -> None:
+        """Shut down the render workers, if any; the renderer can still be used serially."""
+        if self.pool:
+            # Keep the last frame in a private canvas, the shared one goes away with the pool
+            canvas = Canvas(self.width, self.height)
+            canvas.buffer[...] = self.canvas.buffer
+            self.canvas = canvas
+            self.pool.close()
+            self.pool = None
 
     def clear(self) -> None:
         os.system("cls" if os.name == "nt" else "clear")
+        self.output.invalidate()
 
     def to_screen(self, wx, wy):
         """
@@ -37,50 +74,183 @@ class AsciiRenderer:
         """
         Renders the universe to the terminal
         """
-        # Create canvas (list of lists of single characters)
-        canvas = [[" " for _ in range(self.width)] for _ in range(self.height)]
-
-        # Draw galaxies
-        for galaxy in universe.galaxies:
-            # Check if galaxy is roughly in view (simple culling)
-            gx, gy = self.to_screen(*galaxy.pos)
-            if 0 <= gx < self.width and 0 <= gy < self.height:
-                canvas[gy][gx] = "x"
-
-            # Draw systems
-            for system in galaxy.systems:
-                # Recursively draw the system hierarchy starting from the center star
-                self._draw_hierarchy(system.center, canvas)
-        
+        canvas = self.canvas
+        canvas.clear()
+        SPRITE_CACHE.begin_frame()
+        self.frame_span = 0.0 if self.last_time is None else universe.time - self.last_time
+        self.last_time = universe.time
+        # With workers, everything is recorded first and drawn in tiles afterwards
+        target = DisplayList(self.height) if self.pool else canvas
+
+        # Only galaxies and systems overlapping the viewport are visited
+        # (padded by a cell since to_screen truncates towards zero)
+        bounds = self.camera.viewport(self.width + 2, self.height + 2)
+
+        zoom = self.camera.zoom
+        density = {}
+        detailed = []
+
+        with PROFILER.scope("cull"):
+            for galaxy in universe.galaxies_in(bounds):
+                gx, gy = self.to_screen(*galaxy.pos)
+
+                # Galaxies that fit in one cell are only counted, their systems are never visited
+                if galaxy_lod(zoom, galaxy.bounding_radius) is LOD.GALAXY:
+                    density[(gx, gy)] = density.get((gx, gy), 0) + galaxy.system_count
+                    continue
+
+                target.put(gx, gy, "x")
+
+                for system in galaxy.system_index().query(bounds):
+                    lod = system_lod(zoom, system.bounding_radius)
+                    if lod is LOD.STAR:
+                        self._draw_glyph(target, system.center.pos, STAR_GLYPH)
+                    else:
+                        detailed.append((system, lod))
+
+            for (gx, gy), count in density.items():
+                target.put(gx, gy, density_glyph(count))
+
+        # Only systems drawn with their bodies need positions at the current time
+        universe.evaluate(system for system, _ in detailed)
+
+        with PROFILER.scope("draw"):
+            if self.show_orbits:
+                for system, lod in detailed:
+                    if lod is LOD.FULL:
+                        self._draw_orbit_paths(system.center, target)
+
+            for system, lod in detailed:
+                if lod is LOD.ORBITS:
+                    self._draw_orbit_dots(system, target)
+                else:
+                    # Draw the system hierarchy starting from the center star
+                    self._draw_hierarchy(system, target)
+            self._flush_bodies(target)
+
+            if self.pool:
+                self.pool.execute(target, self.camera)
+
+        # The profile of the previous frame goes after the status
+        if self.show_profile and PROFILER.enabled:
+            status = PROFILER.overlay() if status is None else f"{status} | {PROFILER.overlay()}"
+
         # Render status on the last line if provided
         if status is not None:
-            s = status[:self.width]
-            last_row = canvas[-1]
-            for i, ch in enumerate(s):
-                last_row[i] = ch
+            canvas.write_status(status)
 
         # Render to screen
-        self._print(canvas)
+        with PROFILER.scope("print"):
+            self._print(canvas)
+        PROFILER.count("bytes", self.output.bytes_written)
 
-    def _draw_hierarchy(self, body: CelestialBody, canvas):
-        """Recursively draw a body and its children."""
-        bx, by = self.to_screen(*body.pos)
-        
-        # Culling: Only draw if within bounds
-        if 0 <= bx < self.width and 0 <= by < self.height:
-            self._draw_body(body, canvas, bx, by)
-            
-        # Draw children
-        for child in body.children:
-            self._draw_hierarchy(child, canvas)
-        
+    def _draw_hierarchy(self, system: SolarSystem, canvas: Canvas):
+        """
+        Draw a system's bodies, parents before children.
 
-        
+        A body whose extent (its disk plus everything orbiting it, see
+        SolarSystem.extents) misses the screen is skipped with its whole
+        subtree. Bodies overlapping the edge are drawn clipped.
+        """
+        extents = system.extents()
+        zoom = self.camera.zoom
+        width, height = self.width, self.height
+        stack = [system.center]
+        while stack:
+            body = stack.pop()
+            smeared = self._smeared(body, system)
+            if smeared:
+                # Drawn around the parent, which passed culling with this orbit included
+                self._draw_smear(body, canvas)
+
+            bx, by = self.to_screen(*body.pos)
+            # A cell of margin for truncation in to_screen
+            reach = extents[id(body)] * zoom + 1
+            if bx + reach < 0 or bx - reach >= width or by + reach < 0 or by - reach >= height:
+                continue
+
+            # Sprites are at least one cell, and bodies at least 0.5 in radius
+            own = max(body.radius, 0.5) * zoom + 1
+            if not smeared and bx + own >= 0 and bx - own < width and by + own >= 0 and by - own < height:
+                self._draw_body(body, canvas, bx, by)
+            stack.extend(reversed(body.children))
+
+    def _draw_glyph(self, canvas: Canvas, pos, glyph: str) -> None:
+        """Write a single character at a world position if it is on screen."""
+        canvas.put(*self.to_screen(*pos), glyph)
 
-    def _draw_body(self, body: CelestialBody, canvas, sx, sy):
-        renderer_cls = get_renderer(body.type)
-        if renderer_cls:
-            renderer_cls().draw(body, canvas, sx, sy, self.width, self.height, self.camera)
+    def _draw_orbit_dots(self, system: SolarSystem, canvas: Canvas) -> None:
+        """Draw a system as its star glyph plus one dot per orbiting body."""
+        center = system.center
+        stack = list(center.children)
+        while stack:
+            body = stack.pop()
+            if self._smeared(body, system):
+                self._draw_smear(body, canvas)
+            else:
+                self._draw_glyph(canvas, body.pos, ORBIT_DOT)
+            stack.extend(body.children)
+        self._draw_glyph(canvas, center.pos, STAR_GLYPH)
+
+    def _smeared(self, body: CelestialBody, system: SolarSystem) -> bool:
+        """Whether a body on rails laps its orbit between frames; integrated bodies are always drawn where they are."""
+        return (
+            body.orbit is not None
+            and body.parent is not None
+            and not system.dynamic
+            and body.mode is not SimulationMode.DYNAMIC
+            and smeared(body.orbit, self.frame_span)
+        )
+
+    def _draw_smear(self, body: CelestialBody, canvas: Canvas) -> None:
+        """Draw a body that laps its orbit between frames as the orbit around its parent."""
+        self._draw_orbit_path(body, canvas, ORBIT_DOT)
+
+    def _draw_orbit_paths(self, center: CelestialBody, canvas: Canvas) -> None:
+        """Draw the trail of every body of a system."""
+        stack = list(center.children)
+        while stack:
+            body = stack.pop()
+            if body.orbit is not None:
+                self._draw_orbit_path(body, canvas, TRAIL_GLYPH)
+            stack.extend(body.children)
+
+    def _draw_orbit_path(self, body: CelestialBody, canvas: Canvas, glyph: str) -> None:
+        """Draw a body's orbit around its parent's current position, from the orbit path cache."""
+        zoom = self.camera.zoom
+        px, py = self.to_screen(*body.parent.pos)
+        # Trails whose whole ellipse misses the screen are not even looked up
+        extent = projected_radius(body.orbit, zoom) + 1
+        if px + extent < 0 or px - extent >= self.width or py + extent < 0 or py - extent >= self.height:
+            return
+        raster = ORBIT_PATHS.get(body.orbit, zoom, (-px, -py, self.width - 1 - px, self.height - 1 - py))
+        if isinstance(canvas, DisplayList):
+            _, y0, _, y1 = raster.bounds
+            canvas.scatter(raster.cells, px, py, glyph, (y0, y1))
+        else:
+            canvas.scatter(raster.cells, px, py, glyph)
+
+    def _draw_body(self, body: CelestialBody, canvas: Canvas, sx, sy):
+        """Queue a body for its renderer; types without one (e.g. debris) are not drawn."""
+        renderer = RENDERERS.get(body.type)
+        if renderer is not None:
+            batch = self._batches.get(renderer)
+            if batch is None:
+                batch = self._batches[renderer] = []
+            batch.append((body, sx, sy))
+
+    def _flush_bodies(self, canvas: Canvas) -> None:
+        """Draw the queued bodies, one batch per renderer, in the order the renderers were first needed."""
+        hits = SPRITE_CACHE.hits
+        for renderer, items in self._batches.items():
+            PROFILER.count("drawn", len(items))
+            if isinstance(canvas, DisplayList):
+                for body, sx, sy in items:
+                    canvas.draw(body, sx, sy, renderer.extent_px(body, self.camera))
+            else:
+                renderer.draw_batch(items, canvas, self.width, self.height, self.camera)
+        self._batches.clear()
+        PROFILER.count("sprite_hits", SPRITE_CACHE.hits - hits)
 
     def hide_cursor(self):
         sys.stdout.write("\033[?25l")
@@ -90,11 +260,5 @@ class AsciiRenderer:
         sys.stdout.write("\033[?25h")
         sys.stdout.flush()
 
-    def _print(self, canvas):
-        # Build the entire frame as a single string
-        lines = ["".join(row) for row in canvas]
-        # Move to home, print all lines joined by newline
-        # Note: We avoid printing a newline at the very end to prevent scrolling
-        frame = "\033[H" + "\n".join(lines)
-        sys.stdout.write(frame)
-        sys.stdout.flush()
+    def _print(self, canvas: Canvas):
+        self.output.write(canvas)
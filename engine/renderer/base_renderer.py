@@ -1,16 +1,26 @@
 from abc import ABC, abstractmethod
-from typing import Type, TypeVar, Generic, List
+from typing import Generic, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
 
 from engine.body.base import BodyType, CelestialBody
 from engine.camera import Camera
+from engine.profiling import PROFILER
+from engine.renderer.canvas import Canvas
+from engine.renderer.sprite_cache import SPRITE_CACHE, Sprite
 
 T = TypeVar("T", bound=CelestialBody)
 
 class BodyRenderer(Generic[T], ABC):
-    """Base interface for rendering a single celestial body."""
+    """
+    Base interface for rendering celestial bodies of one type.
+
+    Renderers are stateless; one instance per body type is created at
+    registration and shared by every draw.
+    """
 
     @abstractmethod
-    def draw(self, body: T, canvas: List[List[str]], sx: int, sy: int, width: int, height: int, camera: Camera) -> None:
+    def draw(self, body: T, canvas: Canvas, sx: int, sy: int, width: int, height: int, camera: Camera) -> None:
         """
         Draw the body to the renderer.
         
@@ -25,21 +35,116 @@ class BodyRenderer(Generic[T], ABC):
         """
         pass
 
+    def draw_batch(self, items: Sequence[Tuple[T, int, int]], canvas: Canvas, width: int, height: int, camera: Camera) -> None:
+        """Draw (body, sx, sy) items in order, as draw() would one by one."""
+        for body, sx, sy in items:
+            self.draw(body, canvas, sx, sy, width, height, camera)
+
+    def extent_px(self, body: T, camera: Camera) -> Optional[int]:
+        """
+        Half-size in cells of the square around (sx, sy) that draw() may touch.
+
+        None means unknown, in which case the body is treated as covering the whole canvas.
+        """
+        return None
+
+class SpriteRenderer(BodyRenderer[T]):
+    """
+    Renderer for bodies whose look only depends on the body and its pixel radius.
+
+    The body is shaded once per (body, radius_px) into a sprite that is kept
+    in the shared sprite cache and blitted on every following frame. Only the
+    sprite rows that land on the canvas are shaded; more rows are added when
+    a later draw needs them.
+    """
+
+    def draw(self, body: T, canvas: Canvas, sx: int, sy: int, width: int, height: int, camera: Camera) -> None:
+        self.draw_batch(((body, sx, sy),), canvas, width, height, camera)
+
+    def draw_batch(self, items: Sequence[Tuple[T, int, int]], canvas: Canvas, width: int, height: int, camera: Camera) -> None:
+        # Lookups hoisted out of the loop, a batch usually holds every visible body of this type
+        radius_of = self.radius_px
+        top, bottom = canvas.top, canvas.bottom
+        cached = SPRITE_CACHE.get
+        blit = canvas.blit
+        for body, sx, sy in items:
+            radius_px = radius_of(body, camera)
+            size = 2 * radius_px + 1
+            # Sprite rows on the canvas' drawable rows
+            first = max(0, top - (sy - radius_px))
+            stop = min(size, bottom - (sy - radius_px))
+            if first >= stop:
+                continue
+            sprite = cached(
+                body, radius_px,
+                lambda: Sprite(radius_px, np.zeros((size, size), dtype=np.uint32), first, first),
+            )
+            if first < sprite.first or stop > sprite.stop:
+                self._extend(sprite, body, first, stop)
+            blit(sprite.glyphs, sx - radius_px, sy - radius_px)
+
+    def _extend(self, sprite: Sprite, body: T, first: int, stop: int) -> None:
+        """Shade the rows needed to make [first, stop) part of the sprite's shaded band."""
+        with PROFILER.scope("shade"):
+            shaded = self._extend_rows(sprite, body, first, stop)
+        PROFILER.count("shaded_px", shaded * sprite.glyphs.shape[1])
+
+    def _extend_rows(self, sprite: Sprite, body: T, first: int, stop: int) -> int:
+        """_extend without the profiling; returns how many rows were shaded."""
+        if sprite.first == sprite.stop:
+            # Nothing shaded yet
+            sprite.glyphs[first:stop] = self.shade_rows(body, sprite.radius, first, stop)
+            sprite.first, sprite.stop = first, stop
+            return stop - first
+        shaded = 0
+        if first < sprite.first:
+            sprite.glyphs[first:sprite.first] = self.shade_rows(body, sprite.radius, first, sprite.first)
+            shaded += sprite.first - first
+            sprite.first = first
+        if stop > sprite.stop:
+            sprite.glyphs[sprite.stop:stop] = self.shade_rows(body, sprite.radius, sprite.stop, stop)
+            shaded += stop - sprite.stop
+            sprite.stop = stop
+        return shaded
+
+    def extent_px(self, body: T, camera: Camera) -> Optional[int]:
+        return self.radius_px(body, camera)
+
+    @staticmethod
+    def radius_px(body: T, camera: Camera) -> int:
+        """Projected radius in cells, at least 1 so tiny bodies stay visible."""
+        radius = max(body.radius, 0.5) # World space radius, avoids 0-size bodies
+        return max(1, int(round(radius * camera.zoom)))
+
+    @abstractmethod
+    def shade(self, body: T, radius_px: int) -> np.ndarray:
+        """
+        Shade the body into a (2 * radius_px + 1) square of glyph codepoints.
+
+        Index [radius_px, radius_px] is the body's center; cells left at 0 are transparent.
+        """
+        pass
+
+    def shade_rows(self, body: T, radius_px: int, first: int, stop: int) -> np.ndarray:
+        """Rows [first, stop) of shade(body, radius_px); override to skip shading the rest."""
+        return self.shade(body, radius_px)[first:stop]
+
 # --- Renderer Registry ---
 
-RENDERERS: dict[BodyType, Type[BodyRenderer]] = {}
+# The shared instance of each body type's renderer
+RENDERERS: dict[BodyType, BodyRenderer] = {}
 
 def register_renderer(body_type: BodyType):
-    """Decorator to register a renderer for a specific body type."""
+    """Decorator to register a renderer for a specific body type; the class is instantiated once, here."""
     def decorator(cls):
-        RENDERERS[body_type] = cls
+        RENDERERS[body_type] = cls()
         return cls
     
     return decorator
 
-def get_renderer(body_type: BodyType) -> Type[BodyRenderer]:
+def get_renderer(body_type: BodyType) -> BodyRenderer:
     """Get the renderer for a specific body type."""
     if body_type not in RENDERERS:
         raise ValueError(f"No renderer registered for body type {body_type}") 
     
-    return RENDERERS[body_type]
\ No newline at end of file
+    return RENDERERS[body_type]
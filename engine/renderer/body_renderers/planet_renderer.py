@@ -1,230 +1,176 @@
-from dataclasses import dataclass
-from enum import Enum
 import math
-import random
 from typing import List
 
-from engine.body.base import BodyType, CelestialBody
-from engine.body.planet import Planet
-from engine.camera import Camera
-from engine.renderer.base_renderer import BodyRenderer, register_renderer
+import numpy as np
+
+from engine.body.base import BodyType
+from engine.body.planet import Planet, PlanetType, planet_appearance
+from engine.renderer.base_renderer import SpriteRenderer, register_renderer
+
+
+def _look(body: Planet) -> List[float]:
+    """
+    The planet's appearance digest as uniforms in [0, 1), 16 bits each.
+
+    Planets created without one (not by the generator) get one derived from
+    their name alone, stored on the body the first time it is shaded.
+    """
+    if body.appearance is None:
+        body.appearance = planet_appearance(0, body.name)
+    return (np.frombuffer(body.appearance, dtype="<u2") / 65536.0).tolist()
+
+
+def _between(u: float, lo: float, hi: float) -> float:
+    return lo + (hi - lo) * u
 
 
 @register_renderer(BodyType.PLANET)
-class PlanetRenderer(BodyRenderer[Planet]):
+class PlanetRenderer(SpriteRenderer[Planet]):
     GRADIENT = [" ", "·", ":", "*", "o", "O", "@"]
+    GRADIENT_CODES = np.array([ord(ch) for ch in GRADIENT], dtype=np.uint32)
 
-    def draw(self, body, canvas, sx, sy, width, height, camera: Camera) -> None:
-        drawer = getattr(self, f"_draw_{body.planet_type.name.lower()}", None)
-        if drawer is None:
-            raise ValueError(f"No drawer for planet type {body.planet_type}")
-        drawer(body, canvas, sx, sy, width, height, camera)
+    def shade(self, body: Planet, radius_px: int) -> np.ndarray:
+        return self.shade_rows(body, radius_px, 0, 2 * radius_px + 1)
 
-    # --- Drawers ---
+    def shade_rows(self, body: Planet, radius_px: int, first: int, stop: int) -> np.ndarray:
+        shader = self.SHADERS.get(body.planet_type)
+        if shader is None:
+            raise ValueError(f"No shader for planet type {body.planet_type}")
 
-    def _draw_gas_giant(self, body: Planet, canvas: List[List[str]], sx: int, sy: int, width: int, height: int, camera: Camera) -> None:
-        radius = max(body.radius, 0.5)
-        radius_px = max(1, int(round(radius * camera.zoom)))
-        lum = body.luminosity or 1.0
+        # Pixel offsets from the center, shaded in one batch over the disk
+        offsets = np.arange(-radius_px, radius_px + 1, dtype=np.float64)
+        dx, dy = np.meshgrid(offsets, offsets[first:stop])
+        dist = np.sqrt(dx * dx + dy * dy)
+
+        # Normalize coords
+        nx = dx / radius_px
+        ny = dy / radius_px
+        r = np.sqrt(nx * nx + ny * ny)
+        disk = (dist <= radius_px) & (r <= 1)
+
+        brightness = shader(self, body, nx[disk], ny[disk], r[disk])
         levels = len(self.GRADIENT) - 1
+        idx = np.clip(brightness * levels, 0, levels).astype(np.intp)
+
+        glyphs = np.zeros(dx.shape, dtype=np.uint32)
+        glyphs[disk] = self.GRADIENT_CODES[idx]
+        return glyphs
 
-        # Stable randomization
-        random.seed(hash(body.name))
-        band_count = random.randint(6, 10)       # how many bands across the planet
-        wave_amp = random.uniform(0.1, 0.25)     # horizontal wave distortion
-        band_mix = random.uniform(0.2, 0.4)      # mixing strength for distortion
-
-        for dy in range(-radius_px, radius_px + 1):
-            y = sy + dy
-            if not (0 <= y < height):
-                continue
-            for dx in range(-radius_px, radius_px + 1):
-                x = sx + dx
-                if not (0 <= x < width):
-                    continue
-
-                # Distance check
-                dist = math.sqrt(dx * dx + dy * dy)
-                if dist > radius_px:
-                    continue
-
-                # Normalize coords
-                nx = dx / radius_px
-                ny = dy / radius_px
-                r = math.sqrt(nx * nx + ny * ny)
-                if r > 1:
-                    continue
-
-                # Latitude-based wave (bands)
-                latitude = ny * math.pi / 2
-                band = math.sin(latitude * band_count)
-
-                # Small horizontal distortion (simulate wind/turbulence)
-                distortion = math.sin(nx * 8 + band_mix * ny * 6)
-                band = (band + wave_amp * distortion) * 0.5 + 0.5  # normalize 0–1
-
-                # Darken edges to look spherical
-                brightness = band * lum * (1 - r * 0.7)
-                idx = int(min(levels, max(0, brightness * levels)))
-                canvas[y][x] = self.GRADIENT[idx]
-
-    def _draw_ice_giant(self, body: Planet, canvas: List[List[str]], sx: int, sy: int, width: int, height: int, camera: Camera) -> None:
-        radius = max(body.radius, 0.5)
-        radius_px = max(1, int(round(radius * camera.zoom)))
+    # --- Shaders ---
+    # Each shader takes the normalized coordinates (nx, ny) and radius r of
+    # every pixel on the disk and returns their brightness, with the same
+    # arithmetic as the original per-pixel shaders. Per-planet parameters come
+    # from the body's appearance digest (see _look), in the ranges the original
+    # shaders drew them from at random: a planet looks the same in every run
+    # and process, but not as it did when shaded from the random module.
+
+    def _shade_gas_giant(self, body: Planet, nx: np.ndarray, ny: np.ndarray, r: np.ndarray) -> np.ndarray:
         lum = body.luminosity or 1.0
-        levels = len(self.GRADIENT) - 1
 
-        random.seed(hash(body.name) ^ 0x1CE)
-        band_count = random.randint(2, 5)
-        band_phase = random.uniform(0.0, 2 * math.pi)
-        band_amp = random.uniform(0.15, 0.3)
-        turb_amp = random.uniform(0.05, 0.12)
-        spot_x = random.uniform(-0.3, 0.3)
-        spot_y = random.uniform(-0.3, 0.3)
-        spot_sigma = random.uniform(0.10, 0.18)
-
-        for dy in range(-radius_px, radius_px + 1):
-            y = sy + dy
-            if not (0 <= y < height):
-                continue
-            for dx in range(-radius_px, radius_px + 1):
-                x = sx + dx
-                if not (0 <= x < width):
-                    continue
-
-                dist = math.sqrt(dx * dx + dy * dy)
-                if dist > radius_px:
-                    continue
-
-                nx = dx / radius_px
-                ny = dy / radius_px
-                r = math.sqrt(nx * nx + ny * ny)
-                if r > 1:
-                    continue
-
-                latitude = ny * math.pi / 2.0
-                band = math.cos(latitude * band_count + band_phase) * 0.5 + 0.5
-                band_mix = (1.0 - band_amp) * 0.5 + band_amp * band
-                turb = math.sin(nx * 6.0 + ny * 2.0 + band_phase * 0.7) * 0.5 + 0.5
-                val = band_mix * (1.0 - turb_amp) + turb * turb_amp
-
-                dxs = nx - spot_x
-                dys = ny - spot_y
-                dsq = dxs * dxs + dys * dys
-                spot = math.exp(-dsq / (2.0 * spot_sigma * spot_sigma))
-
-                base = 0.35 + 0.55 * val
-                brightness = base * (1.0 - r * 0.5) + 0.35 * spot
-                brightness *= lum
-                brightness = max(0.0, min(1.0, brightness))
-                idx = int(min(levels, max(0, brightness * levels)))
-                canvas[y][x] = self.GRADIENT[idx]
-
-    def _draw_terrestrial(self, body: Planet, canvas: List[List[str]], sx: int, sy: int, width: int, height: int, camera: Camera) -> None:
-        radius = max(body.radius, 0.5)
-        radius_px = max(1, int(round(radius * camera.zoom)))
-        levels = len(self.GRADIENT) - 1
+        u = _look(body)
+        band_count = 6 + int(u[0] * 5)           # how many bands across the planet, 6 to 10
+        wave_amp = _between(u[1], 0.1, 0.25)     # horizontal wave distortion
+        band_mix = _between(u[2], 0.2, 0.4)      # mixing strength for distortion
 
-        random.seed(hash(body.name) ^ 0x7ED)
-        freq1 = random.uniform(3.0, 6.0)
-        freq2 = random.uniform(3.0, 6.0)
-        freq3 = random.uniform(2.0, 4.0)
-        ph1 = random.uniform(0.0, 2 * math.pi)
-        ph2 = random.uniform(0.0, 2 * math.pi)
-        ph3 = random.uniform(0.0, 2 * math.pi)
-        sea_level = random.uniform(-0.15, 0.15)
-        mount_gain = random.uniform(0.3, 0.6)
-        ocean_dark = random.uniform(0.15, 0.25)
-        land_base = random.uniform(0.45, 0.6)
-        albedo = body.albedo if body.albedo is not None else 0.3
+        # Latitude-based wave (bands)
+        latitude = ny * math.pi / 2
+        band = np.sin(latitude * band_count)
 
-        for dy in range(-radius_px, radius_px + 1):
-            y = sy + dy
-            if not (0 <= y < height):
-                continue
-            for dx in range(-radius_px, radius_px + 1):
-                x = sx + dx
-                if not (0 <= x < width):
-                    continue
-
-                dist = math.sqrt(dx * dx + dy * dy)
-                if dist > radius_px:
-                    continue
-
-                nx = dx / radius_px
-                ny = dy / radius_px
-                r = math.sqrt(nx * nx + ny * ny)
-                if r > 1:
-                    continue
-
-                elev = (
-                    math.sin(nx * freq1 + ph1) +
-                    math.cos(ny * freq2 + ph2) +
-                    math.sin((nx + ny) * freq3 + ph3)
-                ) / 3.0
-
-                landness = elev - sea_level
-                if landness > 0.0:
-                    rough = abs(math.sin(nx * freq1 * 2.0 + ph1 * 1.7) * math.cos(ny * freq2 * 2.0 + ph2 * 1.3))
-                    brightness = land_base + mount_gain * landness * (0.5 + 0.5 * rough)
-                else:
-                    wave = math.sin(nx * 10.0 + ph3) * math.sin(ny * 8.0 + ph2)
-                    brightness = ocean_dark + 0.06 * (wave * 0.5 + 0.5)
-
-                polar = max(0.0, abs(ny) - 0.6) / 0.4
-                brightness = brightness * (1.0 - 0.6 * polar) + 0.85 * polar
-                brightness *= (1.0 - r * 0.7)
-                brightness *= (0.7 + 0.6 * albedo)
-                brightness = max(0.0, min(1.0, brightness))
-
-                idx = int(min(levels, max(0, brightness * levels)))
-                canvas[y][x] = self.GRADIENT[idx]
-
-    def _draw_lava_giant(self, body: Planet, canvas: List[List[str]], sx: int, sy: int, width: int, height: int, camera: Camera) -> None:
-        radius = max(body.radius, 0.5)
-        radius_px = max(1, int(round(radius * camera.zoom)))
-        levels = len(self.GRADIENT) - 1
+        # Small horizontal distortion (simulate wind/turbulence)
+        distortion = np.sin(nx * 8 + band_mix * ny * 6)
+        band = (band + wave_amp * distortion) * 0.5 + 0.5  # normalize 0–1
+
+        # Darken edges to look spherical
+        return band * lum * (1 - r * 0.7)
+
+    def _shade_ice_giant(self, body: Planet, nx: np.ndarray, ny: np.ndarray, r: np.ndarray) -> np.ndarray:
+        lum = body.luminosity or 1.0
+
+        u = _look(body)
+        band_count = 2 + int(u[0] * 4)
+        band_phase = _between(u[1], 0.0, 2 * math.pi)
+        band_amp = _between(u[2], 0.15, 0.3)
+        turb_amp = _between(u[3], 0.05, 0.12)
+        spot_x = _between(u[4], -0.3, 0.3)
+        spot_y = _between(u[5], -0.3, 0.3)
+        spot_sigma = _between(u[6], 0.10, 0.18)
+
+        latitude = ny * math.pi / 2.0
+        band = np.cos(latitude * band_count + band_phase) * 0.5 + 0.5
+        band_mix = (1.0 - band_amp) * 0.5 + band_amp * band
+        turb = np.sin(nx * 6.0 + ny * 2.0 + band_phase * 0.7) * 0.5 + 0.5
+        val = band_mix * (1.0 - turb_amp) + turb * turb_amp
+
+        dxs = nx - spot_x
+        dys = ny - spot_y
+        dsq = dxs * dxs + dys * dys
+        spot = np.exp(-dsq / (2.0 * spot_sigma * spot_sigma))
+
+        base = 0.35 + 0.55 * val
+        brightness = base * (1.0 - r * 0.5) + 0.35 * spot
+        brightness = brightness * lum
+        return np.clip(brightness, 0.0, 1.0)
+
+    def _shade_terrestrial(self, body: Planet, nx: np.ndarray, ny: np.ndarray, r: np.ndarray) -> np.ndarray:
+        u = _look(body)
+        freq1 = _between(u[0], 3.0, 6.0)
+        freq2 = _between(u[1], 3.0, 6.0)
+        freq3 = _between(u[2], 2.0, 4.0)
+        ph1 = _between(u[3], 0.0, 2 * math.pi)
+        ph2 = _between(u[4], 0.0, 2 * math.pi)
+        ph3 = _between(u[5], 0.0, 2 * math.pi)
+        sea_level = _between(u[6], -0.15, 0.15)
+        mount_gain = _between(u[7], 0.3, 0.6)
+        ocean_dark = _between(u[8], 0.15, 0.25)
+        land_base = _between(u[9], 0.45, 0.6)
+        albedo = body.albedo if body.albedo is not None else 0.3
 
-        random.seed(hash(body.name) ^ 0x1A4A)
-        freq1 = random.uniform(8.0, 12.0)
-        freq2 = random.uniform(8.0, 12.0)
-        freq3 = random.uniform(4.0, 8.0)
-        ph1 = random.uniform(0.0, 2 * math.pi)
-        ph2 = random.uniform(0.0, 2 * math.pi)
-        ph3 = random.uniform(0.0, 2 * math.pi)
-        thickness = random.uniform(0.10, 0.18)
-        glow = random.uniform(0.6, 0.9)
-        base_dark = random.uniform(0.15, 0.25)
-
-        for dy in range(-radius_px, radius_px + 1):
-            y = sy + dy
-            if not (0 <= y < height):
-                continue
-            for dx in range(-radius_px, radius_px + 1):
-                x = sx + dx
-                if not (0 <= x < width):
-                    continue
-
-                dist = math.sqrt(dx * dx + dy * dy)
-                if dist > radius_px:
-                    continue
-
-                nx = dx / radius_px
-                ny = dy / radius_px
-                r = math.sqrt(nx * nx + ny * ny)
-                if r > 1:
-                    continue
-
-                u = abs(math.sin(nx * freq1 + ph1))
-                v = abs(math.sin(ny * freq2 + ph2))
-                w = abs(math.sin((nx - ny) * freq3 + ph3))
-                m = min(u, v, w)
-                crack = math.exp(- (m / thickness) ** 2)
-                pool = max(0.0, math.sin(nx * 3.0 + ny * 2.0 + ph3)) * 0.15
-
-                edge_cool = (1.0 - r * 0.5)
-                brightness = base_dark * edge_cool + glow * crack + pool
-                brightness = max(0.0, min(1.0, brightness))
-
-                idx = int(min(levels, max(0, brightness * levels)))
-                canvas[y][x] = self.GRADIENT[idx]
+        elev = (
+            np.sin(nx * freq1 + ph1) +
+            np.cos(ny * freq2 + ph2) +
+            np.sin((nx + ny) * freq3 + ph3)
+        ) / 3.0
+
+        landness = elev - sea_level
+        rough = np.abs(np.sin(nx * freq1 * 2.0 + ph1 * 1.7) * np.cos(ny * freq2 * 2.0 + ph2 * 1.3))
+        land = land_base + mount_gain * landness * (0.5 + 0.5 * rough)
+        wave = np.sin(nx * 10.0 + ph3) * np.sin(ny * 8.0 + ph2)
+        ocean = ocean_dark + 0.06 * (wave * 0.5 + 0.5)
+        brightness = np.where(landness > 0.0, land, ocean)
+
+        polar = np.maximum(0.0, np.abs(ny) - 0.6) / 0.4
+        brightness = brightness * (1.0 - 0.6 * polar) + 0.85 * polar
+        brightness = brightness * (1.0 - r * 0.7)
+        brightness = brightness * (0.7 + 0.6 * albedo)
+        return np.clip(brightness, 0.0, 1.0)
+
+    def _shade_lava_giant(self, body: Planet, nx: np.ndarray, ny: np.ndarray, r: np.ndarray) -> np.ndarray:
+        u = _look(body)
+        freq1 = _between(u[0], 8.0, 12.0)
+        freq2 = _between(u[1], 8.0, 12.0)
+        freq3 = _between(u[2], 4.0, 8.0)
+        ph1 = _between(u[3], 0.0, 2 * math.pi)
+        ph2 = _between(u[4], 0.0, 2 * math.pi)
+        ph3 = _between(u[5], 0.0, 2 * math.pi)
+        thickness = _between(u[6], 0.10, 0.18)
+        glow = _between(u[7], 0.6, 0.9)
+        base_dark = _between(u[8], 0.15, 0.25)
+
+        band1 = np.abs(np.sin(nx * freq1 + ph1))
+        band2 = np.abs(np.sin(ny * freq2 + ph2))
+        band3 = np.abs(np.sin((nx - ny) * freq3 + ph3))
+        m = np.minimum(np.minimum(band1, band2), band3)
+        crack = np.exp(- (m / thickness) ** 2)
+        pool = np.maximum(0.0, np.sin(nx * 3.0 + ny * 2.0 + ph3)) * 0.15
+
+        edge_cool = (1.0 - r * 0.5)
+        brightness = base_dark * edge_cool + glow * crack + pool
+        return np.clip(brightness, 0.0, 1.0)
+
+    # Shader of each planet type, looked up once per sprite
+    SHADERS = {
+        PlanetType.GAS_GIANT: _shade_gas_giant,
+        PlanetType.ICE_GIANT: _shade_ice_giant,
+        PlanetType.TERRESTRIAL: _shade_terrestrial,
+        PlanetType.LAVA_GIANT: _shade_lava_giant,
+    }
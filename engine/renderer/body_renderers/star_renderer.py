@@ -1,29 +1,26 @@
 from math import sqrt
 
+import numpy as np
+
 from engine.body.base import BodyType
-from engine.camera import Camera
 
-from ..base_renderer import BodyRenderer, register_renderer
+from ..base_renderer import SpriteRenderer, register_renderer
 
 @register_renderer(BodyType.STAR)
-class StarRenderer(BodyRenderer):
+class StarRenderer(SpriteRenderer):
     GRADIENT = [" ", "·", ":", "*", "o", "O", "@"]
 
-    def draw(self, body, canvas, sx, sy, width, height, camera: Camera) -> None:
-        radius_world = max(body.radius, 0.5) # World space radius, avoids 0-size stars
-        radius_px = max(1, int(round(radius_world * camera.zoom))) # Converted into pixels and adjusted by camera's zoom level, ensures at least 1 pixel wide
+    def shade(self, body, radius_px: int) -> np.ndarray:
+        return self.shade_rows(body, radius_px, 0, 2 * radius_px + 1)
+
+    def shade_rows(self, body, radius_px: int, first: int, stop: int) -> np.ndarray:
         lum = body.luminosity or 1.0 # Luminosity of star, used for brightness
         levels = len(self.GRADIENT) - 1
+        size = 2 * radius_px + 1
+        glyphs = np.zeros((stop - first, size), dtype=np.uint32)
 
-        for dy in range(-radius_px, radius_px + 1):
-            star_pixel_y = sy + dy
-            if not (0 <= star_pixel_y < height):
-                continue
+        for dy in range(first - radius_px, stop - radius_px):
             for dx in range(-radius_px, radius_px + 1):
-                star_pixel_x = sx + dx
-                if not (0 <= star_pixel_x < width):
-                    continue
-
                 # Euclidean distance from center of star
                 dist = sqrt(dx * dx + dy * dy)
 
@@ -36,4 +33,6 @@ class StarRenderer(BodyRenderer):
                 strength = (1 - normalized) * lum
                 idx = int(min(levels, max(0, strength * levels)))
                 if idx > 0:
-                    canvas[star_pixel_y][star_pixel_x] = self.GRADIENT[idx]
\ No newline at end of file
+                    glyphs[dy + radius_px - first, dx + radius_px] = ord(self.GRADIENT[idx])
+
+        return glyphs
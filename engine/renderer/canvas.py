@@ -0,0 +1,95 @@
+from typing import List, Optional
+
+import numpy as np
+
+SPACE = ord(" ")
+NEWLINE = ord("\n")
+
+
+class Canvas:
+    """
+    Frame buffer of glyph codepoints backed by a preallocated NumPy array.
+
+    The buffer has one extra column holding newlines, so a whole frame can be
+    encoded with a single conversion of the buffer instead of joining rows.
+    The same canvas is meant to be cleared and reused every frame.
+
+    An existing (height, width + 1) uint32 buffer can be passed in, e.g. one
+    backed by shared memory. Drawing is clipped to rows [top, bottom), which
+    lets tile() hand out canvases that share the buffer but only touch their
+    own rows.
+    """
+
+    def __init__(self, width: int, height: int, buffer: Optional[np.ndarray] = None) -> None:
+        self.width = width
+        self.height = height
+        if buffer is None:
+            buffer = np.full((height, width + 1), SPACE, dtype=np.uint32)
+        elif buffer.shape != (height, width + 1) or buffer.dtype != np.uint32:
+            raise ValueError(f"Canvas buffer must be ({height}, {width + 1}) uint32, got {buffer.shape} {buffer.dtype}")
+        self.buffer = buffer
+        self.buffer[:, width] = NEWLINE
+        # Drawable cells, a view into the buffer without the newline column
+        self.cells = self.buffer[:, :width]
+        self.top = 0
+        self.bottom = height
+
+    def tile(self, top: int, bottom: int) -> "Canvas":
+        """Canvas sharing this buffer, with drawing clipped to rows [top, bottom)."""
+        tile = Canvas(self.width, self.height, self.buffer)
+        tile.top, tile.bottom = max(0, top), min(self.height, bottom)
+        return tile
+
+    def clear(self) -> None:
+        """Reset every cell to a space, in place."""
+        self.cells[self.top:self.bottom].fill(SPACE)
+
+    def put(self, x: int, y: int, ch: str) -> None:
+        """Write one character, ignoring positions outside the canvas."""
+        if 0 <= x < self.width and self.top <= y < self.bottom:
+            self.cells[y, x] = ord(ch)
+
+    def scatter(self, cells: np.ndarray, x: int, y: int, ch: str) -> None:
+        """Write one character at every (dx, dy) offset in `cells` from (x, y), clipped to the canvas."""
+        xs = cells[:, 0] + x
+        ys = cells[:, 1] + y
+        inside = (xs >= 0) & (xs < self.width) & (ys >= self.top) & (ys < self.bottom)
+        self.cells[ys[inside], xs[inside]] = ord(ch)
+
+    def blit(self, glyphs: np.ndarray, x: int, y: int, transparent: Optional[int] = 0) -> None:
+        """
+        Copy a block of glyph codepoints with its top-left corner at (x, y).
+
+        The block is clipped to the canvas; cells equal to `transparent` are
+        skipped (pass None to copy every cell).
+        """
+        h, w = glyphs.shape
+        x0, y0 = max(0, x), max(self.top, y)
+        x1, y1 = min(self.width, x + w), min(self.bottom, y + h)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        src = glyphs[y0 - y:y1 - y, x0 - x:x1 - x]
+        dst = self.cells[y0:y1, x0:x1]
+        if transparent is None:
+            dst[...] = src
+        else:
+            np.copyto(dst, src, where=src != transparent)
+
+    def write_status(self, text: str) -> None:
+        """Write a status line over the start of the last row."""
+        text = text[:self.width]
+        if text:
+            self.cells[-1, :len(text)] = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+    def to_text(self) -> str:
+        """The frame as rows joined by newlines (no trailing newline)."""
+        return self.buffer.reshape(-1)[:-1].tobytes().decode("utf-32-le")
+
+    def encode(self, encoding: str = "utf-8") -> bytes:
+        """The frame encoded for output, characters the encoding lacks are replaced."""
+        return self.to_text().encode(encoding, errors="replace")
+
+    def rows(self) -> List[str]:
+        """The frame as a list of row strings."""
+        return self.to_text().split("\n")
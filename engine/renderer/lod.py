@@ -0,0 +1,64 @@
+"""Level-of-detail selection for galaxies and systems based on their projected size."""
+import math
+from enum import Enum
+
+from engine.physics import Orbit
+
+
+class LOD(Enum):
+    GALAXY = "Galaxy"   # Whole galaxy collapsed to one density glyph
+    STAR = "Star"       # System collapsed to a single star glyph
+    ORBITS = "Orbits"   # Star glyph plus one dot per orbiting body
+    FULL = "Full"       # Every body drawn by its body renderer
+
+
+# Projected radii (in cells) below which a coarser representation is used,
+# a glyph only stands in for what fits inside its own cell
+GALAXY_GLYPH_MAX_RADIUS = 0.5
+STAR_GLYPH_MAX_RADIUS = 0.5
+ORBIT_DOTS_MAX_RADIUS = 8.0
+
+# Bodies covering more than this fraction of their orbit between frames are drawn as the whole orbit
+SMEAR_REVOLUTIONS = 0.5
+
+STAR_GLYPH = "*"
+ORBIT_DOT = "·"
+# Ramp for collapsed galaxies, from few to many systems per cell
+DENSITY_GLYPHS = ["x", "X", "%", "#", "@"]
+
+
+def galaxy_lod(zoom: float, radius: float) -> LOD:
+    """
+    GALAXY when the galaxy projects to less than GALAXY_GLYPH_MAX_RADIUS cells
+    in radius (it fits in the one cell its glyph takes, so its systems
+    could not be told apart anyway), FULL otherwise.
+    """
+    if radius * zoom < GALAXY_GLYPH_MAX_RADIUS:
+        return LOD.GALAXY
+    return LOD.FULL
+
+
+def system_lod(zoom: float, radius: float) -> LOD:
+    """Representation for a system of the given bounding radius at this zoom."""
+    projected = radius * zoom
+    if projected < STAR_GLYPH_MAX_RADIUS:
+        return LOD.STAR
+    if projected < ORBIT_DOTS_MAX_RADIUS:
+        return LOD.ORBITS
+    return LOD.FULL
+
+
+def density_glyph(systems: int) -> str:
+    """Glyph for a cell holding the given number of systems (one step per factor of 4)."""
+    level = int(math.log(max(systems, 1), 4))
+    return DENSITY_GLYPHS[min(level, len(DENSITY_GLYPHS) - 1)]
+
+
+def smeared(orbit: Orbit, span: float) -> bool:
+    """
+    True when a body on this orbit moves more than SMEAR_REVOLUTIONS around it
+    in `span` of simulation time. Its position from one frame to the next is
+    then aliased noise, the orbit itself is what stays stable.
+    """
+    return abs(span) * orbit.mean_motion > 2 * math.pi * SMEAR_REVOLUTIONS
+
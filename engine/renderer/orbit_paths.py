@@ -0,0 +1,157 @@
+"""
+Orbit trails, rasterized once per orbit and zoom level.
+
+An orbit's ellipse never changes relative to its parent (a, e and omega are
+fixed), so it is sampled once into a closed polyline, and at a given zoom
+its rasterization is a fixed set of cell offsets from the parent's cell.
+Those offsets are cached per (orbit, zoom); drawing a trail is then
+one translated and clipped scatter into the canvas, whatever the parent's
+position. Only trails too large to cache are rasterized every frame, and
+then only the segments that cross the viewport.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from engine.physics import Orbit
+
+TRAIL_GLYPH = "."
+
+# Polyline points per orbit, evenly spaced in eccentric anomaly
+PATH_SAMPLES = 128
+# Rasterizations kept per orbit, for the zoom levels used most recently. They are
+# keyed by the exact zoom, as bodies are placed with it: a rounded zoom would put
+# large trails cells away from their bodies. The camera settles on a few target
+# zooms, only the frames of a zoom transition miss.
+MAX_ZOOMS_PER_ORBIT = 4
+# Trails projected larger than this (in cells from the parent) are never cached
+MAX_CACHED_RADIUS = 2048.0
+
+# Cell bounds (x0, y0, x1, y1), inclusive
+Bounds = Tuple[int, int, int, int]
+
+
+@dataclass
+class OrbitRaster:
+    """Cells covered by a trail, as offsets from its parent's cell, and their bounds."""
+
+    cells: np.ndarray  # (n, 2) int64 offsets (dx, dy)
+    bounds: Bounds
+
+    @classmethod
+    def of(cls, cells: np.ndarray) -> "OrbitRaster":
+        if not len(cells):
+            return cls(cells, (0, 0, -1, -1))
+        x0, y0 = cells.min(axis=0).tolist()
+        x1, y1 = cells.max(axis=0).tolist()
+        return cls(cells, (x0, y0, x1, y1))
+
+
+def projected_radius(orbit: Orbit, zoom: float) -> float:
+    """Farthest a trail gets from its parent, in cells (the apoapsis distance)."""
+    return orbit.semi_major_axis * (1 + orbit.eccentricity) * zoom
+
+
+def rasterize(points: np.ndarray, zoom: float, clip: Optional[Bounds] = None) -> np.ndarray:
+    """
+    Cells covered by the closed polyline through `points` (world offsets) at this zoom.
+
+    Every segment is stepped at most one cell at a time. With `clip`, only
+    segments whose bounding box overlaps those cell bounds are rasterized
+    (cells of those segments outside the bounds are kept).
+    """
+    start = points * zoom
+    end = np.roll(start, -1, axis=0)
+    if clip is not None:
+        lo, hi = np.minimum(start, end), np.maximum(start, end)
+        x0, y0, x1, y1 = clip
+        overlap = (hi[:, 0] >= x0 - 1) & (lo[:, 0] <= x1 + 1) & (hi[:, 1] >= y0 - 1) & (lo[:, 1] <= y1 + 1)
+        start, end = start[overlap], end[overlap]
+        if not len(start):
+            return np.zeros((0, 2), dtype=np.int64)
+
+    delta = end - start
+    counts = np.maximum(1, np.ceil(np.abs(delta).max(axis=1))).astype(np.int64)
+    segment = np.repeat(np.arange(len(start)), counts)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    fraction = (np.arange(len(segment)) - first) / counts[segment]
+    cells = np.rint(start[segment] + delta[segment] * fraction[:, None]).astype(np.int64)
+    return np.unique(cells, axis=0)
+
+
+class OrbitPathCache:
+    """
+    Bounded LRU cache of trail polylines and rasterizations, keyed by orbit.
+
+    Entries hold a reference to their orbit so the id() in the key cannot be
+    reused by another object while the entry is alive. An orbit replaced on
+    its body (e.g. after a handoff) simply gets a new entry.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        self.capacity = capacity
+        self._entries: "OrderedDict[int, Tuple[Orbit, np.ndarray, OrderedDict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def polyline(self, orbit: Orbit) -> np.ndarray:
+        """The orbit sampled into PATH_SAMPLES points relative to its parent."""
+        return self._entry(orbit)[1]
+
+    def get(self, orbit: Orbit, zoom: float, clip: Bounds) -> OrbitRaster:
+        """
+        The trail of an orbit at this zoom, as offsets from the parent's cell.
+
+        `clip` is the viewport in the same offsets. It only matters for trails
+        too large to cache, which are rasterized within it every call.
+        """
+        _, points, rasters = self._entry(orbit)
+        if projected_radius(orbit, zoom) > MAX_CACHED_RADIUS:
+            self.misses += 1
+            return OrbitRaster.of(rasterize(points, zoom, clip))
+
+        raster = rasters.get(zoom)
+        if raster is not None:
+            rasters.move_to_end(zoom)
+            self.hits += 1
+            return raster
+
+        self.misses += 1
+        raster = rasters[zoom] = OrbitRaster.of(rasterize(points, zoom))
+        if len(rasters) > MAX_ZOOMS_PER_ORBIT:
+            rasters.popitem(last=False)
+        return raster
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _entry(self, orbit: Orbit) -> Tuple[Orbit, np.ndarray, OrderedDict]:
+        key = id(orbit)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        entry = self._entries[key] = (orbit, orbit.path(PATH_SAMPLES), OrderedDict())
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+
+# Shared by every renderer
+ORBIT_PATHS = OrbitPathCache()
@@ -0,0 +1,171 @@
+import sys
+from typing import BinaryIO, Optional
+
+import numpy as np
+
+from engine.renderer.canvas import Canvas
+
+
+class DiffWriter:
+    """
+    Terminal output stage that only sends what changed since the last frame.
+
+    Changed cells are grouped into runs per row and each run is written after
+    a cursor-positioning escape. Runs separated by only a few unchanged cells
+    are merged, since rewriting those cells is cheaper than another escape.
+    When most of the screen changed, the whole frame is redrawn instead.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[BinaryIO] = None,
+        *,
+        encoding: Optional[str] = None,
+        full_redraw_ratio: float = 0.5,
+        merge_gap: int = 6,
+    ) -> None:
+        self.stream = stream
+        self.encoding = encoding
+        self.full_redraw_ratio = full_redraw_ratio
+        self.merge_gap = merge_gap
+        self.previous: Optional[np.ndarray] = None
+
+        # Output statistics
+        self.bytes_written = 0   # Bytes of the last frame
+        self.total_bytes = 0
+        self.frames = 0
+        self.full_redraws = 0
+
+    def invalidate(self) -> None:
+        """Forget the previous frame so the next write is a full redraw."""
+        self.previous = None
+
+    def write(self, canvas: Canvas) -> int:
+        """Write a frame and return the number of bytes sent."""
+        stream, encoding = self._stream()
+        cells = canvas.cells
+        previous = self.previous
+
+        if previous is None or previous.shape != cells.shape:
+            data = self._full(canvas, encoding)
+        else:
+            changed = cells != previous
+            count = int(np.count_nonzero(changed))
+            if count > self.full_redraw_ratio * changed.size:
+                data = self._full(canvas, encoding)
+            elif count:
+                data = self._diff(cells, changed, encoding)
+            else:
+                data = b""
+
+        if data:
+            stream.write(data)
+            stream.flush()
+
+        if previous is None or previous.shape != cells.shape:
+            self.previous = cells.copy()
+        else:
+            previous[...] = cells
+
+        self.bytes_written = len(data)
+        self.total_bytes += len(data)
+        self.frames += 1
+        return len(data)
+
+    def _stream(self):
+        if self.stream is not None:
+            return self.stream, self.encoding or getattr(self.stream, "encoding", None) or "utf-8"
+        # Resolved per frame so a replaced sys.stdout is honoured
+        out = sys.stdout
+        out.flush()
+        return out.buffer, self.encoding or out.encoding or "utf-8"
+
+    def _full(self, canvas: Canvas, encoding: str) -> bytes:
+        self.full_redraws += 1
+        # Move to home, then the whole frame encoded in one pass
+        # Note: The canvas has no newline after the last row to prevent scrolling
+        return b"\033[H" + canvas.encode(encoding)
+
+    def _diff(self, cells: np.ndarray, changed: np.ndarray, encoding: str) -> bytes:
+        parts = []
+        gap = self.merge_gap
+        for y in np.flatnonzero(changed.any(axis=1)).tolist():
+            xs = np.flatnonzero(changed[y])
+            # Start a new run wherever the distance to the previous change exceeds the gap
+            breaks = np.flatnonzero(np.diff(xs) > gap)
+            starts = np.concatenate(([xs[0]], xs[breaks + 1])).tolist()
+            ends = np.concatenate((xs[breaks], [xs[-1]])).tolist()
+            for x0, x1 in zip(starts, ends):
+                text = cells[y, x0:x1 + 1].tobytes().decode("utf-32-le")
+                parts.append(f"\033[{y + 1};{x0 + 1}H{text}".encode(encoding, errors="replace"))
+        return b"".join(parts)
+
+
+class NullSink:
+    """Binary stream that discards frames, for headless runs at full speed."""
+
+    encoding = "utf-8"
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FileSink:
+    """
+    Binary stream recording frames to a file.
+
+    The file holds the same escape sequences a terminal would receive, so a
+    recording can be played back with `cat`.
+    """
+
+    encoding = "utf-8"
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "wb")
+
+    def write(self, data: bytes) -> int:
+        return self._file.write(data)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class TtySink:
+    """
+    Binary stream writing to the terminal on stdout.
+
+    The screen is cleared and the cursor hidden while the sink is open; close()
+    shows the cursor again and moves it below the last frame.
+    """
+
+    def __init__(self, height: int = 0) -> None:
+        self.height = height
+        self._out = sys.stdout
+        self._out.write("\033[?25l\033[2J")
+        self._out.flush()
+
+    @property
+    def encoding(self) -> str:
+        return self._out.encoding or "utf-8"
+
+    def write(self, data: bytes) -> int:
+        # Text written through sys.stdout must reach the terminal first
+        self._out.flush()
+        return self._out.buffer.write(data)
+
+    def flush(self) -> None:
+        self._out.buffer.flush()
+
+    def close(self) -> None:
+        self._out.write(f"\033[{self.height + 1};1H\033[?25h\n" if self.height else "\033[?25h\n")
+        self._out.flush()
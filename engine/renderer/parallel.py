@@ -0,0 +1,171 @@
+import dataclasses
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from engine.body.base import CelestialBody
+from engine.camera import Camera
+from engine.renderer.base_renderer import get_renderer
+from engine.renderer.canvas import Canvas
+from engine.renderer.sprite_cache import SPRITE_CACHE, evict_unused
+
+# Display list operations
+PUT = 0   # (PUT, x, y, ch)
+BODY = 1  # (BODY, key, body, sx, sy)
+SCATTER = 2  # (SCATTER, cells, x, y, ch)
+
+
+class DisplayList:
+    """
+    Drawing operations recorded in order instead of being applied to a canvas.
+
+    Bodies are stored as detached copies (no parent, children or orbit) so
+    shipping an operation to another process does not pickle the hierarchy.
+    Each operation also records the rows it can touch, which is what tiles
+    are selected by.
+    """
+
+    def __init__(self, height: int) -> None:
+        self.height = height
+        self.ops: List[tuple] = []
+        self.rows: List[Tuple[int, int]] = []  # [first, last] row of each op
+        self.bodies = 0
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def put(self, x: int, y: int, ch: str) -> None:
+        self.ops.append((PUT, x, y, ch))
+        self.rows.append((y, y))
+
+    def scatter(self, cells: np.ndarray, x: int, y: int, ch: str, rows: Tuple[int, int]) -> None:
+        """Record a Canvas.scatter; `rows` are the offsets' [first, last] dy."""
+        self.ops.append((SCATTER, cells, x, y, ch))
+        self.rows.append((y + rows[0], y + rows[1]))
+
+    def draw(self, body: CelestialBody, sx: int, sy: int, extent: Optional[int]) -> None:
+        detached = dataclasses.replace(body, parent=None, children=[], orbit=None)
+        # Sprite caches in the workers key on this, stable for as long as the body lives
+        key = (id(body), body.name)
+        self.ops.append((BODY, key, detached, sx, sy))
+        self.rows.append((0, self.height - 1) if extent is None else (sy - extent, sy + extent))
+        self.bodies += 1
+
+    def split(self, bounds: List[Tuple[int, int]]) -> List[List[tuple]]:
+        """The ops overlapping each [top, bottom) row range, in recorded order."""
+        tiles: List[List[tuple]] = [[] for _ in bounds]
+        for op, (first, last) in zip(self.ops, self.rows):
+            for ops, (top, bottom) in zip(tiles, bounds):
+                if first < bottom and last >= top:
+                    ops.append(op)
+        return tiles
+
+
+def execute(ops: List[tuple], canvas: Canvas, camera: Camera, bodies: Optional["OrderedDict"] = None) -> None:
+    """Apply display list operations to a canvas; `bodies` keeps body copies across frames, see _reuse."""
+    for op in ops:
+        if op[0] == PUT:
+            canvas.put(op[1], op[2], op[3])
+            continue
+        if op[0] == SCATTER:
+            canvas.scatter(op[1], op[2], op[3], op[4])
+            continue
+        _, key, body, sx, sy = op
+        if bodies is not None:
+            body = _reuse(bodies, key, body)
+        get_renderer(body.type).draw(body, canvas, sx, sy, canvas.width, canvas.height, camera)
+
+
+def _reuse(bodies: "OrderedDict", key: Tuple[int, str], body: CelestialBody) -> CelestialBody:
+    """
+    The copy of a body seen in an earlier frame, so sprites cached for it stay valid.
+
+    Copies are kept in LRU order with the frame they were last used in, and
+    evicted like sprites (see SpriteCache). An id can be reused once the original body is freed, so an earlier copy
+    only stands in for a body that looks the same (anything but where it is).
+    """
+    cached, _ = bodies.get(key, (None, None))
+    if cached is not None:
+        incoming = dataclasses.replace(body, pos=cached.pos, velocity=cached.velocity)
+        if getattr(body, "appearance", False) is None:
+            # Planets built without a digest get one on the copy the worker shades (see _look)
+            incoming.appearance = cached.appearance
+        if incoming == cached:
+            bodies[key] = (cached, SPRITE_CACHE.frame)
+            bodies.move_to_end(key)
+            return cached
+    bodies[key] = (body, SPRITE_CACHE.frame)
+    bodies.move_to_end(key)
+    evict_unused(bodies, SPRITE_CACHE.capacity, SPRITE_CACHE.frame)
+    return body
+
+
+# --- Worker side ---
+
+_canvas: Optional[Canvas] = None
+_shm: Optional[shared_memory.SharedMemory] = None
+_bodies: "OrderedDict[Tuple[int, str], Tuple[CelestialBody, int]]" = OrderedDict()
+
+
+def _init_worker(name: str, width: int, height: int) -> None:
+    global _canvas, _shm
+    # Workers share the parent's resource tracker, only the parent unlinks the segment
+    _shm = shared_memory.SharedMemory(name=name)
+    _canvas = Canvas(width, height, np.ndarray((height, width + 1), dtype=np.uint32, buffer=_shm.buf))
+
+
+def _render_tile(top: int, bottom: int, ops: List[tuple], camera: Camera, frame: int) -> None:
+    SPRITE_CACHE.begin_frame(frame)
+    execute(ops, _canvas.tile(top, bottom), camera, _bodies)
+
+
+class TileRenderPool:
+    """
+    Process pool drawing display lists into a shared-memory canvas.
+
+    The canvas is split into horizontal tiles; each tile is drawn by a
+    worker that only receives the operations overlapping its rows. Workers
+    write straight into the shared buffer, so composing the tiles copies
+    nothing.
+    """
+
+    def __init__(self, width: int, height: int, workers: Optional[int] = None, tiles: Optional[int] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        count = max(1, min(tiles or self.workers, height))
+        self.bounds = [(height * i // count, height * (i + 1) // count) for i in range(count)]
+
+        self._shm = shared_memory.SharedMemory(create=True, size=height * (width + 1) * 4)
+        buffer = np.ndarray((height, width + 1), dtype=np.uint32, buffer=self._shm.buf)
+        buffer.fill(ord(" "))
+        self.canvas = Canvas(width, height, buffer)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self._shm.name, width, height),
+        )
+
+    def execute(self, display: DisplayList, camera: Camera) -> None:
+        """Draw a display list into the shared canvas, returning once every tile is done."""
+        if not display.bodies:
+            # Nothing expensive to draw, not worth a round trip to the workers
+            execute(display.ops, self.canvas, camera)
+            return
+        futures = [
+            self._executor.submit(_render_tile, top, bottom, ops, camera, SPRITE_CACHE.frame)
+            for (top, bottom), ops in zip(self.bounds, display.split(self.bounds))
+            if ops
+        ]
+        for future in futures:
+            future.result()
+
+    def close(self) -> None:
+        """Stop the workers and release the shared canvas; it must no longer be referenced."""
+        self._executor.shutdown()
+        self.canvas = None
+        self._shm.close()
+        self._shm.unlink()
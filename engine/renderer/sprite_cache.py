@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from engine.body.base import CelestialBody
+
+# Glyph value for cells a sprite leaves untouched
+TRANSPARENT = 0
+
+
+@dataclass
+class Sprite:
+    """
+    Pre-shaded square of glyph codepoints centered on the body.
+
+    Only rows [first, stop) have been shaded so far; the rest are TRANSPARENT
+    until a draw needs them.
+    """
+
+    radius: int
+    glyphs: np.ndarray  # (2 * radius + 1, 2 * radius + 1) uint32, TRANSPARENT where nothing is drawn
+    first: int = 0
+    stop: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.stop is None:
+            self.stop = len(self.glyphs)
+
+
+class SpriteCache:
+    """
+    Bounded LRU cache of sprites keyed by (body, radius_px).
+
+    Entries hold a reference to their body so the id() in the key cannot be
+    reused by another object while the entry is alive. Sprites used in the
+    current frame are never evicted: with more sprites on screen than the
+    capacity, the cache grows to hold them instead of evicting each one
+    just before it is needed again.
+    """
+
+    def __init__(self, capacity: int = 512) -> None:
+        self.capacity = capacity
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[CelestialBody, Sprite, int]]" = OrderedDict()
+        self.frame = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def begin_frame(self, frame: Optional[int] = None) -> None:
+        """Start the next frame, or the given one (workers follow the parent's frame numbers)."""
+        self.frame = self.frame + 1 if frame is None else frame
+
+    def get(self, body: CelestialBody, radius_px: int, build: Callable[[], Sprite]) -> Sprite:
+        """Return the cached sprite, building and storing it on a miss."""
+        key = (id(body), radius_px)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (body, entry[1], self.frame)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        sprite = build()
+        self._entries[key] = (body, sprite, self.frame)
+        self.evictions += evict_unused(self._entries, self.capacity, self.frame)
+        return sprite
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def evict_unused(entries: "OrderedDict", capacity: int, frame: int) -> int:
+    """
+    Drop least recently used entries until at most `capacity` remain, but
+    none used in `frame` (an entry's last item); returns how many went.
+    """
+    evicted = 0
+    while len(entries) > capacity:
+        oldest = next(iter(entries))
+        if entries[oldest][-1] == frame:
+            # In LRU order, so everything after it was used this frame too
+            break
+        del entries[oldest]
+        evicted += 1
+    return evicted
+
+
+# Shared by all sprite-based body renderers
+SPRITE_CACHE = SpriteCache()
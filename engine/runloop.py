@@ -0,0 +1,109 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from engine.input import InputSource, NoInput
+
+
+@dataclass
+class LoopStats:
+    steps: int = 0            # Simulation steps run
+    frames: int = 0           # Frames rendered
+    skipped_frames: int = 0   # Steps that ran without a frame of their own (catching up)
+    dropped_steps: int = 0    # Steps abandoned because the loop fell too far behind
+    elapsed: float = 0.0      # Wall time in seconds
+
+
+class RunLoop:
+    """
+    Fixed-timestep loop driving input, simulation and rendering.
+
+    The simulation advances in steps of exactly `step_time` seconds of wall
+    time. Each iteration polls input, runs as many steps as the elapsed time
+    allows (at most `max_steps`), renders once and sleeps only for what is
+    left of the frame budget. When rendering is slower than the step rate,
+    frames are skipped instead of slowing the simulation down; when the loop
+    is more than `max_steps` behind, the backlog is dropped.
+
+    With `realtime=False` the wall clock is ignored: every iteration runs one
+    step and renders it, as fast as possible (headless batch runs).
+    """
+
+    def __init__(
+        self,
+        step: Callable[[], None],
+        render: Callable[[], None],
+        *,
+        source: Optional[InputSource] = None,
+        on_key: Optional[Callable[[str], None]] = None,
+        step_time: float = 0.05,
+        max_steps: int = 5,
+        realtime: bool = True,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.step = step
+        self.render = render
+        self.source = source or NoInput()
+        self.on_key = on_key
+        self.step_time = step_time
+        self.max_steps = max_steps
+        self.realtime = realtime
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = LoopStats()
+        self.running = False
+
+    def stop(self) -> None:
+        """End the loop after the current iteration."""
+        self.running = False
+
+    def run(self, steps: Optional[int] = None) -> LoopStats:
+        """Run until stop() is called or `steps` simulation steps have run."""
+        stats = self.stats
+        start = previous = self.clock()
+        lag = self.step_time  # The first iteration steps and renders immediately
+        self.running = True
+
+        while self.running and (steps is None or stats.steps < steps):
+            for key in self.source.poll():
+                if self.on_key is not None:
+                    self.on_key(key)
+            if not self.running:
+                break
+
+            if self.realtime:
+                now = self.clock()
+                lag += now - previous
+                previous = now
+                due = int(lag // self.step_time)
+            else:
+                due = 1
+
+            if steps is not None:
+                due = min(due, steps - stats.steps)
+            ran = min(due, self.max_steps)
+            for _ in range(ran):
+                self.step()
+            stats.steps += ran
+
+            if self.realtime:
+                lag -= ran * self.step_time
+                if due > ran:
+                    # Too far behind to catch up, forget the backlog
+                    stats.dropped_steps += due - ran
+                    lag %= self.step_time
+
+            if ran:
+                self.render()
+                stats.frames += 1
+                stats.skipped_frames += ran - 1
+
+            if self.realtime:
+                remaining = self.step_time - lag - (self.clock() - previous)
+                if remaining > 0:
+                    self.sleep(remaining)
+
+        self.running = False
+        stats.elapsed = self.clock() - start
+        return stats
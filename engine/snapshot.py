@@ -0,0 +1,102 @@
+"""
+Universe snapshots: a columnar binary file opened through mmap.
+
+Layout (little endian):
+
+    header          magic, galaxy count, simulation time, string table size
+    galaxy table    one GALAXY_DTYPE record per galaxy
+    string table    galaxy names, UTF-8 with NUL separators
+    system blobs    per galaxy, its systems as written by pack_systems:
+                    fixed-width body records (orbit elements included),
+                    parent indices and a string table for body names
+
+load_universe maps the file and returns a Universe of LazyGalaxy objects
+whose loaders unpack straight from the mapping. Opening only reads the
+galaxy table; a galaxy's pages are faulted in the first time its systems
+are touched, and unloading it drops the objects while the bytes stay in the
+page cache. Galaxy bounding radii are stored, so culling never loads a
+galaxy it skips.
+"""
+import mmap
+import struct
+from typing import List
+
+import numpy as np
+
+from engine.galaxy import LazyGalaxy
+from engine.packing import pack_systems, unpack_systems
+from engine.system import SolarSystem
+from engine.universe import Universe
+
+MAGIC = b"AUS3"
+HEADER = struct.Struct("<4sQdQ")
+
+GALAXY_DTYPE = np.dtype([
+    ("name", "<i4"),             # Index into the string table
+    ("pos", "<f8", (2,)),
+    ("bounding_radius", "<f8"),
+    ("systems", "<i8"),          # Number of systems
+    ("offset", "<u8"),           # Start of the packed systems, from the start of the file
+    ("size", "<u8"),             # Length of the packed systems in bytes
+])
+
+
+def save_universe(universe: Universe, path: str) -> None:
+    """Write a universe snapshot. Lazy galaxies are loaded one at a time to be written."""
+    galaxies = universe.galaxies
+    names = "\0".join(galaxy.name for galaxy in galaxies).encode("utf-8")
+    table = np.zeros(len(galaxies), dtype=GALAXY_DTYPE)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(galaxies), universe.time, len(names)))
+        # The table is written again once the blob offsets are known
+        table_offset = f.tell()
+        f.write(table.tobytes())
+        f.write(names)
+
+        for i, galaxy in enumerate(galaxies):
+            was_loaded = galaxy.loaded
+            blob = pack_systems(galaxy.systems)
+            table[i] = (i, galaxy.pos, galaxy.bounding_radius, len(galaxy.systems), f.tell(), len(blob))
+            f.write(blob)
+            if not was_loaded:
+                # Do not keep a far-away galaxy in memory just because it was saved
+                universe.unload(galaxy)
+
+        f.seek(table_offset)
+        f.write(table.tobytes())
+
+
+def load_universe(path: str) -> Universe:
+    """Open a snapshot; galaxies are unpacked from the mapped file when first needed."""
+    with open(path, "rb") as f:
+        # The mapping stays valid after the file is closed, the loaders keep it alive
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, count, time, names_size = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a universe snapshot")
+    table = np.frombuffer(data, dtype=GALAXY_DTYPE, count=count, offset=HEADER.size)
+    start = HEADER.size + table.nbytes
+    names = data[start:start + names_size].decode("utf-8").split("\0")
+
+    view = memoryview(data)
+    galaxies = [
+        LazyGalaxy(
+            name=names[name],
+            pos=tuple(pos),
+            loader=_loader(view, offset, size),
+            system_count=systems,
+            bounding_radius=bounding_radius,
+        )
+        for name, pos, bounding_radius, systems, offset, size in zip(
+            *(table[field].tolist() for field in GALAXY_DTYPE.names)
+        )
+    ]
+    return Universe(galaxies=galaxies, time=time)
+
+
+def _loader(view: memoryview, offset: int, size: int):
+    def load() -> List[SolarSystem]:
+        return unpack_systems(view[offset:offset + size])
+    return load
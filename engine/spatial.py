@@ -0,0 +1,129 @@
+import math
+from typing import Dict, Generic, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# World-space rectangle (min_x, min_y, max_x, max_y)
+Bounds = Tuple[float, float, float, float]
+
+
+def circle_intersects(bounds: Bounds, center: Tuple[float, float], radius: float) -> bool:
+    """Whether a circle overlaps an axis-aligned rectangle."""
+    min_x, min_y, max_x, max_y = bounds
+    cx, cy = center
+    # Closest point of the rectangle to the circle center
+    dx = cx - min(max(cx, min_x), max_x)
+    dy = cy - min(max(cy, min_y), max_y)
+    return dx * dx + dy * dy <= radius * radius
+
+
+class SpatialGrid(Generic[T]):
+    """
+    Uniform grid over bounding circles.
+
+    Each item is stored in every cell its bounding box touches, so a
+    rectangle query only looks at the cells it covers. When a query covers
+    more cells than are occupied (zoomed far out), the occupied cells are
+    scanned instead, so a query never costs more than the grid holds.
+    """
+
+    def __init__(self, cell_size: float) -> None:
+        self.cell_size = cell_size
+        self.items: List[T] = []
+        self.centers: List[Tuple[float, float]] = []
+        self.radii: List[float] = []
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+    @classmethod
+    def build(cls, items: Sequence[T], centers: Sequence[Tuple[float, float]], radii: Sequence[float]) -> "SpatialGrid[T]":
+        """Build a grid with a cell size suited to the given circles."""
+        if not items:
+            return cls(1.0)
+        xs = [c[0] for c in centers]
+        ys = [c[1] for c in centers]
+        area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+        # Cells about as large as an average item, but not so small that
+        # there are many more cells than items
+        mean_diameter = 2 * sum(radii) / len(radii)
+        cell_size = max(mean_diameter, math.sqrt(area / len(items)), 1e-6)
+
+        grid = cls(cell_size)
+        for item, center, radius in zip(items, centers, radii):
+            grid.insert(item, center, radius)
+        return grid
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _cell_range(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (
+            math.floor(min_x / size),
+            math.floor(min_y / size),
+            math.floor(max_x / size),
+            math.floor(max_y / size),
+        )
+
+    def insert(self, item: T, center: Tuple[float, float], radius: float) -> None:
+        """Add an item with its bounding circle."""
+        index = len(self.items)
+        self.items.append(item)
+        self.centers.append(center)
+        self.radii.append(radius)
+
+        cx, cy = center
+        x0, y0, x1, y1 = self._cell_range(cx - radius, cy - radius, cx + radius, cy + radius)
+        cells = self.cells
+        for i in range(x0, x1 + 1):
+            for j in range(y0, y1 + 1):
+                cells.setdefault((i, j), []).append(index)
+
+    def query(self, bounds: Bounds) -> List[T]:
+        """Items whose bounding circle overlaps a world-space rectangle, in insertion order."""
+        x0, y0, x1, y1 = self._cell_range(*bounds)
+        cells = self.cells
+
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(cells):
+            candidates = [
+                cells[(i, j)]
+                for i in range(x0, x1 + 1)
+                for j in range(y0, y1 + 1)
+                if (i, j) in cells
+            ]
+        else:
+            candidates = [
+                bucket for (i, j), bucket in cells.items()
+                if x0 <= i <= x1 and y0 <= j <= y1
+            ]
+
+        min_x, min_y, max_x, max_y = bounds
+        hits = set()
+        seen = set()
+        centers = self.centers
+        radii = self.radii
+        for bucket in candidates:
+            for index in bucket:
+                if index in seen:
+                    continue
+                seen.add(index)
+                # Inlined circle_intersects
+                cx, cy = centers[index]
+                dx = cx - min(max(cx, min_x), max_x)
+                dy = cy - min(max(cy, min_y), max_y)
+                r = radii[index]
+                if dx * dx + dy * dy <= r * r:
+                    hits.add(index)
+        # Insertion order keeps draw order stable regardless of cell layout
+        return [self.items[index] for index in sorted(hits)]
+
+    def query_point(self, x: float, y: float) -> List[T]:
+        """Items whose bounding circle contains a point."""
+        size = self.cell_size
+        bucket = self.cells.get((math.floor(x / size), math.floor(y / size)), ())
+        found = []
+        for index in bucket:
+            cx, cy = self.centers[index]
+            r = self.radii[index]
+            if (x - cx) ** 2 + (y - cy) ** 2 <= r * r:
+                found.append(self.items[index])
+        return found
@@ -1,7 +1,40 @@
+import math
 from dataclasses import dataclass, field
-from typing import List
+from typing import Dict, List, Optional
+
+from .body.base import CelestialBody, hierarchy_changes
+
+
+def _subtree_extents(center: CelestialBody, free: bool = False) -> Dict[int, float]:
+    """
+    Distance from every body's center, by id(body), that its own disk and
+    everything orbiting it stay within, in one pass.
+
+    A child on rails gets no farther than its apoapsis a * (1 + e). Any other
+    child (off the rails with no orbit, or every child when `free`, i.e. the
+    whole system is integrated) is counted at its current distance, so the
+    result only holds until those bodies move again.
+    """
+    order = []
+    stack = [center]
+    while stack:
+        body = stack.pop()
+        order.append(body)
+        stack.extend(body.children)
+
+    extents: Dict[int, float] = {}
+    # Children come after their parent in pre-order, so they are done first in reverse
+    for body in reversed(order):
+        extent = body.radius
+        for child in body.children:
+            if child.orbit is None or free:
+                reach = math.hypot(child.pos[0] - body.pos[0], child.pos[1] - body.pos[1])
+            else:
+                reach = child.orbit.semi_major_axis * (1 + child.orbit.eccentricity)
+            extent = max(extent, extents[id(child)] + reach)
+        extents[id(body)] = extent
+    return extents
 
-from .body.base import CelestialBody
 
 @dataclass
 class SolarSystem:
@@ -11,7 +44,39 @@ class SolarSystem:
     center: CelestialBody
     bodies: List[CelestialBody] = field(default_factory=list)
 
+    # Simulation time the body positions were last computed for (None = never)
+    last_evaluated: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    # Integrated under mutual gravity, see Universe.enable_gravity: orbits are only where bodies started
+    dynamic: bool = field(default=False, init=False, repr=False, compare=False)
+    _extents: Optional[Dict[int, float]] = field(default=None, init=False, repr=False, compare=False)
+    _extents_changes: int = field(default=-1, init=False, repr=False, compare=False)
+
+    @property
+    def bounding_radius(self) -> float:
+        """Radius around the center body that contains every orbit of the system."""
+        return self.extents()[id(self.center)]
+
+    def extents(self) -> Dict[int, float]:
+        """
+        For every body, by id(body), the distance from its center that it and
+        everything orbiting it stay within. Used to cull whole subtrees.
+
+        Bodies off the rails count where they are now, so the cache has to be
+        invalidated whenever they move. Bodies added with add_child are picked
+        up on their own.
+        """
+        changes = hierarchy_changes()
+        if self._extents is None or self._extents_changes != changes:
+            self._extents = _subtree_extents(self.center, self.dynamic)
+            self._extents_changes = changes
+        return self._extents
+
+    def invalidate(self) -> None:
+        """Forget the cached bounds, after bodies were added, removed, moved between parents or moved off the rails."""
+        self._extents = None
+
     def update(self, t: float) -> None:
         """Update the system state at time t."""
         # Update the center body (which recursively updates children)
-        self.center.update(t)
\ No newline at end of file
+        self.center.update(t)
+        self.last_evaluated = t
@@ -0,0 +1,49 @@
+"""
+Simulation clock with time warp.
+
+The clock only decides which simulation time a frame shows. Getting the
+universe there is Universe.set_time: bodies on rails are evaluated in closed
+form at that time however far it jumps, integrated bodies are substepped
+adaptively to their error budget. The renderer draws bodies that lap their
+orbit between two frames as the whole orbit (see lod.smeared), so warp can
+go as high as MAX_WARP without aliasing.
+"""
+
+# Warp changes by this factor per key press, within [MIN_WARP, MAX_WARP]
+WARP_FACTOR = 2.0
+MIN_WARP = 1 / 64
+MAX_WARP = 2.0**16
+
+
+class TimeWarp:
+    """Simulation time advanced by wall time times a warp factor, which can be paused."""
+
+    def __init__(self, time: float = 0.0, warp: float = 1.0, min_warp: float = MIN_WARP, max_warp: float = MAX_WARP) -> None:
+        self.time = time
+        self.min_warp = min_warp
+        self.max_warp = max_warp
+        self.warp = self._clamp(warp)
+        self.paused = False
+
+    def faster(self) -> float:
+        """Raise the warp one step; returns the new warp."""
+        self.warp = self._clamp(self.warp * WARP_FACTOR)
+        return self.warp
+
+    def slower(self) -> float:
+        """Lower the warp one step; returns the new warp."""
+        self.warp = self._clamp(self.warp / WARP_FACTOR)
+        return self.warp
+
+    def toggle_pause(self) -> bool:
+        self.paused = not self.paused
+        return self.paused
+
+    def advance(self, dt: float) -> float:
+        """Move the clock by dt of real (unwarped) time; returns the simulation time."""
+        if not self.paused:
+            self.time += dt * self.warp
+        return self.time
+
+    def _clamp(self, warp: float) -> float:
+        return min(max(warp, self.min_warp), self.max_warp)
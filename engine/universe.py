@@ -1,7 +1,14 @@
+import math
 from dataclasses import dataclass, field
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from .galaxy import Galaxy
+from .galaxy import Galaxy, LazyGalaxy
+from .hybrid import HybridSimulation
+from .physics import MAX_FRAME_STEPS, GravitySimulation
+from .profiling import PROFILER
+from .spatial import Bounds, SpatialGrid
+from .body.base import CelestialBody
+from .system import SolarSystem
 
 
 @dataclass
@@ -10,5 +17,204 @@ class Universe:
 
     galaxies: List[Galaxy] = field(default_factory=list)
 
+    # Current simulation time. Body positions are computed lazily: only systems
+    # that are visible or explicitly queried are brought up to this time.
+    time: float = 0.0
+
+    # Opt-in dynamic mode: systems handed to a gravity simulation leave the rails
+    gravity: Optional[GravitySimulation] = field(default=None, init=False, repr=False, compare=False)
+
+    _dynamic: Dict[int, SolarSystem] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    # Integration steps set_time takes per simulation at most (None for no limit)
+    step_budget: Optional[int] = field(default=MAX_FRAME_STEPS, repr=False, compare=False)
+
+    # Free (non-rails) bodies of tracked systems, integrated as time moves
+    hybrid: HybridSimulation = field(default_factory=HybridSimulation, init=False, repr=False, compare=False)
+    _owners: Optional[Dict[int, Galaxy]] = field(default=None, init=False, repr=False, compare=False)
+    _index: Optional[SpatialGrid[Galaxy]] = field(default=None, init=False, repr=False, compare=False)
+
     def add_galaxy(self, galaxy: Galaxy) -> None:
-        self.galaxies.append(galaxy)
\ No newline at end of file
+        self.galaxies.append(galaxy)
+        self._owners = None
+        self._index = None
+
+    def galaxy_index(self) -> SpatialGrid[Galaxy]:
+        """Spatial index over galaxy bounding circles, built on first use."""
+        if self._index is None or len(self._index) != len(self.galaxies):
+            self._index = SpatialGrid.build(
+                self.galaxies,
+                [g.pos for g in self.galaxies],
+                [g.bounding_radius for g in self.galaxies],
+            )
+        return self._index
+
+    def galaxy_of(self, system: SolarSystem) -> Galaxy:
+        """The galaxy a system belongs to."""
+        if self._owners is None or id(system) not in self._owners:
+            # Galaxies that were never loaded cannot own a system that exists
+            self._owners = {id(s): galaxy for galaxy in self.galaxies if galaxy.loaded for s in galaxy.systems}
+        return self._owners[id(system)]
+
+    def unload(self, galaxy: LazyGalaxy) -> None:
+        """Drop a lazy galaxy's systems; they are regenerated identically when next needed."""
+        galaxy.unload()
+        # System ids in the owner map may be reused by new objects once these are freed
+        self._owners = None
+
+    def unload_beyond(self, x: float, y: float, distance: float) -> int:
+        """Unload every loaded lazy galaxy centered farther than `distance` from (x, y); returns how many."""
+        count = 0
+        for galaxy in self.galaxies:
+            if isinstance(galaxy, LazyGalaxy) and galaxy.loaded and math.hypot(galaxy.pos[0] - x, galaxy.pos[1] - y) > distance:
+                self.unload(galaxy)
+                count += 1
+        return count
+
+    def set_time(self, t: float) -> None:
+        """
+        Move the simulation clock. No positions are computed until needed,
+        except for integrated bodies, which are integrated towards t. They
+        take at most step_budget steps per call, so a big jump never blocks:
+        they fall behind (see lag) and catch up on later calls.
+        """
+        self.time = t
+        with PROFILER.scope("simulate"):
+            if self.gravity is not None:
+                self.gravity.advance(t, max_steps=self.step_budget)
+                self.gravity.write_back()
+                self._moved(self._dynamic.values())
+            if self.hybrid.time != t:
+                self.hybrid.advance(t, max_steps=self.step_budget)
+                self._moved(self._free_systems())
+                self._apply_handoffs()
+
+    @property
+    def lag(self) -> float:
+        """How far integrated bodies are behind the clock, after set_time ran out of step budget."""
+        lag = abs(self.time - self.hybrid.time)
+        if self.gravity is not None:
+            lag = max(lag, abs(self.time - self.gravity.time))
+        return lag
+
+    def track(self, systems: Iterable[SolarSystem]) -> None:
+        """
+        Simulate the non-rails bodies of these systems from now on.
+
+        Bodies in SimulationMode.DYNAMIC are released from their orbits,
+        AUTO bodies are handed between rails and integration as needed.
+        """
+        self.hybrid.advance(self.time)
+        for system in systems:
+            self.hybrid.track(system)
+        self._apply_handoffs()
+
+    def release(self, body: CelestialBody, system: SolarSystem) -> None:
+        """Take a body of a system off its rails now, e.g. debris knocked loose."""
+        self.hybrid.advance(self.time)
+        self.hybrid.release(body, system)
+        self.hybrid.write_back()
+        self._apply_handoffs()
+
+    def _apply_handoffs(self) -> None:
+        for system in self.hybrid.take_changed():
+            self.galaxy_of(system).invalidate()
+            # Positions of the changed rows come from the rebuilt engine next time
+            system.last_evaluated = None
+            self._index = None
+
+    def _free_systems(self) -> List[SolarSystem]:
+        """Systems with bodies integrated by the hybrid simulation."""
+        return list({id(system): system for system in self.hybrid.owners}.values())
+
+    def _moved(self, systems: Iterable[SolarSystem]) -> None:
+        """Bodies of these systems moved off the rails: their bounds no longer hold."""
+        for system in systems:
+            system.invalidate()
+            self.galaxy_of(system).invalidate_bounds()
+            self._index = None
+
+    def enable_gravity(self, systems: Iterable[SolarSystem], **kwargs) -> GravitySimulation:
+        """
+        Integrate the given systems with mutual gravity from now on.
+
+        The simulation is seeded from their orbits at the current time;
+        keyword arguments go to GravitySimulation. Replaces any previous
+        gravity simulation.
+        """
+        self.disable_gravity()
+        systems = list(systems)
+        self.gravity = GravitySimulation.from_systems(systems, self.time, **kwargs)
+        self.gravity.write_back()
+        self._dynamic = {id(system): system for system in systems}
+        for system in systems:
+            system.last_evaluated = self.time
+            system.dynamic = True
+        self._moved(systems)
+        return self.gravity
+
+    def disable_gravity(self) -> None:
+        """Put every simulated system back on its rails."""
+        for system in self._dynamic.values():
+            system.last_evaluated = None
+            system.dynamic = False
+        self._moved(self._dynamic.values())
+        self._dynamic = {}
+        self.gravity = None
+
+    def galaxies_in(self, bounds: Bounds) -> List[Galaxy]:
+        """Galaxies whose bounding circle overlaps a world-space rectangle."""
+        return self.galaxy_index().query(bounds)
+
+    def systems_in(self, bounds: Bounds) -> List[SolarSystem]:
+        """Systems whose bounding circle overlaps a world-space rectangle."""
+        systems: List[SolarSystem] = []
+        for galaxy in self.galaxies_in(bounds):
+            systems.extend(galaxy.system_index().query(bounds))
+        return systems
+
+    def pick(self, x: float, y: float) -> Optional[SolarSystem]:
+        """The system whose center is closest to a world point, among those whose bounds contain it."""
+        best, best_dist = None, math.inf
+        for galaxy in self.galaxy_index().query_point(x, y):
+            for system in galaxy.system_index().query_point(x, y):
+                sx, sy = system.center.pos
+                dist = (sx - x) ** 2 + (sy - y) ** 2
+                if dist < best_dist:
+                    best, best_dist = system, dist
+        return best
+
+    def evaluate(self, systems: Iterable[SolarSystem]) -> None:
+        """Bring the given systems' body positions up to the current time."""
+        t = self.time
+        stale: Dict[int, Tuple[Galaxy, List[SolarSystem]]] = {}
+        for system in systems:
+            # Systems under gravity are kept up to date by set_time
+            if system.last_evaluated != t and id(system) not in self._dynamic:
+                galaxy = self.galaxy_of(system)
+                stale.setdefault(id(galaxy), (galaxy, []))[1].append(system)
+
+        # Free bodies count where they are relative to their parents, which just moved
+        free = {id(system) for system in self.hybrid.owners}
+        # One batched engine update per galaxy with stale systems
+        with PROFILER.scope("update"):
+            for galaxy, group in stale.values():
+                engine = galaxy.orbit_engine()
+                indices = [engine.system_index(system) for system in group]
+                engine.update(t, indices)
+                rows = engine.rows_for(indices)
+                engine.write_back(rows)
+                PROFILER.count("updated", len(rows))
+                for system in group:
+                    system.last_evaluated = t
+                    if id(system) in free:
+                        system.invalidate()
+
+    def update_visible(self, bounds: Bounds) -> None:
+        """Evaluate every system overlapping the given world-space rectangle."""
+        self.evaluate(self.systems_in(bounds))
+
+    def query(self, system: SolarSystem) -> SolarSystem:
+        """Return a system with its positions evaluated at the current time."""
+        self.evaluate((system,))
+        return system
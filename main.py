@@ -1,74 +1,178 @@
-import time
-import msvcrt
+import argparse
+import asyncio
+import contextlib
+import copy
+import sys
 
+from engine.async_loop import AsyncRunLoop
 from engine.generator import UniverseGenerator
+from engine.input import DOWN, LEFT, RIGHT, UP, NoInput, default_input
+from engine.profiling import PROFILER
 from engine.renderer.ascii_renderer import AsciiRenderer
+from engine.renderer.output import FileSink, NullSink, TtySink
 from engine.camera import Camera
+from engine.runloop import RunLoop
+from engine.snapshot import load_universe, save_universe
+from engine.timewarp import TimeWarp
 
-DELTA_TIME = 0.1 # Simulation delta (how far things move each frame)
-SLEEP = 0.05  # FPS Control (how often screen updates)
+DELTA_TIME = 0.1 # Simulation delta (how far things move each step)
+STEP_TIME = 0.05  # Wall time per simulation step (how often the screen updates)
+MAX_STEPS = 5  # Steps run per frame at most when catching up
 PAN_STEP = 2.0
 ZOOM_IN_FACTOR = 1.1
 ZOOM_OUT_FACTOR = 0.9
 MAX_ZOOM = 100.0 # Increased max zoom
 MIN_ZOOM = 0.01  # Decreased min zoom
 
-def main():
-    # Generate universe
-    generator = UniverseGenerator(seed=1)
-    universe = generator.generate_universe(num_galaxies=2)
-    
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Explore a procedurally generated ASCII universe.")
+    parser.add_argument("--headless", action="store_true", help="no keyboard input, discard frames and run as fast as possible")
+    parser.add_argument("--frames", type=int, help="stop after this many simulation steps")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="run input, simulation and output as concurrent tasks")
+    parser.add_argument("--workers", type=int, default=0, help="draw bodies in this many processes, in horizontal tiles")
+    parser.add_argument("--output", help="record frames to this file instead of the terminal")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--gravity", action="store_true", help="integrate the starting system with mutual gravity instead of on rails")
+    parser.add_argument("--orbits", action="store_true", help="draw orbit trails (toggle with o)")
+    parser.add_argument("--profile", action="store_true", help="time every frame and show the timings on the status line (toggle with p)")
+    parser.add_argument("--trace", help="write a Chrome trace of every frame to this file on exit")
+    parser.add_argument("--load", help="open a universe snapshot instead of generating one")
+    parser.add_argument("--save", help="write the universe to a snapshot before starting")
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=40)
+    args = parser.parse_args(argv)
+    if args.use_async and args.headless:
+        # The async loop paces itself on wall time and drops frames, which headless runs must not
+        parser.error("--async cannot be combined with --headless")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.load:
+        universe = load_universe(args.load)
+    else:
+        # Generate universe
+        generator = UniverseGenerator(seed=args.seed)
+        universe = generator.generate_universe(num_galaxies=2)
+    if args.save:
+        save_universe(universe, args.save)
+
     # Focus on the first system of the first galaxy
     start_system = universe.galaxies[0].systems[0]
     start_pos = start_system.center.pos
+    if args.gravity:
+        universe.enable_gravity([start_system])
+
+    # Terminal state is restored however far setup got, in reverse order of creation
+    with contextlib.ExitStack() as cleanup:
+        if args.trace:
+            cleanup.callback(PROFILER.dump_trace, args.trace)
+        if args.output:
+            sink = FileSink(args.output)
+        elif args.headless:
+            sink = NullSink()
+        else:
+            sink = TtySink(args.height)
+        cleanup.callback(sink.close)
+        source = NoInput() if args.headless else default_input()
+        cleanup.callback(source.close)
+
+        camera = Camera(center=start_pos, zoom=0.5, max_zoom=MAX_ZOOM, min_zoom=MIN_ZOOM)
+        renderer = AsciiRenderer(width=args.width, height=args.height, camera=camera, stream=sink, workers=args.workers, show_orbits=args.orbits, show_profile=args.profile)
+        cleanup.callback(renderer.close)
+
+        clock = TimeWarp(time=universe.time)
+        if args.profile or args.trace:
+            PROFILER.enable(trace=bool(args.trace))
 
-    camera = Camera(center=start_pos, zoom=0.5, max_zoom=MAX_ZOOM, min_zoom=MIN_ZOOM)
-    renderer = AsciiRenderer(width=100, height=40, camera=camera)
-
-    t = 0.0
-    time_scale = 1.0
-    paused = False
-
-    renderer.hide_cursor()
-    try:
-        while True:
-            while msvcrt.kbhit():
-                key = msvcrt.getch()
-                if key == b"\xe0":
-                    key = msvcrt.getch()
-                    if key == b"H":  # Arrow up
-                        camera.pan(0, -PAN_STEP / camera.zoom)
-                    elif key == b"P":  # Arrow down
-                        camera.pan(0, PAN_STEP / camera.zoom)
-                    elif key == b"K":  # Arrow left
-                        camera.pan(-PAN_STEP / camera.zoom, 0)
-                    elif key == b"M":  # Arrow right
-                        camera.pan(PAN_STEP / camera.zoom, 0)
-                elif key in (b"+", b"="):
-                    camera.zoom_by(ZOOM_IN_FACTOR)
-                elif key == b"-":
-                    camera.zoom_by(ZOOM_OUT_FACTOR)
-                elif key == b" ":
-                    paused = not paused
-                elif key == b"]":
-                    time_scale *= 2.0
-                elif key == b"[":
-                    time_scale /= 2.0
-                elif key == b"q":
-                    return
-
-            if not paused:
-                # Update all galaxies/systems
-                for galaxy in universe.galaxies:
-                    for system in galaxy.systems:
-                        system.update(t)
-                t += DELTA_TIME * time_scale
+        def on_key(key):
+            if key == UP:
+                camera.pan(0, -PAN_STEP / camera.zoom)
+            elif key == DOWN:
+                camera.pan(0, PAN_STEP / camera.zoom)
+            elif key == LEFT:
+                camera.pan(-PAN_STEP / camera.zoom, 0)
+            elif key == RIGHT:
+                camera.pan(PAN_STEP / camera.zoom, 0)
+            elif key in ("+", "="):
+                camera.zoom_by(ZOOM_IN_FACTOR)
+            elif key == "-":
+                camera.zoom_by(ZOOM_OUT_FACTOR)
+            elif key == " ":
+                clock.toggle_pause()
+            elif key == "]":
+                clock.faster()
+            elif key == "[":
+                clock.slower()
+            elif key == "o":
+                renderer.show_orbits = not renderer.show_orbits
+            elif key == "p":
+                renderer.show_profile = not renderer.show_profile
+                if renderer.show_profile:
+                    PROFILER.enable()
+                elif not args.trace:
+                    # Nothing shows the timings any more, stop paying for them
+                    PROFILER.disable()
+            elif key == "q":
+                loop.stop()
 
+        def step():
+            clock.advance(DELTA_TIME)
             camera.update(DELTA_TIME)
-            renderer.render(universe, status=f"Time: {t:.2f}s | Scale: {time_scale:.1f}x | Pos: {camera.center}")
-            time.sleep(SLEEP)
-    finally:
-        renderer.show_cursor()
+
+        def capture():
+            # Everything a frame needs, so drawing never sees later changes
+            return clock.time, clock.warp, copy.copy(camera)
+
+        def render_state(state):
+            frame_t, frame_warp, frame_camera = state
+            renderer.camera = frame_camera
+            with PROFILER.frame():
+                # Rails bodies jump straight to frame_t, positions are computed on demand
+                # for the systems the renderer draws; integrated bodies are substepped
+                universe.set_time(frame_t)
+                status = f"Time: {frame_t:.2f}s | Warp: {frame_warp:g}x | Pos: {frame_camera.center} | Out: {renderer.output.bytes_written}B | Skip: {loop.stats.skipped_frames}"
+                if universe.lag:
+                    # Integration ran out of steps this frame and is catching up
+                    status += f" | Lag: {universe.lag:.1f}s"
+                renderer.render(universe, status=status)
+
+        if args.use_async:
+            # Slow terminal writes drop frames instead of holding back input and simulation
+            loop = AsyncRunLoop(
+                step,
+                capture,
+                render_state,
+                source=source,
+                on_key=on_key,
+                step_time=STEP_TIME,
+                max_steps=MAX_STEPS,
+            )
+        else:
+            loop = RunLoop(
+                step,
+                lambda: render_state(capture()),
+                source=source,
+                on_key=on_key,
+                step_time=STEP_TIME,
+                max_steps=MAX_STEPS,
+                realtime=not args.headless,
+            )
+
+        if isinstance(loop, AsyncRunLoop):
+            stats = asyncio.run(loop.run(steps=args.frames))
+        else:
+            stats = loop.run(steps=args.frames)
+
+    if args.headless:
+        rate = stats.frames / stats.elapsed if stats.elapsed else 0.0
+        print(f"{stats.steps} steps, {stats.frames} frames in {stats.elapsed:.2f}s ({rate:.1f} frames/s)", file=sys.stderr)
+        if universe.gravity is not None:
+            print(f"Energy drift: {universe.gravity.energy_drift():+.2e}", file=sys.stderr)
+        if PROFILER.enabled:
+            for name, times in PROFILER.report().items():
+                print(f"{name}: " + " ".join(f"{key} {ms:.2f}ms" for key, ms in times.items()), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,49 @@
 import sys
 import os
+import io
+import math
+import tempfile
+import time
+import asyncio
+import json
+import random
+import subprocess
+import dataclasses
+from collections import OrderedDict
+from decimal import Decimal, getcontext
+
+import numpy as np
 
 # Add current directory to path
 sys.path.append(os.getcwd())
 
 from engine.generator import UniverseGenerator
+from engine.packing import pack_systems, unpack_systems
+from engine.snapshot import load_universe, save_universe
 from engine.renderer.ascii_renderer import AsciiRenderer
 from engine.camera import Camera
+from engine.orbit_engine import OrbitEngine
+from engine.kepler import solve_kepler, solve_kepler_array
+from engine.physics import MAX_FRAME_STEPS, GravitySimulation, Orbit, QuadTree, SimulationMode, direct_accelerations
+from engine.hybrid import rails_velocity, sphere_of_influence
+from engine.body.base import BodyType
+from engine.body.planet import Planet
+from engine.spatial import circle_intersects
+from engine.renderer.sprite_cache import SPRITE_CACHE, Sprite, SpriteCache
+from engine.renderer.base_renderer import get_renderer
+from engine.renderer.canvas import Canvas
+from engine.renderer.parallel import BODY, DisplayList, execute
+from engine.body.planet import PlanetType, planet_appearance
+from engine.renderer.lod import (
+    GALAXY_GLYPH_MAX_RADIUS, LOD, ORBIT_DOT, ORBIT_DOTS_MAX_RADIUS, STAR_GLYPH_MAX_RADIUS, galaxy_lod, smeared, system_lod,
+)
+from engine.renderer.orbit_paths import MAX_CACHED_RADIUS, ORBIT_PATHS, TRAIL_GLYPH, projected_radius, rasterize
+from engine.timewarp import MAX_WARP, TimeWarp
+from engine.profiling import _NULL_SCOPE, PROFILER
+from engine.renderer.output import NullSink
+from engine.input import ScriptedInput
+from engine.runloop import RunLoop
+from engine.async_loop import AsyncRunLoop
 
 def test_universe_generation():
     print("Testing Universe Generation...")
@@ -44,14 +81,709 @@ def test_physics_update(universe):
     assert start_pos != end_pos
     print("Physics update successful (position changed)")
 
+def test_orbit_engine(universe):
+    print("\nTesting Orbit Engine...")
+    engine = OrbitEngine.from_universe(universe)
+
+    for t in (0.0, 12.5, 1000.0):
+        # Scalar reference path
+        for galaxy in universe.galaxies:
+            for system in galaxy.systems:
+                system.update(t)
+        expected = [body.pos for body in engine.bodies]
+
+        engine.update(t)
+        for body, (ex, ey) in zip(engine.bodies, expected):
+            x, y = engine.position_of(body)
+            assert abs(x - ex) < 1e-9 and abs(y - ey) < 1e-9, f"{body.name} mismatch at t={t}"
+
+    print(f"Orbit engine matches scalar path for {len(engine)} bodies")
+
+def test_lazy_evaluation():
+    print("\nTesting Lazy Evaluation...")
+    universe = UniverseGenerator(seed=7).generate_universe(num_galaxies=2)
+    target = universe.galaxies[1].systems[2]
+    cx, cy = target.center.pos
+
+    universe.set_time(42.0)
+    universe.update_visible((cx - 1, cy - 1, cx + 1, cy + 1))
+    assert target.last_evaluated == 42.0
+
+    evaluated = sum(1 for g in universe.galaxies for s in g.systems if s.last_evaluated is not None)
+    print(f"Evaluated {evaluated} of {sum(len(g.systems) for g in universe.galaxies)} systems")
+
+    # Explicit queries evaluate off-screen systems on demand
+    other = next(s for g in universe.galaxies for s in g.systems if s.last_evaluated is None)
+    universe.query(other)
+    assert other.last_evaluated == 42.0
+
+    lazy = [body.pos for body in target.center.children]
+    target.update(42.0)
+    for (x, y), body in zip(lazy, target.center.children):
+        assert abs(x - body.pos[0]) < 1e-9 and abs(y - body.pos[1]) < 1e-9
+    print("Lazy evaluation matches scalar path")
+
+def test_spatial_index():
+    print("\nTesting Spatial Index...")
+    universe = UniverseGenerator(seed=11).generate_universe(num_galaxies=8)
+    everything = [s for g in universe.galaxies for s in g.systems]
+
+    for cx, cy, half in ((0, 0, 50), (300, -200, 10), (-800, 900, 400), (0, 0, 5000)):
+        bounds = (cx - half, cy - half, cx + half, cy + half)
+        expected = [s for s in everything if circle_intersects(bounds, s.center.pos, s.bounding_radius)]
+        assert universe.systems_in(bounds) == expected
+
+    target = everything[5]
+    assert universe.pick(*target.center.pos) is target
+    print(f"Spatial index agrees with brute force over {len(everything)} systems")
+
+def _replay(screen, data):
+    # Minimal terminal: handles cursor positioning escapes, newlines and text
+    text = data.decode("utf-8")
+    x = y = 0
+    i = 0
+    while i < len(text):
+        if text[i] == "\033":
+            end = text.index("H", i)
+            args = text[i + 2:end]
+            y, x = (int(a) - 1 for a in args.split(";")) if args else (0, 0)
+            i = end + 1
+        elif text[i] == "\n":
+            x, y = 0, y + 1
+            i += 1
+        else:
+            screen[y][x] = text[i]
+            x += 1
+            i += 1
+
+def test_diff_output(universe):
+    print("\nTesting Differential Output...")
+    stream = io.BytesIO()
+    system = universe.galaxies[0].systems[0]
+    camera = Camera(center=system.center.pos, zoom=0.5)
+    renderer = AsciiRenderer(width=60, height=20, camera=camera, stream=stream)
+    screen = [[" "] * 60 for _ in range(20)]
+
+    sizes = []
+    for frame in range(30):
+        universe.set_time(frame * 5.0)
+        stream.seek(0)
+        stream.truncate()
+        renderer.render(universe, status=f"Frame {frame}")
+        _replay(screen, stream.getvalue())
+        assert ["".join(row) for row in screen] == renderer.canvas.rows()
+        sizes.append(renderer.output.bytes_written)
+
+    print(f"Full frame: {sizes[0]} bytes, later frames: {min(sizes[1:])}-{max(sizes[1:])} bytes")
+
+def test_run_loop(universe):
+    print("\nTesting Run Loop...")
+    # Simulated wall clock: every step takes 10ms, every frame 120ms
+    now = [0.0]
+    sleeps = []
+    def step():
+        now[0] += 0.01
+    def render():
+        now[0] += 0.12
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    loop = RunLoop(step, render, step_time=0.05, max_steps=5, clock=lambda: now[0], sleep=sleep)
+    stats = loop.run(steps=60)
+    # Rendering is slower than the step rate, so steps run in batches and
+    # the simulation keeps pace with the clock instead of slowing down
+    assert stats.steps == 60 and stats.frames < 30 and stats.skipped_frames == 60 - stats.frames
+    assert stats.elapsed < 60 * 0.05 * 1.1, stats
+    assert all(s > 0 for s in sleeps)
+
+    # Headless: one frame per step, no sleeping, input from a script
+    system = universe.galaxies[0].systems[0]
+    camera = Camera(center=system.center.pos, zoom=0.5)
+    renderer = AsciiRenderer(width=40, height=12, camera=camera, stream=NullSink())
+    keys = []
+    loop = RunLoop(
+        lambda: None,
+        lambda: renderer.render(universe),
+        source=ScriptedInput({3: ["+", "up"], 7: "q"}),
+        on_key=lambda key: keys.append(key) or (key == "q" and loop.stop()),
+        realtime=False,
+        sleep=sleep,
+    )
+    stats = loop.run()
+    assert keys == ["+", "up", "q"] and stats.steps == stats.frames == 7
+    print(f"Run loop: {stats}")
+
+def test_async_loop(universe):
+    print("\nTesting Async Loop...")
+    system = universe.galaxies[0].systems[0]
+    camera = Camera(center=system.center.pos, zoom=0.5)
+
+    class SlowSink(io.BytesIO):
+        # A terminal taking 50ms per frame
+        def write(self, data):
+            time.sleep(0.05)
+            return super().write(data)
+
+    renderer = AsciiRenderer(width=40, height=12, camera=camera, stream=SlowSink())
+    clock = [0.0]
+    keys = []
+
+    def step():
+        clock[0] += 0.1
+
+    def render(t):
+        universe.set_time(t)
+        renderer.render(universe, status=f"{t:.1f}")
+
+    loop = AsyncRunLoop(
+        step,
+        lambda: clock[0],
+        render,
+        source=ScriptedInput({i: "+" for i in range(0, 40, 4)}),
+        on_key=keys.append,
+        step_time=0.005,
+    )
+    start = time.perf_counter()
+    stats = asyncio.run(loop.run(steps=60))
+    elapsed = time.perf_counter() - start
+
+    # The simulation keeps its own pace; the slow sink only gets some of the frames
+    assert stats.steps == 60, stats
+    assert stats.frames < stats.steps and stats.frames + stats.skipped_frames == stats.steps, stats
+    assert elapsed < 60 * 0.005 + 0.5, elapsed
+    # The final state is always drawn, keys keep being handled during slow writes
+    assert renderer.canvas.rows()[-1].startswith(f"{clock[0]:.1f}")
+    assert len(keys) >= 5, keys
+    print(f"Async loop: {stats}")
+
+def test_parallel_render(universe):
+    print("\nTesting Parallel Render...")
+    system = universe.galaxies[0].systems[0]
+    serial = AsciiRenderer(width=90, height=30, camera=Camera(center=system.center.pos, zoom=1.0, max_zoom=100), stream=io.BytesIO())
+    tiled = AsciiRenderer(width=90, height=30, camera=Camera(center=system.center.pos, zoom=1.0, max_zoom=100), stream=io.BytesIO(), workers=2)
+    try:
+        for frame, zoom in enumerate((0.05, 0.5, 2.0, 6.0, 6.0, 25.0)):
+            universe.set_time(frame * 7.0)
+            for renderer in (serial, tiled):
+                renderer.camera.zoom = zoom
+                renderer.render(universe, status=f"Frame {frame}")
+            assert serial.canvas.rows() == tiled.canvas.rows(), f"tiles differ at zoom {zoom}"
+    finally:
+        tiled.close()
+
+    # Workers keep body copies across frames, evicted like sprites, and only while they still match
+    copies = OrderedDict()
+    display = DisplayList(30)
+    planet = next(body for body in system.center.children if body.type is BodyType.PLANET)
+    display.draw(planet, 10, 10, 3)
+    execute(display.ops, Canvas(90, 30), serial.camera, copies)
+    first = copies[display.ops[0][1]][0]
+    planet.pos = (planet.pos[0] + 1.0, planet.pos[1])
+    execute(display.ops, Canvas(90, 30), serial.camera, copies)
+    assert copies[display.ops[0][1]][0] is first
+    changed = DisplayList(30)
+    changed.draw(dataclasses.replace(planet, radius=planet.radius * 2), 10, 10, 3)
+    # Another body under the same key, as if its id was recycled
+    execute([(BODY, display.ops[0][1], *changed.ops[0][2:])], Canvas(90, 30), serial.camera, copies)
+    assert copies[display.ops[0][1]][0] is not first
+    # A planet built by hand gets its appearance in the worker, its fresh copies still match
+    drawn = Planet("Hand-Built", 0.01, 2.0)
+    for frame in range(3):
+        drawn.pos = (float(frame), 0.0)
+        display = DisplayList(30)
+        display.draw(drawn, 10, 10, 3)
+        if frame == 1:
+            kept, misses = copies[display.ops[0][1]][0], SPRITE_CACHE.misses
+        execute(display.ops, Canvas(90, 30), serial.camera, copies)
+    assert copies[display.ops[0][1]][0] is kept and SPRITE_CACHE.misses == misses
+    # Copies used this frame stay past the bound, the next frame trims the rest
+    many = [(BODY, (i, "copy"), first, 10, 10) for i in range(SPRITE_CACHE.capacity + 10)]
+    execute(many, Canvas(90, 30), serial.camera, copies)
+    assert len(copies) > SPRITE_CACHE.capacity + 10
+    SPRITE_CACHE.begin_frame()
+    execute(many[:1], Canvas(90, 30), serial.camera, copies)
+    execute([(BODY, (-1, "copy"), first, 10, 10)], Canvas(90, 30), serial.camera, copies)
+    assert len(copies) == SPRITE_CACHE.capacity and (0, "copy") in copies
+    print("Tiled render matches serial")
+
+def _decimal_sin(x):
+    # Taylor series, accurate to the current decimal context
+    getcontext().prec += 2
+    term, total, i = x, x, 1
+    while True:
+        term = -term * x * x / ((2 * i) * (2 * i + 1))
+        if total + term == total:
+            break
+        total += term
+        i += 1
+    getcontext().prec -= 2
+    return +total
+
+def _kepler_reference(M, e):
+    # Bisection in floats to bracket the root, then Newton at 40 significant digits
+    lo, hi = M - 1.0, M + 1.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if mid - e * math.sin(mid) < M:
+            lo = mid
+        else:
+            hi = mid
+    getcontext().prec = 40
+    E, dM, de = Decimal(lo), Decimal(M), Decimal(e)
+    half_pi = Decimal("1.5707963267948966192313216916397514420985846996875529")
+    for _ in range(4):
+        sin_E = _decimal_sin(E)
+        cos_E = _decimal_sin(half_pi - E)
+        E -= (E - de * sin_E - dM) / (1 - de * cos_E)
+    return float(E)
+
+def test_kepler_accuracy():
+    print("\nTesting Kepler Solver...")
+    worst = 0.0
+    for e in (0.0, 0.05, 0.1, 0.2, 0.5, 0.9, 0.99):
+        for k in range(64):
+            M = -math.pi + 2 * math.pi * k / 64
+            E, sin_E, cos_E = solve_kepler(M, e)
+            ref = _kepler_reference(M, e)
+            worst = max(worst, abs(E - ref), abs(sin_E - math.sin(ref)), abs(cos_E - math.cos(ref)))
+
+            E_vec, _, _ = solve_kepler_array(np.array([M]), np.array([e]))
+            worst = max(worst, abs(float(E_vec[0]) - ref))
+
+    assert worst < 1e-10, f"Kepler solver error {worst}"
+    print(f"Kepler solver max error vs reference: {worst:.2e}")
+
+def test_streaming_generation():
+    print("\nTesting Streaming Generation...")
+    generator = UniverseGenerator(seed=5)
+    universe = generator.generate_universe(num_galaxies=4, num_systems=3, lazy=True)
+    assert not any(g.loaded for g in universe.galaxies)
+
+    # Regions generated out of order, or by another generator, come out identical
+    galaxy = universe.galaxies[2]
+    again = UniverseGenerator(seed=5).galaxy_at(2, num_systems=3)
+    assert galaxy.pos == again.pos
+    positions = [[b.pos for b in s.center.children] for s in galaxy.systems]
+    assert positions == [[b.pos for b in s.center.children] for s in again.systems]
+    assert all(
+        math.hypot(s.center.pos[0] - galaxy.pos[0], s.center.pos[1] - galaxy.pos[1]) + s.bounding_radius <= galaxy.bounding_radius
+        for s in galaxy.systems
+    )
+
+    # Unloaded galaxies regenerate the same systems when next needed
+    names = [s.name for s in galaxy.systems]
+    assert universe.unload_beyond(*universe.galaxies[0].pos, 0) >= 1 and not galaxy.loaded
+    assert [s.name for s in galaxy.systems] == names
+    assert [[b.pos for b in s.center.children] for s in galaxy.systems] == positions
+
+    first = next(generator.iter_galaxies(num_systems=3, start=2))
+    assert first.pos == galaxy.pos and not first.loaded
+    print(f"Streaming generation is deterministic across {len(universe.galaxies)} galaxies")
+
+def _body_state(body):
+    return (type(body), body.name, body.mass, body.radius, body.type, getattr(body, "planet_type", None),
+            getattr(body, "appearance", None), body.pos, body.orbit, [_body_state(child) for child in body.children])
+
+def test_parallel_generation():
+    print("\nTesting Parallel Generation...")
+    serial = UniverseGenerator(seed=9).generate_universe(num_galaxies=3, num_systems=300, lazy=True)
+    parallel = UniverseGenerator(seed=9).generate_universe(num_galaxies=3, num_systems=300, workers=2)
+
+    for expected, galaxy in zip(serial.galaxies, parallel.galaxies):
+        assert (galaxy.name, galaxy.pos) == (expected.name, expected.pos)
+        assert [s.name for s in galaxy.systems] == [s.name for s in expected.systems]
+        assert [_body_state(s.center) for s in galaxy.systems] == [_body_state(s.center) for s in expected.systems]
+
+    systems = serial.galaxies[0].systems
+    assert [_body_state(s.center) for s in unpack_systems(pack_systems(systems))] == [_body_state(s.center) for s in systems]
+    print(f"Parallel generation matches serial over {sum(len(g.systems) for g in parallel.galaxies)} systems")
+
+def test_snapshot():
+    print("\nTesting Snapshot...")
+    universe = UniverseGenerator(seed=13).generate_universe(num_galaxies=3, num_systems=20)
+    universe.set_time(4.5)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "universe.snap")
+        save_universe(universe, path)
+        loaded = load_universe(path)
+
+        assert loaded.time == universe.time and not any(g.loaded for g in loaded.galaxies)
+        for expected, galaxy in zip(universe.galaxies, loaded.galaxies):
+            assert (galaxy.name, galaxy.pos, galaxy.system_count) == (expected.name, expected.pos, len(expected.systems))
+            assert galaxy.bounding_radius == expected.bounding_radius
+
+        # Culling reads only the galaxy table, the queried region is unpacked from the mapping
+        target = universe.galaxies[1].systems[4]
+        x, y = target.center.pos
+        bounds = (x - 1, y - 1, x + 1, y + 1)
+        assert [s.name for s in loaded.systems_in(bounds)] == [s.name for s in universe.systems_in(bounds)]
+        picked = loaded.query(loaded.pick(x, y))
+        assert _body_state(picked.center) == _body_state(universe.query(target).center)
+        print(f"Snapshot of {os.path.getsize(path)} bytes, {sum(g.loaded for g in loaded.galaxies)} of {len(loaded.galaxies)} galaxies loaded by a query")
+        del picked, loaded
+
+def test_gravity():
+    print("\nTesting Gravity...")
+    rng = np.random.default_rng(3)
+    positions = rng.normal(size=(300, 2)) * 100
+    masses = rng.uniform(0.1, 10, 300)
+    radii = rng.uniform(0, 2, 300)
+    exact = direct_accelerations(positions, masses, softening=radii)
+    # Opening every node makes Barnes-Hut exact
+    assert np.allclose(QuadTree(positions, masses).accelerations(positions, theta=0.0, softening=radii), exact, rtol=1e-9, atol=1e-12)
+
+    orbit = Orbit(50, 0.15, 0, 0.4, 1.0, math.sqrt(50**3))
+    h = 1e-6
+    (x0, y0), (x1, y1) = orbit.get_position(3 - h), orbit.get_position(3 + h)
+    vx, vy = orbit.velocity(3)
+    assert abs(vx - (x1 - x0) / (2 * h)) < 1e-6 and abs(vy - (y1 - y0) / (2 * h)) < 1e-6
+
+    universe = UniverseGenerator(seed=1).generate_universe(num_galaxies=1, num_systems=2)
+    system = universe.galaxies[0].systems[0]
+    simulation = universe.enable_gravity([system])
+    universe.set_time(20.0)
+    universe.update_visible((-5000, -5000, 5000, 5000))
+    drift = simulation.energy_drift()
+    assert abs(drift) < 1e-4 and system.center.children[0].pos == tuple(simulation.positions[1])
+    # Other systems stay on their rails
+    other = universe.galaxies[0].systems[1]
+    assert other.last_evaluated == 20.0 and other.center.children[0].velocity == (0.0, 0.0)
+    print(f"{len(simulation)} bodies integrated for {simulation.steps} steps, energy drift {drift:+.1e}")
+
+def test_hybrid():
+    print("\nTesting Hybrid Simulation...")
+    orbit = Orbit.from_state((3.0, 1.0), (-0.2, -1.1), 2.0, 7.5)
+    assert orbit.inclination == math.pi
+    assert np.allclose(orbit.get_position(7.5), (3.0, 1.0)) and np.allclose(orbit.velocity(7.5), (-0.2, -1.1))
+
+    universe = UniverseGenerator(seed=4).generate_universe(num_galaxies=1, num_systems=2, num_planets=3)
+    system = universe.galaxies[0].systems[0]
+    planet = max(system.center.children, key=lambda body: body.mass)
+    universe.query(system)
+    soi = sphere_of_influence(planet)
+    pvx, pvy = rails_velocity(planet, 0.0)
+    speed = math.sqrt(planet.mass / (0.3 * soi))
+
+    # Circling the planet well inside its sphere of influence, and leaving it
+    bound = Planet("Debris-0", 0.001, 0.05, type=BodyType.DEBRIS, pos=(planet.pos[0] + 0.3 * soi, planet.pos[1]), velocity=(pvx, pvy + speed))
+    loose = Planet("Debris-1", 0.001, 0.05, type=BodyType.DEBRIS, pos=(planet.pos[0] - 0.3 * soi, planet.pos[1]), velocity=(pvx, pvy - 3 * speed))
+    planet.add_child(bound)
+    planet.add_child(loose)
+    assert bound.mode is SimulationMode.AUTO and planet.mode is SimulationMode.RAILS
+    universe.track([system])
+    assert len(universe.hybrid) == 2
+
+    universe.set_time(20.0)
+    universe.query(system)
+    # Bound debris went back on rails around the planet, the loose one around the star
+    assert bound.orbit is not None and bound.parent is planet
+    assert loose.orbit is not None and loose.parent is system.center
+    x, y = bound.orbit.get_position(20.0)
+    assert math.dist(bound.pos, (planet.pos[0] + x, planet.pos[1] + y)) < 1e-9
+    assert abs(math.dist(bound.pos, planet.pos) - 0.3 * soi) < 0.01 * soi
+
+    # Debris joining a tracked system after its attractors were built
+    period = 2 * math.pi * math.sqrt((0.2 * soi) ** 3 / planet.mass)
+    for i in (2, 3):
+        planet.add_child(Planet(f"Debris-{i}", 0.001, 0.05, type=BodyType.DEBRIS, orbit=Orbit(0.2 * soi, 0.1, 0, 0.0, 0.0, period)))
+        universe.track([system])
+        universe.set_time(universe.time + 0.1)
+    universe.query(system)
+    assert planet.children[-1].parent is planet and math.dist(planet.children[-1].pos, planet.pos) < soi
+    # Orbits well inside the sphere are never tested for leaving it, only for entering a sibling's
+    attractors = universe.hybrid._attractors_of(system)
+    assert len(attractors.coasting) >= 2 and not len(attractors.escaping) and not attractors.leaving(universe.time)
+    print(f"{universe.hybrid.handoffs} handoffs, {len(universe.hybrid)} bodies still integrated")
+
+def test_time_warp():
+    print("\nTesting Time Warp...")
+    clock = TimeWarp()
+    for _ in range(40):
+        clock.faster()
+    assert clock.warp == MAX_WARP and clock.advance(0.1) == 0.1 * MAX_WARP
+    clock.toggle_pause()
+    assert clock.advance(0.1) == 0.1 * MAX_WARP
+
+    orbit = Orbit(4.0, 0.3, 0, 1.2, 0.0, 10.0)
+    assert np.allclose(orbit.path(8)[0], orbit.get_position(0.0))
+    assert not smeared(orbit, 4.9) and smeared(orbit, 5.1) and smeared(orbit, -5.1)
+
+    # Steps follow the orbits covered, not the span: a wide pair jumps in far fewer steps
+    def pair(distance):
+        speed = math.sqrt(1.001 / distance)
+        return GravitySimulation([(0, 0), (distance, 0)], [(0, 0), (0, speed)], [1.0, 0.001], softening=0.01)
+    tight, wide = pair(1.0), pair(20.0)
+    tight.advance(50.0)
+    wide.advance(50.0)
+    assert wide.steps * 10 < tight.steps and abs(tight.energy_drift()) < 1e-4
+    assert abs(math.hypot(*(tight.positions[1] - tight.positions[0])) - 1.0) < 1e-2
+
+    # A moon lapping its orbit between frames is drawn as the orbit
+    universe = UniverseGenerator(seed=1).generate_universe(num_galaxies=1, num_systems=1)
+    system = universe.galaxies[0].systems[0]
+    camera = Camera(center=system.center.pos, zoom=0.4)
+    renderer = AsciiRenderer(width=80, height=40, camera=camera, stream=NullSink())
+    renderer.render(universe)
+    slow = int((renderer.canvas.buffer == ord(ORBIT_DOT)).sum())
+    universe.set_time(1000.0)
+    renderer.render(universe)
+    fast = int((renderer.canvas.buffer == ord(ORBIT_DOT)).sum())
+    assert fast > slow
+    # Integrated bodies keep their starting orbit, but are drawn where they are
+    universe.enable_gravity([system])
+    renderer.render(universe)
+    universe.set_time(2000.0)
+    smears = []
+    renderer._draw_smear = lambda body, canvas: smears.append(body)
+    renderer.render(universe)
+    assert not smears
+
+    # A frame at the highest warp takes a bounded number of steps, integrated bodies lag behind
+    steps = universe.gravity.steps
+    universe.set_time(universe.time + 0.1 * MAX_WARP)
+    assert universe.gravity.steps - steps <= MAX_FRAME_STEPS and universe.lag > 0
+    universe.step_budget = None
+    universe.set_time(universe.time)
+    assert universe.lag == 0
+    print(f"{tight.steps} steps for a tight orbit, {wide.steps} for a wide one; {fast} smeared orbit cells")
+
+def test_orbit_paths():
+    print("\nTesting Orbit Paths...")
+    # Every cell of a rasterized trail is on the ellipse, and consecutive samples leave no gaps
+    orbit = Orbit(30.0, 0.4, 0, 0.7, 0.0, 100.0)
+    cells = rasterize(ORBIT_PATHS.polyline(orbit), 1.0)
+    exact = orbit.path(4096)
+    distance = np.sqrt(((cells[:, None, :] - exact[None, :, :]) ** 2).sum(axis=2)).min(axis=1)
+    assert distance.max() < 1.0
+    assert set(map(tuple, np.rint(exact).astype(int).tolist())) <= set(map(tuple, cells.tolist())) | {
+        (x + dx, y + dy) for x, y in cells.tolist() for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+    }
+
+    universe = UniverseGenerator(seed=1).generate_universe(num_galaxies=1, num_systems=1)
+    system = universe.galaxies[0].systems[0]
+    camera = Camera(center=system.center.pos, zoom=0.4)
+    renderer = AsciiRenderer(width=80, height=40, camera=camera, stream=NullSink(), show_orbits=True)
+    renderer.render(universe)
+    assert (renderer.canvas.buffer == ord(TRAIL_GLYPH)).sum() > 0
+    # Later frames translate the cached rasterizations as the parents move
+    misses = ORBIT_PATHS.misses
+    for t in (1.0, 2.0):
+        universe.set_time(t)
+        renderer.render(universe)
+    assert ORBIT_PATHS.misses == misses and ORBIT_PATHS.hits > 0
+
+    # Bodies sit on their trails at any zoom, not only at round ones
+    planet = max(system.center.children, key=lambda body: body.orbit.semi_major_axis)
+    for cells_radius in (200, 1000):
+        # Halfway between two zooms 1/16 of an octave apart, as trails were once rounded to
+        zoom = 2 ** ((math.floor(math.log2(cells_radius / projected_radius(planet.orbit, 1.0)) * 16) + 0.5) / 16)
+        universe.set_time(3.0 + cells_radius)
+        universe.query(system)
+        renderer.camera = Camera(center=planet.pos, zoom=zoom, max_zoom=100)
+        px, py = renderer.to_screen(*system.center.pos)
+        bx, by = renderer.to_screen(*planet.pos)
+        cells = ORBIT_PATHS.get(planet.orbit, renderer.camera.zoom, (-px, -py, 79 - px, 39 - py)).cells
+        assert np.abs(cells - (bx - px, by - py)).max(axis=1).min() <= 1
+    # Trails too large to cache are rasterized within the viewport only
+    big = Orbit(2 * MAX_CACHED_RADIUS, 0.0, 0, 0.0, 0.0, 100.0)
+    raster = ORBIT_PATHS.get(big, 1.0, (-4100, -40, -4000, 40))
+    x0, y0, x1, y1 = raster.bounds
+    assert len(raster.cells) and x0 > -4200 and x1 < -3900 and y0 > -300 and y1 < 300
+    print(f"Orbit path cache: {ORBIT_PATHS.stats()}")
+
+def test_renderer_registry():
+    print("\nTesting Renderer Registry...")
+    renderer = get_renderer(BodyType.PLANET)
+    assert renderer is get_renderer(BodyType.PLANET) and set(renderer.SHADERS) == set(PlanetType)
+
+    # A batch draws exactly what drawing its bodies one by one does
+    camera = Camera(zoom=2.0)
+    items = [
+        (Planet(f"Batch-{i}", 1.0, 1.0 + i % 3, planet_type=list(PlanetType)[i % 4]), 5 + 9 * i, 4 + (i % 3) * 5)
+        for i in range(8)
+    ]
+    single, batched = Canvas(80, 20), Canvas(80, 20)
+    for body, sx, sy in items:
+        renderer.draw(body, single, sx, sy, 80, 20, camera)
+    renderer.draw_batch(items, batched, 80, 20, camera)
+    assert single.rows() == batched.rows()
+
+    # Bodies without a renderer are skipped rather than failing the frame
+    universe = UniverseGenerator(seed=1).generate_universe(num_galaxies=1, num_systems=1)
+    center = universe.galaxies[0].systems[0].center
+    center.add_child(Planet("Debris-0", 0.001, 0.5, type=BodyType.DEBRIS, pos=center.pos))
+    AsciiRenderer(width=40, height=20, camera=Camera(center=center.pos, zoom=1.0), stream=NullSink()).render(universe)
+    print("Batched drawing matches per-body drawing")
+
+def _planet_rows(seed, planet_type):
+    body = Planet("Look-0", 1.0, 3.0, planet_type=planet_type)
+    if seed is not None:
+        body.appearance = planet_appearance(seed, body.name)
+    return get_renderer(BodyType.PLANET).shade(body, 6).tolist()
+
+def test_planet_appearance():
+    print("\nTesting Planet Appearance...")
+    universe = UniverseGenerator(seed=5).generate_universe(num_galaxies=1, num_systems=2)
+    planets = [body for system in universe.galaxies[0].systems for body in system.center.children]
+    assert all(planet.appearance == planet_appearance(5, planet.name) for planet in planets)
+
+    # Shading reads the stored parameters and leaves the global random stream alone
+    state = random.getstate()
+    looks = {planet_type: _planet_rows(5, planet_type) for planet_type in PlanetType}
+    _planet_rows(None, PlanetType.TERRESTRIAL)
+    assert random.getstate() == state
+
+    # Identical in a fresh process with a different str hash salt
+    script = "import json, verify; print(json.dumps({t.name: verify._planet_rows(5, t) for t in verify.PlanetType}))"
+    env = dict(os.environ, PYTHONHASHSEED="12345")
+    out = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True).stdout
+    assert json.loads(out) == {planet_type.name: rows for planet_type, rows in looks.items()}
+    assert _planet_rows(6, PlanetType.GAS_GIANT) != looks[PlanetType.GAS_GIANT]
+    print(f"{len(planets)} planets with stable looks")
+
+def test_lod():
+    print("\nTesting Level of Detail...")
+    # Collapsed only while the whole galaxy or system fits in the glyph's one cell
+    for zoom in (0.001, 1.0, 50.0):
+        radius = GALAXY_GLYPH_MAX_RADIUS / zoom
+        assert galaxy_lod(zoom, radius * 0.99) is LOD.GALAXY and galaxy_lod(zoom, radius * 1.01) is LOD.FULL
+        radius = STAR_GLYPH_MAX_RADIUS / zoom
+        assert system_lod(zoom, radius * 0.99) is LOD.STAR and system_lod(zoom, radius * 1.01) is LOD.ORBITS
+        radius = ORBIT_DOTS_MAX_RADIUS / zoom
+        assert system_lod(zoom, radius * 0.99) is LOD.ORBITS and system_lod(zoom, radius * 1.01) is LOD.FULL
+    assert GALAXY_GLYPH_MAX_RADIUS <= 1 and STAR_GLYPH_MAX_RADIUS <= 1
+    print("LOD switches at the cell boundaries")
+
+def test_subtree_culling():
+    print("\nTesting Subtree Culling...")
+    universe = UniverseGenerator(seed=1).generate_universe(num_galaxies=1, num_systems=1)
+    system = universe.galaxies[0].systems[0]
+    universe.query(system)
+    planet = max(system.center.children, key=lambda body: len(body.children))
+    extents = system.extents()
+    moon = planet.children[0]
+    assert extents[id(planet)] >= moon.orbit.semi_major_axis * (1 + moon.orbit.eccentricity) + moon.radius
+
+    # Close in on the star: planets are tested, the moons of planets off screen never are
+    camera = Camera(center=system.center.pos, zoom=2.0)
+    renderer = AsciiRenderer(width=40, height=20, camera=camera, stream=NullSink())
+    visited = []
+    smeared = renderer._smeared
+    renderer._smeared = lambda body, system: visited.append(body) or smeared(body, system)
+    renderer.render(universe)
+    assert visited[0] is system.center and all(body.parent is system.center for body in visited[1:])
+
+    # A planet whose center is just off the left edge is drawn clipped instead of vanishing
+    zoom = 4.0
+    radius_px = round(max(planet.radius, 0.5) * zoom)
+    camera = Camera(center=(planet.pos[0] + (20 + radius_px // 2) / zoom, planet.pos[1]), zoom=zoom, max_zoom=100)
+    renderer = AsciiRenderer(width=40, height=20, camera=camera, stream=NullSink())
+    renderer.render(universe)
+    assert renderer.to_screen(*planet.pos)[0] < 0 and (renderer.canvas.cells[:, 0] != ord(" ")).any()
+    assert system.bounding_radius == extents[id(system.center)]
+
+    # A moon added after the extents were cached is drawn, not a KeyError
+    renderer = AsciiRenderer(width=40, height=20, camera=Camera(center=planet.pos, zoom=4.0, max_zoom=100), stream=NullSink())
+    renderer.render(universe)
+    late = Planet("Late-Moon", 0.001, 0.3)
+    planet.add_child(late, Orbit(1.0, 0.0, 0, 0.0, 0.0, 10.0))
+    # Placed by hand, the galaxy's orbit engine only learns about it when invalidated
+    late.pos = (planet.pos[0] + 1.0, planet.pos[1])
+    drawn = []
+    draw_body = renderer._draw_body
+    renderer._draw_body = lambda body, *args: drawn.append(body) or draw_body(body, *args)
+    renderer.render(universe)
+    assert any(body is late for body in drawn) and id(late) in system.extents()
+    planet.children.remove(late)
+
+    # Under gravity, orbits are only where bodies started: moons far past their apoapsis are still drawn
+    universe.enable_gravity([system])
+    # The whole way in one call, moons stray far from their starting orbits over that time
+    universe.step_budget = None
+    universe.set_time(1000.0)
+    moons = [moon for planet in system.center.children for moon in planet.children]
+    strays = [moon for moon in moons if math.dist(moon.pos, moon.parent.pos) > 3 * moon.orbit.semi_major_axis * (1 + moon.orbit.eccentricity)]
+    assert strays
+    for moon in strays:
+        renderer = AsciiRenderer(width=40, height=20, camera=Camera(center=moon.pos, zoom=4.0, max_zoom=100), stream=NullSink())
+        drawn = []
+        draw_body = renderer._draw_body
+        renderer._draw_body = lambda body, *args: drawn.append(body) or draw_body(body, *args)
+        renderer.render(universe)
+        assert any(body is moon for body in drawn), moon.name
+    print(f"Visited {len(visited)} of {len(system.extents())} bodies, drew a planet of radius {radius_px} cells across the edge, {len(strays)} strayed moons under gravity")
+
+def test_profiling():
+    print("\nTesting Profiling...")
+    # Disabled, every scope is the same no-op and nothing is recorded
+    assert PROFILER.scope("draw") is _NULL_SCOPE and PROFILER.frame() is _NULL_SCOPE
+    PROFILER.count("drawn", 5)
+    assert PROFILER.frames == 0 and not PROFILER.report()
+
+    universe = UniverseGenerator(seed=1).generate_universe(num_galaxies=1, num_systems=1)
+    system = universe.galaxies[0].systems[0]
+    camera = Camera(center=system.center.pos, zoom=0.5)
+    renderer = AsciiRenderer(width=80, height=30, camera=camera, stream=NullSink(), show_profile=True)
+    PROFILER.enable(trace=True)
+    try:
+        for frame in range(5):
+            with PROFILER.frame():
+                universe.set_time(frame * 0.1)
+                renderer.render(universe, status="Test Status")
+        assert PROFILER.frames == 5
+        report = PROFILER.report()
+        for name in ("frame", "cull", "draw", "print", "update", "simulate"):
+            assert set(report[name]) == {"mean", "p50", "p95", "p99"}, name
+            assert report[name]["p50"] <= report[name]["p95"] <= report[name]["p99"]
+        assert report["draw"]["mean"] <= report["frame"]["mean"]
+        counts = PROFILER.last_counts
+        assert counts["drawn"] > 0 and counts["updated"] > 0 and "bytes" in counts
+
+        # The overlay of the previous frame follows the status
+        status = renderer.canvas.rows()[-1]
+        assert status.startswith("Test Status | frame ") and "p50/95/99" in status
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            PROFILER.dump_trace(path)
+            with open(path) as f:
+                events = json.load(f)["traceEvents"]
+        assert sum(event["name"] == "frame" and event["ph"] == "X" for event in events) == 5
+        counters = [event["args"] for event in events if event["ph"] == "C"]
+        # Later frames only write what changed, the first is whole
+        assert len(counters) == 5 and counters[0]["bytes"] > 0
+        print(f"Last frame: {PROFILER.overlay()}")
+    finally:
+        PROFILER.disable()
+        PROFILER.reset()
+
 def test_renderer(universe):
     print("\nTesting Renderer...")
-    camera = Camera(center=(0,0), zoom=1.0)
+    camera = Camera(center=universe.galaxies[0].systems[0].center.pos, zoom=1.0)
     renderer = AsciiRenderer(width=80, height=20, camera=camera)
     
     try:
         renderer.render(universe, status="Test Status")
         print("Render successful")
+
+        # Second frame should come entirely from the sprite cache
+        misses = SPRITE_CACHE.misses
+        renderer.render(universe, status="Test Status")
+        assert SPRITE_CACHE.misses == misses and SPRITE_CACHE.hits > 0
+        print(f"Sprite cache: {SPRITE_CACHE.stats()}")
+
+        # More sprites on screen than the capacity still all hit from the second frame on
+        cache = SpriteCache(capacity=4)
+        bodies = [Planet(f"Crowd-{i}", 0.01, 1.0) for i in range(6)]
+        for frame in range(3):
+            cache.begin_frame()
+            for body in bodies:
+                cache.get(body, 1, lambda: Sprite(1, np.zeros((3, 3), dtype=np.uint32)))
+        assert (cache.hits, cache.misses, cache.evictions, len(cache)) == (12, 6, 0, 6)
+        cache.begin_frame()
+        cache.get(bodies[0], 2, lambda: Sprite(2, np.zeros((5, 5), dtype=np.uint32)))
+        assert len(cache) == 4 and cache.evictions == 3
     except Exception as e:
         print(f"Render failed: {e}")
         raise
@@ -63,7 +795,27 @@ if __name__ == "__main__":
         try:
             universe = test_universe_generation()
             test_physics_update(universe)
+            test_orbit_engine(universe)
+            test_kepler_accuracy()
+            test_lazy_evaluation()
+            test_spatial_index()
+            test_streaming_generation()
+            test_parallel_generation()
+            test_snapshot()
+            test_gravity()
+            test_hybrid()
+            test_time_warp()
+            test_orbit_paths()
+            test_renderer_registry()
+            test_planet_appearance()
+            test_lod()
+            test_subtree_culling()
+            test_profiling()
             test_renderer(universe)
+            test_diff_output(universe)
+            test_run_loop(universe)
+            test_async_loop(universe)
+            test_parallel_render(universe)
             print("\nAll tests passed!")
         except Exception as e:
             print(f"\nTests failed: {e}")